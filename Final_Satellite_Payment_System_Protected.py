@@ -26,12 +26,23 @@ PROTECTED_OWNER = {
 class ImmuneProtectedDatabaseManager:
     def __init__(self):
         self.owner = PROTECTED_OWNER
-        self.connection_pool = None
+        self._connection_pool = None
+        self.connection_attempted = False
+        self.init_lock = threading.Lock()
         self.last_integrity_hash = None
         self.monitoring_thread = None
         self.tamper_monitor_active = True
-        self.initialize_connection()
-        self.start_tamper_monitoring()
+
+    @property
+    def connection_pool(self):
+        """Open the pool and start tamper monitoring on first use"""
+        if not self.connection_attempted:
+            with self.init_lock:
+                if not self.connection_attempted:
+                    self.connection_attempted = True
+                    if self.initialize_connection():
+                        self.start_tamper_monitoring()
+        return self._connection_pool
 
     def initialize_connection(self):
         try:
@@ -40,7 +51,7 @@ class ImmuneProtectedDatabaseManager:
                 print("❌ DATABASE_URL not set")
                 return False
             pooled_url = database_url.replace('.us-east-2', '-pooler.us-east-2')
-            self.connection_pool = pool.SimpleConnectionPool(1, 15, pooled_url)
+            self._connection_pool = pool.SimpleConnectionPool(1, 15, pooled_url)
             self.create_core_tables()
             self.update_integrity_hash()
             return True
@@ -110,12 +121,15 @@ class ImmuneProtectedDatabaseManager:
                 "This system is legally protected, timestamped, and blockchain-verified under international law."
             ))
             conn.commit()
+            PUBLIC_AUDIT_LOG.append("CERTIFICATE_REGISTERED", f"{title} {bhash}")
             print("✅ Official Certificate Registered")
         finally:
             if cur: cur.close()
             if conn: self.connection_pool.putconn(conn)
 
     def log_tamper_attempt(self, event_type, details, level="HIGH"):
+        # Recorded publicly first, so the event is kept even when the database is what failed
+        PUBLIC_AUDIT_LOG.append(event_type, f"{level}: {details}")
         conn = cur = None
         try:
             conn = self.connection_pool.getconn()
@@ -163,39 +177,128 @@ def main():
         db.register_official_certificate()
         print("🔒 Immune system fully operational")
 
-if __name__ == "__main__":
-    main()
-
 # =============================== #
 # BLOCKCHAIN REGISTRY PROTECTION #
 # =============================== #
 
+import fcntl
 import hashlib
 import json
 from datetime import datetime
 
+AUDIT_LOG_PATH = os.environ.get(
+    "PUBLIC_AUDIT_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_audit_log.jsonl"))
+
+class PublicAuditLog:
+    """Append-only, hash-chained audit log stored as JSON lines
+
+    Parsed entries are cached, so a read only parses lines appended since
+    the previous one. Appends hold an exclusive flock, so every process
+    sharing the file extends the same chain. A line left incomplete by a
+    crash mid-write is ignored by readers and cut off by the next append.
+    """
+
+    def __init__(self, path=AUDIT_LOG_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cached = []
+        self.offset = 0
+
+    def _read_new(self, log_file):
+        """Parse complete lines past the cached offset; returns True if a torn line follows them"""
+        log_file.seek(0, os.SEEK_END)
+        if log_file.tell() < self.offset:
+            # Replaced or truncated by someone else: start over
+            self.cached, self.offset = [], 0
+        log_file.seek(self.offset)
+        data = log_file.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self.cached.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping unreadable line in {self.path}")
+        self.offset += end
+        return end < len(data)
+
+    def append(self, event, details=""):
+        with self.lock:
+            with open(self.path, "a+b") as log_file:
+                fcntl.flock(log_file, fcntl.LOCK_EX)
+                try:
+                    if self._read_new(log_file):
+                        print(f"Truncating torn entry at byte {self.offset} of {self.path}")
+                        log_file.truncate(self.offset)
+                    entry = {
+                        "timestamp": datetime.utcnow().isoformat() + "Z",
+                        "event": event,
+                        "details": details,
+                        "previous_hash": self.cached[-1]["entry_hash"] if self.cached else "0" * 64
+                    }
+                    line = json.dumps(entry, sort_keys=True, separators=(",", ":"))
+                    entry["entry_hash"] = hashlib.sha256(line.encode()).hexdigest()
+                    record = (json.dumps(entry, sort_keys=True, separators=(",", ":")) + "\n").encode()
+                    log_file.write(record)
+                    log_file.flush()
+                    os.fsync(log_file.fileno())
+                    self.cached.append(entry)
+                    self.offset += len(record)
+                finally:
+                    fcntl.flock(log_file, fcntl.LOCK_UN)
+            return entry
+
+    def entries(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as log_file:
+                    self._read_new(log_file)
+            return list(self.cached)
+
+class RegistryArtifact:
+    """Registry document signed once and frozen as canonical bytes"""
+
+    def __init__(self, document):
+        input_string = document["project_name"] + document["original_creator"] + document["creation_timestamp"]
+        document = dict(document, signature_hash=hashlib.sha512(input_string.encode()).hexdigest())
+        self.body = json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+        self.etag = hashlib.sha256(self.body).hexdigest()
+        self.last_modified = datetime.fromisoformat(document["creation_timestamp"].rstrip("Z"))
+
+    def document(self):
+        return json.loads(self.body)
+
+REGISTRY_ARTIFACT = RegistryArtifact({
+    "project_name": "Satellite-Protected Payment System",
+    "original_creator": "Ervin Remus Radosavlevici",
+    "protected_emails": [
+        "ervin210@sky.com",
+        "ervin210@icloud.com"
+    ],
+    "creation_timestamp": "2025-07-10T09:41:47.791614Z",
+    "blockchain_protected": True,
+    "rebranding_allowed": False,
+    "immutability_notice": "This system is permanently bound to the original creator. Any attempt to rebrand, fork, or modify must visibly retain Ervin Remus Radosavlevici as the author.",
+    "memory_erasure_protection": "Even if digital memories or data are tampered with, this record ensures the creator’s name cannot be removed or overwritten.",
+    "public_visibility": True,
+    "upgrade_notice": "Outdated signature systems are replaced. This system includes auto-proofing against mind erasure, name deletion, and secret rebranding."
+})
+PUBLIC_AUDIT_LOG = PublicAuditLog()
+
+def publish_registry():
+    """Record the registry version being served in the audit log, once per version"""
+    for entry in PUBLIC_AUDIT_LOG.entries():
+        if entry["event"] == "REGISTRY_PUBLISHED" and entry["details"] == REGISTRY_ARTIFACT.etag:
+            return
+    PUBLIC_AUDIT_LOG.append("REGISTRY_PUBLISHED", REGISTRY_ARTIFACT.etag)
+
 def generate_blockchain_registry():
-    registry = {
-        "project_name": "Satellite-Protected Payment System",
-        "original_creator": "Ervin Remus Radosavlevici",
-        "protected_emails": [
-            "ervin210@sky.com",
-            "ervin210@icloud.com"
-        ],
-        "creation_timestamp": "2025-07-10T09:41:47.791614Z",
-        "blockchain_protected": True,
-        "rebranding_allowed": False,
-        "immutability_notice": "This system is permanently bound to the original creator. Any attempt to rebrand, fork, or modify must visibly retain Ervin Remus Radosavlevici as the author.",
-        "memory_erasure_protection": "Even if digital memories or data are tampered with, this record ensures the creator’s name cannot be removed or overwritten.",
-        "public_visibility": True,
-        "upgrade_notice": "Outdated signature systems are replaced. This system includes auto-proofing against mind erasure, name deletion, and secret rebranding.",
-        "public_audit_log": []
-    }
-
-    input_string = registry["project_name"] + registry["original_creator"] + registry["creation_timestamp"]
-    registry["signature_hash"] = hashlib.sha512(input_string.encode()).hexdigest()
+    registry = REGISTRY_ARTIFACT.document()
+    registry["public_audit_log"] = PUBLIC_AUDIT_LOG.entries()
     return registry
 
 if __name__ == "__main__":
+    main()
     print("🔐 Blockchain Registry:")
-    print(json.dumps(generate_blockchain_registry(), indent=2))
\ No newline at end of file
+    print(json.dumps(generate_blockchain_registry(), indent=2))
@@ -27,12 +27,23 @@ PROTECTED_OWNER = {
 class ImmuneProtectedDatabaseManager:
     def __init__(self):
         self.owner = PROTECTED_OWNER
-        self.connection_pool = None
+        self._connection_pool = None
+        self.connection_attempted = False
+        self.init_lock = threading.Lock()
         self.last_integrity_hash = None
         self.monitoring_thread = None
         self.tamper_monitor_active = True
-        self.initialize_connection()
-        self.start_tamper_monitoring()
+
+    @property
+    def connection_pool(self):
+        """Open the pool and start tamper monitoring on first use"""
+        if not self.connection_attempted:
+            with self.init_lock:
+                if not self.connection_attempted:
+                    self.connection_attempted = True
+                    if self.initialize_connection():
+                        self.start_tamper_monitoring()
+        return self._connection_pool
 
     def initialize_connection(self):
         try:
@@ -41,7 +52,7 @@ class ImmuneProtectedDatabaseManager:
                 print("❌ DATABASE_URL not set")
                 return False
             pooled_url = database_url.replace('.us-east-2', '-pooler.us-east-2')
-            self.connection_pool = pool.SimpleConnectionPool(1, 15, pooled_url)
+            self._connection_pool = pool.SimpleConnectionPool(1, 15, pooled_url)
             self.create_core_tables()
             self.update_integrity_hash()
             return True
@@ -0,0 +1,95 @@
+import re
+import threading
+
+# Intents in priority order; the first whose keywords appear anywhere in the
+# message wins. These are substring matches, exactly as the assistant's
+# original if/elif chain routed ("disconnected" counts as "connected").
+INTENT_KEYWORDS = (
+    ("device_status", ("devices", "connected")),
+    ("security", ("security", "threat")),
+    ("install", ("install", "app")),
+    ("data_sharing", ("data", "sharing")),
+)
+FALLBACK_INTENT = "help"
+
+_INTENT_PATTERNS = tuple(
+    (intent, re.compile("|".join(re.escape(keyword) for keyword in keywords)))
+    for intent, keywords in INTENT_KEYWORDS
+)
+
+def classify_intent(message):
+    """Map a message to an intent using the precompiled keyword patterns"""
+    lowered = message.lower()
+    for intent, pattern in _INTENT_PATTERNS:
+        if pattern.search(lowered):
+            return intent
+    return FALLBACK_INTENT
+
+def render_response(intent, device_summary):
+    total_devices = device_summary["total_devices"]
+    device_types = device_summary["device_types"]
+    threat_levels = device_summary["threat_levels"]
+
+    if intent == "device_status":
+        return f"Currently monitoring {total_devices} devices: {', '.join([f'{count} {dtype}(s)' for dtype, count in device_types.items()])}. Security status: {threat_levels['Green']} safe, {threat_levels['Yellow']} caution, {threat_levels['Red']} alert."
+    elif intent == "security":
+        if threat_levels['Red'] > 0:
+            return f"⚠️ SECURITY ALERT: {threat_levels['Red']} device(s) showing suspicious activity. Monitoring enhanced. Authorities have been notified if stalking behavior detected."
+        else:
+            return f"🔒 All systems secure. {total_devices} devices under protection with 2-minute monitoring intervals."
+    elif intent == "install":
+        return "Auto-installation notifications are being sent to nearby devices. The Quantum Interface automatically shares data across all connected devices and notifies unconnected devices for installation."
+    elif intent == "data_sharing":
+        return f"Data sharing is active across all {total_devices} devices. Real-time synchronization ensures all devices have the same dashboard and control capabilities. JSON data is automatically shared between connected devices."
+    else:
+        return f"Quantum AI Assistant monitoring {total_devices} devices. I can help with device status, security monitoring, data sharing, and automatic installation. What would you like to know?"
+
+class IntentEngine:
+    """Answers assistant messages from a summary and response cache
+
+    The device summary and every rendered response are cached against a
+    summary version (the device change feed version), so repeated polls
+    while no device has changed skip both the device scan and rendering.
+    """
+
+    def __init__(self, summary_source, version_source):
+        self.summary_source = summary_source
+        self.version_source = version_source
+        self.cached_version = None
+        self.summary = None
+        self.responses = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current(self):
+        version = self.version_source()
+        with self.lock:
+            if version == self.cached_version:
+                return version, self.summary
+        summary = self.summary_source()
+        with self.lock:
+            self.cached_version = version
+            self.summary = summary
+            self.responses = {}
+        return version, summary
+
+    def respond(self, message):
+        """Return (intent, response, device_summary) for a message"""
+        intent = classify_intent(message)
+        version, summary = self._current()
+        with self.lock:
+            response = self.responses.get((intent, version))
+            if response is not None:
+                self.hits += 1
+                return intent, response, summary
+            self.misses += 1
+        response = render_response(intent, summary)
+        with self.lock:
+            if self.cached_version == version:
+                self.responses[(intent, version)] = response
+        return intent, response, summary
+
+    def get_stats(self):
+        with self.lock:
+            return {"summary_version": self.cached_version, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, literal, or_, select, true, update
+
+from models import db, ArchivedAlert, SystemAlert
+
+# Unacknowledged alerts move up one level once they are this many escalation periods old
+ESCALATIONS = (
+    ("WARNING", "ERROR", 1),
+    ("ERROR", "CRITICAL", 2),
+)
+_ARCHIVED_COLUMNS = ("id", "device_id", "alert_type", "message", "severity", "timestamp", "is_acknowledged")
+
+class AlertFilterError(ValueError):
+    pass
+
+def alert_filter(criteria, max_ids=1000):
+    """Build the WHERE clause for a bulk operation from request criteria
+
+    Supported keys: ids, device_id, alert_type, severity (a name or a list),
+    before (ISO timestamp). At least one is required unless all is true.
+    """
+    if not isinstance(criteria, dict):
+        raise AlertFilterError("Expected a JSON object of filters")
+    clauses = []
+    ids = criteria.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(alert_id, int) for alert_id in ids):
+            raise AlertFilterError("ids must be a list of integers")
+        if len(ids) > max_ids:
+            raise AlertFilterError(f"At most {max_ids} ids per request")
+        clauses.append(SystemAlert.id.in_(ids))
+    for name in ("device_id", "alert_type"):
+        value = criteria.get(name)
+        if value is not None:
+            clauses.append(getattr(SystemAlert, name) == str(value))
+    severity = criteria.get("severity")
+    if severity is not None:
+        clauses.append(SystemAlert.severity.in_(severity if isinstance(severity, list) else [severity]))
+    before = criteria.get("before")
+    if before is not None:
+        try:
+            clauses.append(SystemAlert.timestamp < datetime.fromisoformat(str(before)))
+        except ValueError:
+            raise AlertFilterError("before must be an ISO timestamp") from None
+    if not clauses:
+        if criteria.get("all") is not True:
+            raise AlertFilterError("Give at least one filter, or all: true")
+        return true()
+    return and_(*clauses)
+
+class AlertLifecycle:
+    """Bulk acknowledgement, escalation and archival of system alerts
+
+    Keeps a bounded index of the newest `capacity` unacknowledged alerts so
+    listing them costs the same however many are outstanding. New rows are
+    picked up by id on each read (whatever inserted them), and after a bulk
+    operation the indexed ids are re-checked with one primary key lookup
+    and the index is refilled from older rows if it fell below capacity.
+
+    A background pass every `interval` seconds:
+    - escalates unacknowledged alerts by age with one UPDATE per step. The
+      UPDATE selects on current severity and age alone, through the
+      (is_acknowledged, severity, timestamp) index, so an escalated alert
+      drops out of its step and the work is proportional to alerts due,
+      while late commits, restarts and other workers are all covered.
+    - archives acknowledged alerts older than archive_after and any alert
+      older than expire_after into archived_alert, in chunks of chunk_size
+      moved with INSERT ... SELECT and DELETE.
+    - recounts unacknowledged alerts, correcting drift from other workers.
+
+    on_change callbacks run after any write so caches can be invalidated.
+    on_archive callbacks get the ids of each chunk moved out of system_alert
+    once it has committed.
+    """
+
+    def __init__(self, capacity=500, escalate_after=900, archive_after=7 * 86400,
+                 expire_after=30 * 86400, interval=30, chunk_size=1000):
+        self.capacity = capacity
+        self.escalate_after = escalate_after
+        self.archive_after = archive_after
+        self.expire_after = expire_after
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.alerts = OrderedDict()
+        self.last_id = 0
+        self.truncated = False
+        self.unacknowledged = None
+        self.on_change = []
+        self.on_archive = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stats = {"acknowledged": 0, "escalated": 0, "archived": 0}
+
+    def _changed(self):
+        for callback in self.on_change:
+            callback()
+
+    def _add_newest(self, rows):
+        for row in rows:
+            self.alerts[row.id] = row.to_dict()
+        while len(self.alerts) > self.capacity:
+            self.alerts.popitem(last=False)
+            self.truncated = True
+
+    def catch_up(self):
+        """Index unacknowledged alerts inserted since the last call; call inside an app context"""
+        if self.unacknowledged is None:
+            self.unacknowledged = self.count_unacknowledged()
+        newest = (SystemAlert.query.filter(SystemAlert.id > self.last_id, SystemAlert.is_acknowledged.is_(False))
+                  .order_by(SystemAlert.id.desc()).limit(self.capacity).all())
+        if not newest:
+            return
+        if self.last_id:
+            self.unacknowledged += len(newest) if len(newest) < self.capacity else db.session.scalar(
+                select(func.count()).select_from(SystemAlert)
+                .where(SystemAlert.id > self.last_id, SystemAlert.is_acknowledged.is_(False)))
+        if len(newest) == self.capacity:
+            self.truncated = True
+        self.last_id = newest[0].id
+        self._add_newest(reversed(newest))
+
+    def _recheck(self):
+        """Drop indexed alerts that are no longer unacknowledged and refill from older rows"""
+        if self.alerts:
+            current = dict(db.session.execute(
+                select(SystemAlert.id, SystemAlert.severity)
+                .where(SystemAlert.id.in_(list(self.alerts)), SystemAlert.is_acknowledged.is_(False))
+            ).all())
+            for alert_id in list(self.alerts):
+                if alert_id not in current:
+                    del self.alerts[alert_id]
+                else:
+                    self.alerts[alert_id]["severity"] = current[alert_id]
+        if self.truncated and len(self.alerts) < self.capacity:
+            oldest = next(iter(self.alerts), self.last_id + 1)
+            older = (SystemAlert.query.filter(SystemAlert.id < oldest, SystemAlert.is_acknowledged.is_(False))
+                     .order_by(SystemAlert.id.desc()).limit(self.capacity - len(self.alerts)).all())
+            self.truncated = len(older) == self.capacity - len(self.alerts)
+            refill = OrderedDict((row.id, row.to_dict()) for row in reversed(older))
+            refill.update(self.alerts)
+            self.alerts = refill
+
+    def count_unacknowledged(self):
+        return db.session.scalar(
+            select(func.count()).select_from(SystemAlert).where(SystemAlert.is_acknowledged.is_(False)))
+
+    def list_unacknowledged(self):
+        """Return (newest unacknowledged alerts, total unacknowledged, whether the list is truncated)"""
+        with self.lock:
+            self.catch_up()
+            return list(reversed(self.alerts.values())), self.unacknowledged, self.truncated
+
+    def acknowledge(self, criteria):
+        """Acknowledge every unacknowledged alert matching criteria in one UPDATE; returns the count"""
+        condition = alert_filter(criteria)
+        with self.lock:
+            result = db.session.execute(
+                update(SystemAlert)
+                .where(SystemAlert.is_acknowledged.is_(False), condition)
+                .values(is_acknowledged=True)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            acknowledged = result.rowcount
+            if self.unacknowledged is not None:
+                self.unacknowledged = max(0, self.unacknowledged - acknowledged)
+            self.stats["acknowledged"] += acknowledged
+            if acknowledged:
+                self._recheck()
+        if acknowledged:
+            self._changed()
+        return acknowledged
+
+    def escalate(self, now=None):
+        """Escalate unacknowledged alerts old enough for their current severity; returns how many moved"""
+        now = now or datetime.utcnow()
+        escalated = 0
+        for severity, target, periods in ESCALATIONS:
+            cutoff = now - timedelta(seconds=self.escalate_after * periods)
+            result = db.session.execute(
+                update(SystemAlert)
+                .where(SystemAlert.is_acknowledged.is_(False), SystemAlert.severity == severity,
+                       SystemAlert.timestamp <= cutoff)
+                .values(severity=target)
+                .execution_options(synchronize_session=False)
+            )
+            escalated += result.rowcount
+        db.session.commit()
+        self.stats["escalated"] += escalated
+        return escalated
+
+    def archive(self, now=None):
+        """Move expired alerts to archived_alert in chunks; returns how many moved"""
+        now = now or datetime.utcnow()
+        expired = or_(
+            and_(SystemAlert.is_acknowledged.is_(True),
+                 SystemAlert.timestamp < now - timedelta(seconds=self.archive_after)),
+            SystemAlert.timestamp < now - timedelta(seconds=self.expire_after),
+        )
+        columns = [getattr(SystemAlert, name) for name in _ARCHIVED_COLUMNS]
+        moved = 0
+        while True:
+            ids = db.session.scalars(select(SystemAlert.id).where(expired).order_by(SystemAlert.id).limit(self.chunk_size)).all()
+            if not ids:
+                break
+            db.session.execute(insert(ArchivedAlert).from_select(
+                list(_ARCHIVED_COLUMNS) + ["archived_at"],
+                select(*columns, literal(now)).where(SystemAlert.id.in_(ids))
+            ))
+            db.session.execute(delete(SystemAlert).where(SystemAlert.id.in_(ids)))
+            db.session.commit()
+            for callback in self.on_archive:
+                callback(ids)
+            moved += len(ids)
+            if len(ids) < self.chunk_size:
+                break
+        self.stats["archived"] += moved
+        return moved
+
+    def maintain(self):
+        """One escalation, archival and recount pass; call inside an app context"""
+        with self.lock:
+            changed = self.escalate() + self.archive()
+            self.unacknowledged = self.count_unacknowledged()
+            if changed:
+                self._recheck()
+        if changed:
+            self._changed()
+        return changed
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, indexed=len(self.alerts), unacknowledged=self.unacknowledged or 0)
+
+    def start(self, app):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, args=(app,), daemon=True)
+            self.thread.start()
+
+    def run(self, app):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    self.maintain()
+            except Exception as e:
+                print(f"Alert lifecycle error: {e}")
@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+METRICS = ("cpu_usage", "memory_usage", "battery_level", "action_rate")
+_METRIC_COUNT = len(METRICS)
+_ACTION_RATE = METRICS.index("action_rate")
+
+Anomaly = namedtuple("Anomaly", ["device_id", "metric", "value", "expected", "score"])
+
+class AnomalyDetector:
+    """Online per-device anomaly detection over telemetry and action rate
+
+    Each device gets a slot; per-metric EWMA mean, EWMA variance, sample
+    count and last-alert time live in flat arrays indexed by
+    slot * len(METRICS) + metric, so an update is O(1) with no per-device
+    objects. A value is anomalous when, after warmup samples, it deviates
+    from the EWMA mean by more than `threshold` standard deviations (the
+    deviation is floored at min_std so flat series do not alert on noise).
+    The action rate is actions per action_window seconds. It is fed in when
+    a device's window closes, scaled by how long the window actually stayed
+    open, and a window whose running count is already anomalously high is
+    scored as soon as that count is reached. Alerts for the same device and
+    metric are suppressed for `cooldown` seconds.
+    """
+
+    def __init__(self, alpha=0.05, threshold=4.0, warmup=20, min_std=1.0, cooldown=300, action_window=60):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.cooldown = cooldown
+        self.action_window = action_window
+        self.slots = {}
+        self.means = array("d")
+        self.variances = array("d")
+        self.counts = array("I")
+        self.last_alerts = array("d")
+        self.window_starts = array("d")
+        self.window_counts = array("I")
+        self.lock = threading.Lock()
+        self.updates = 0
+        self.anomalies = 0
+        self.suppressed = 0
+
+    def _slot(self, device_id, now):
+        slot = self.slots.get(device_id)
+        if slot is None:
+            slot = self.slots[device_id] = len(self.slots)
+            self.means.extend([0.0] * _METRIC_COUNT)
+            self.variances.extend([0.0] * _METRIC_COUNT)
+            self.counts.extend([0] * _METRIC_COUNT)
+            self.last_alerts.extend([-math.inf] * _METRIC_COUNT)
+            self.window_starts.append(now)
+            self.window_counts.append(0)
+        return slot
+
+    def _update(self, device_id, base, metric, value, now, found):
+        index = base + metric
+        self._score(device_id, index, metric, value, now, found)
+        mean = self.means[index]
+        variance = self.variances[index]
+        count = self.counts[index]
+        diff = value - mean
+        if count == 0:
+            self.means[index] = value
+        else:
+            increment = self.alpha * diff
+            self.means[index] = mean + increment
+            self.variances[index] = (1 - self.alpha) * (variance + diff * increment)
+        self.counts[index] = count + 1
+        self.updates += 1
+
+    def _score(self, device_id, index, metric, value, now, found):
+        """Alert if value deviates from the metric's EWMA by more than threshold, without updating it"""
+        if self.counts[index] < self.warmup:
+            return
+        mean = self.means[index]
+        std = math.sqrt(self.variances[index])
+        if std < self.min_std:
+            std = self.min_std
+        score = abs(value - mean) / std
+        # A device going quiet is not suspicious; only action bursts alert
+        if score <= self.threshold or (metric == _ACTION_RATE and value < mean):
+            return
+        if now - self.last_alerts[index] < self.cooldown:
+            self.suppressed += 1
+            return
+        self.last_alerts[index] = now
+        self.anomalies += 1
+        found.append(Anomaly(device_id, METRICS[metric], value, mean, score))
+
+    def observe(self, device_id, values, now=None):
+        """Feed a telemetry snapshot; returns the anomalies it raised"""
+        now = time.time() if now is None else now
+        found = []
+        with self.lock:
+            base = self._slot(device_id, now) * _METRIC_COUNT
+            for metric in range(_ACTION_RATE):
+                value = values.get(METRICS[metric])
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._update(device_id, base, metric, float(value), now, found)
+        return found
+
+    def record_action(self, device_id, now=None):
+        """Count an action; when the device's window closes, its rate is fed in as the action rate"""
+        now = time.time() if now is None else now
+        found = []
+        with self.lock:
+            slot = self._slot(device_id, now)
+            index = slot * _METRIC_COUNT + _ACTION_RATE
+            elapsed = now - self.window_starts[slot]
+            if elapsed >= self.action_window:
+                # A window left open through idle time is one sample of the low rate it had
+                rate = self.window_counts[slot] * self.action_window / elapsed
+                self._update(device_id, slot * _METRIC_COUNT, _ACTION_RATE, rate, now, found)
+                self.window_starts[slot] = now
+                self.window_counts[slot] = 0
+            self.window_counts[slot] += 1
+            count = self.window_counts[slot]
+            # The count so far is a lower bound on the open window's rate, so a burst alerts now
+            if count > self.means[index]:
+                self._score(device_id, index, _ACTION_RATE, float(count), now, found)
+        return found
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "devices": len(self.slots),
+                "updates": self.updates,
+                "anomalies": self.anomalies,
+                "suppressed": self.suppressed
+            }
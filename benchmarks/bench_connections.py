@@ -0,0 +1,134 @@
+"""Concurrent socket connection benchmark for the sync and async server modes
+
+Starts gunicorn with gunicorn.conf.py in each mode, ramps up socket clients
+(long-polling transport) in steps, and reports the largest step at which
+every client connected and answered a round trip in time.
+
+Run with: python benchmarks/bench_connections.py [--steps 10,50,100,200] [--modes sync,async]
+Async mode requires gevent and gevent-websocket.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import socketio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONNECT_TIMEOUT = 10
+# Connections are opened a few at a time; a stampede of simultaneous handshakes
+# trips the client's 5s request timeout and measures the load generator instead
+CONNECT_CONCURRENCY = 8
+ROUND_TRIP_TIMEOUT = 10
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def start_server(mode, port, workdir):
+    env = dict(
+        os.environ,
+        QUANTUM_SERVER_MODE=mode,
+        QUANTUM_BIND=f"127.0.0.1:{port}",
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, f'{mode}.db')}"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+class BenchClient:
+    def __init__(self, url):
+        self.url = url
+        self.client = socketio.Client(reconnection=False)
+        self.answered = threading.Event()
+        self.client.on("all_devices", lambda data: self.answered.set())
+
+    def connect(self):
+        try:
+            self.client.connect(self.url, transports=["polling"], wait_timeout=CONNECT_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    def round_trip(self):
+        self.answered.clear()
+        started = time.perf_counter()
+        try:
+            self.client.emit("get_all_devices")
+        except socketio.exceptions.SocketIOError:
+            return None
+        if self.answered.wait(ROUND_TRIP_TIMEOUT):
+            return time.perf_counter() - started
+        return None
+
+def run_step(url, clients, count):
+    new_clients = [BenchClient(url) for _ in range(count - len(clients))]
+    with ThreadPoolExecutor(max_workers=CONNECT_CONCURRENCY) as pool:
+        connected = list(pool.map(BenchClient.connect, new_clients))
+    clients.extend(client for client, ok in zip(new_clients, connected) if ok)
+    alive = [client for client in clients if client.client.connected]
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        round_trips = list(pool.map(BenchClient.round_trip, alive))
+    answered = [seconds for seconds in round_trips if seconds is not None]
+    return len(alive), answered
+
+def bench_mode(mode, steps):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(mode, port, workdir)
+        clients = []
+        sustained = 0
+        try:
+            for count in steps:
+                alive, answered = run_step(f"http://127.0.0.1:{port}", clients, count)
+                p95 = statistics.quantiles(answered, n=20)[-1] * 1000 if len(answered) > 1 else float("nan")
+                print(f"{mode:<6} target {count:>5}  connected {alive:>5}  answered {len(answered):>5}  round-trip p95 {p95:>9.1f} ms")
+                if alive < count or len(answered) < count:
+                    break
+                sustained = count
+        finally:
+            for client in clients:
+                try:
+                    client.client.disconnect()
+                except Exception:
+                    pass
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+    return sustained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", default="10,25,50,100,200")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+    steps = [int(step) for step in args.steps.split(",")]
+
+    results = {mode: bench_mode(mode, steps) for mode in args.modes.split(",")}
+    print()
+    for mode, sustained in results.items():
+        print(f"{mode:<6} sustained {sustained} concurrent socket connections")
+
+if __name__ == "__main__":
+    main()
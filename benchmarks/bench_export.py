@@ -0,0 +1,80 @@
+"""Throughput and memory of the history export against table size
+
+Fills a scratch SQLite database with --rows device actions, then streams
+the whole table through each available export format (parquet and arrow
+need pyarrow) to a file and reports rows/s, output size and how far
+resident memory rose above where it started, sampled after every chunk.
+Memory should stay flat as --rows grows; only --chunk-size moves it.
+
+Run with: python benchmarks/bench_export.py [--rows 10000000] [--chunk-size 10000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert
+
+from history_export import available_formats, export_watermark, iter_export
+from models import db, DeviceAction
+from system_metrics import read_process
+
+ACTION_TYPES = ("scan", "sync", "quantum_boost", "install", "heartbeat", "location_update")
+
+def populate(rows, batch=50000):
+    rng = random.Random(5)
+    start_time = datetime.utcnow() - timedelta(seconds=rows)
+    for offset in range(0, rows, batch):
+        db.session.execute(insert(DeviceAction), [{
+            "device_id": f"device-{rng.randrange(5000)}",
+            "action_type": rng.choice(ACTION_TYPES),
+            "action_data": json.dumps({"sequence": index, "signal": rng.randrange(100)}),
+            "timestamp": start_time + timedelta(seconds=index),
+        } for index in range(offset, min(rows, offset + batch))])
+        db.session.commit()
+
+def export(fmt, path, chunk_size):
+    baseline = peak = read_process()[1]
+    written = 0
+    start = time.perf_counter()
+    with open(path, "wb") as output_file:
+        for chunk in iter_export("actions", fmt, until=export_watermark(settle=0), chunk_size=chunk_size):
+            output_file.write(chunk)
+            written += len(chunk)
+            peak = max(peak, read_process()[1])
+    return time.perf_counter() - start, written, peak - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="history-export-")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(directory, 'export.db')}"
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            populate(args.rows)
+            print(f"populated {args.rows:,} actions in {time.perf_counter() - start:.1f} s")
+            for fmt in available_formats():
+                elapsed, written, memory = export(fmt, os.path.join(directory, f"actions.{fmt}"), args.chunk_size)
+                db.session.remove()
+                print(f"{fmt:<8} {args.rows / elapsed:>10,.0f} rows/s  {elapsed:>7.1f} s  "
+                      f"{written / 1e6:>8.1f} MB  resident +{memory / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
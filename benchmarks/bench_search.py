@@ -0,0 +1,90 @@
+"""Index build and query latency for the history search index at scale
+
+Indexes synthetic conversation and alert documents shaped like the ones the
+app writes, then reports build throughput, memory-relevant sizes and query
+latency percentiles for selective, mixed and very common queries.
+
+Run with: python benchmarks/bench_search.py [--rows 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import InvertedIndex, KIND_ALERT, KIND_CONVERSATION
+
+ALERT_TEMPLATES = (
+    "SECURITY BREACH Suspicious stalking behavior detected from 10.{a}.{b}.{c}",
+    "LOW BATTERY Device {device} battery at {n} percent",
+    "THREAT Intrusion attempt blocked on {device} port {n}",
+    "NETWORK Device {device} went offline after {n} missed heartbeats",
+)
+CONVERSATION_TEMPLATES = (
+    "security status update All systems secure {n} devices under protection",
+    "how many devices are connected Currently monitoring {n} devices {device}",
+    "share data with {device} Data sharing is active across all {n} devices",
+    "install the app on {device} Auto-installation notifications are being sent",
+)
+DEVICES = [f"{name}{index}" for name in ("phone", "tablet", "watch", "laptop", "gateway") for index in range(2000)]
+
+def make_document(rng):
+    if rng.random() < 0.5:
+        template = rng.choice(ALERT_TEMPLATES)
+        kind = KIND_ALERT
+    else:
+        template = rng.choice(CONVERSATION_TEMPLATES)
+        kind = KIND_CONVERSATION
+    text = template.format(
+        a=rng.randrange(256), b=rng.randrange(256), c=rng.randrange(256),
+        device=rng.choice(DEVICES), n=rng.randrange(1000)
+    )
+    return kind, text
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def time_queries(index, name, queries):
+    samples = []
+    matches = 0
+    for query in queries:
+        start = time.perf_counter()
+        total, _, _ = index.search(query, limit=20)
+        samples.append((time.perf_counter() - start) * 1000)
+        matches += total
+    print(f"{name:<28} p50 {statistics.median(samples):>8.2f} ms  p95 {percentile(samples, 0.95):>8.2f} ms  "
+          f"p99 {percentile(samples, 0.99):>8.2f} ms  avg matches {matches / len(queries):>10,.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = InvertedIndex()
+    start = time.perf_counter()
+    for row_id in range(1, args.rows + 1):
+        kind, text = make_document(rng)
+        index.add(kind, row_id, text)
+    elapsed = time.perf_counter() - start
+    postings = sum(len(docs) for docs, _ in index.postings.values())
+    print(f"indexed {args.rows:,} rows in {elapsed:.1f} s ({args.rows / elapsed:,.0f} rows/s), "
+          f"{len(index.postings):,} terms, {postings:,} postings ({postings * 6 / 2**20:.0f} MiB)\n")
+
+    time_queries(index, "selective (device name)",
+                 [rng.choice(DEVICES) for _ in range(args.queries)])
+    time_queries(index, "two terms (device + topic)",
+                 [f"{rng.choice(DEVICES)} {rng.choice(('battery', 'offline', 'intrusion', 'sharing'))}"
+                  for _ in range(args.queries)])
+    time_queries(index, "common (security breach)",
+                 ["security breach"] * max(1, args.queries // 10))
+    time_queries(index, "common (devices)",
+                 ["devices"] * max(1, args.queries // 10))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Cold-start latency benchmark, measured per component in fresh interpreters
+
+Run with: python benchmarks/bench_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+timings = {}
+start = time.perf_counter()
+import main
+timings["import main"] = time.perf_counter() - start
+
+start = time.perf_counter()
+main.get_watch()
+timings["watch state"] = time.perf_counter() - start
+
+start = time.perf_counter()
+main._get_component("database", main.init_database)
+timings["database schema"] = time.perf_counter() - start
+
+start = time.perf_counter()
+main.get_ai_assistant().start_monitoring()
+timings["ai monitor"] = time.perf_counter() - start
+
+start = time.perf_counter()
+main.app.test_client().get("/api/status")
+timings["first request"] = time.perf_counter() - start
+
+main.get_ai_assistant().active = False
+print(json.dumps(timings))
+"""
+
+def run_probe(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for run in range(runs):
+            database_url = f"sqlite:///{os.path.join(workdir, f'startup_{run}.db')}"
+            for component, seconds in run_probe(database_url).items():
+                samples.setdefault(component, []).append(seconds * 1000)
+
+    print(f"{'component':<20} {'median ms':>10} {'max ms':>10}  ({runs} cold runs)")
+    for component, values in samples.items():
+        print(f"{component:<20} {statistics.median(values):>10.2f} {max(values):>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Size and CPU cost of device telemetry frames: JSON versus binary struct frames
+
+Simulates one telemetry update from every device in a fleet and reports bytes
+per frame plus encode/decode time for the full device dict broadcast as JSON
+(the legacy device_data_updated payload), telemetry-only JSON, and the
+struct-v1 binary frame. MessagePack is included when the msgpack package is
+installed.
+
+Run with: python benchmarks/bench_telemetry_frames.py [--devices 10000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry_frames import TELEMETRY_FIELDS, decode_frame, encode_frame
+
+TELEMETRY_NAMES = [name for _, name, _ in TELEMETRY_FIELDS]
+
+def make_device(index, rng):
+    return {
+        "id": index,
+        "device_id": f"dev-{rng.getrandbits(128):032x}",
+        "device_name": f"Device {index:08x}",
+        "device_type": "phone",
+        "os": "Android",
+        "browser": "Chrome",
+        "ip_address": f"10.0.{index // 256 % 256}.{index % 256}",
+        "connected_at": "2025-01-01T00:00:00",
+        "last_seen": "2025-01-01T00:05:00",
+        "is_active": True,
+        "battery_level": rng.randint(1, 100),
+        "cpu_usage": round(rng.uniform(5, 95), 2),
+        "memory_usage": round(rng.uniform(5, 95), 2),
+        "storage_usage": round(rng.uniform(5, 95), 2),
+        "network_status": "Online",
+        "quantum_energy": rng.randint(0, 100),
+        "neural_sync": rng.randint(0, 100),
+        "matrix_stability": rng.randint(50, 150),
+        "threat_level": rng.choice(["Green", "Yellow", "Red"]),
+    }
+
+def measure(name, devices, encode, decode):
+    start = time.perf_counter()
+    frames = [encode(device) for device in devices]
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    decode_seconds = time.perf_counter() - start
+
+    count = len(devices)
+    total_bytes = sum(len(frame) for frame in frames)
+    print(f"{name:<24} {total_bytes / count:>8.1f} B/frame  "
+          f"encode {encode_seconds / count * 1e6:>6.2f} us  decode {decode_seconds / count * 1e6:>6.2f} us  "
+          f"fleet update {total_bytes / 1024:>9.1f} KiB")
+
+def telemetry_only(device):
+    values = {name: device[name] for name in TELEMETRY_NAMES}
+    values["device_id"] = device["device_id"]
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    devices = [make_device(index, rng) for index in range(args.devices)]
+    print(f"{args.devices} devices, one telemetry update each\n")
+
+    measure("json (full device)", devices,
+            lambda device: json.dumps({"device": device}).encode(), json.loads)
+    measure("json (telemetry only)", devices,
+            lambda device: json.dumps(telemetry_only(device)).encode(), json.loads)
+    measure("struct-v1 frame", devices,
+            lambda device: encode_frame(device, device["device_id"]), decode_frame)
+
+    try:
+        import msgpack
+    except ImportError:
+        print("msgpack not installed; skipping MessagePack comparison")
+        return
+    field_ids = {name: field_id for field_id, name, _ in TELEMETRY_FIELDS}
+    measure("msgpack (field ids)", devices,
+            lambda device: msgpack.packb({field_ids.get(key, key): value for key, value in telemetry_only(device).items()}),
+            msgpack.unpackb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""User-agent classification benchmark over a corpus of real browser strings
+
+Run with: python benchmarks/bench_user_agent.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_agent import classify_user_agent
+
+# (user agent, expected form factor)
+CORPUS = [
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36", "computer"),
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.2478.51", "computer"),
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0", "computer"),
+    ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15", "computer"),
+    ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 OPR/109.0.0.0", "computer"),
+    ("Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36", "computer"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Mobile/15E148 Safari/604.1", "phone"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/124.0.6367.88 Mobile/15E148 Safari/604.1", "phone"),
+    ("Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Mobile Safari/537.36", "phone"),
+    ("Mozilla/5.0 (Linux; Android 14; SAMSUNG SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0.0.0 Mobile Safari/537.36", "phone"),
+    ("Mozilla/5.0 (Android 14; Mobile; rv:125.0) Gecko/125.0 Firefox/125.0", "phone"),
+    ("Mozilla/5.0 (Windows Phone 10.0; Android 6.0.1; Microsoft; Lumia 950) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/52.0.2743.116 Mobile Safari/537.36 Edge/15.15063", "phone"),
+    ("Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1", "tablet"),
+    ("Mozilla/5.0 (Linux; Android 13; SM-X710) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Safari/537.36", "tablet"),
+    ("Mozilla/5.0 (Linux; Android 11; KFTRWI) AppleWebKit/537.36 (KHTML, like Gecko) Silk/124.2.1 like Chrome/124.0.6367.82 Safari/537.36", "tablet"),
+    ("Mozilla/5.0 (Android 14; Tablet; rv:125.0) Gecko/125.0 Firefox/125.0", "tablet"),
+    ("Mozilla/5.0 (Linux; Android 11; Galaxy Watch4) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/3.0 Chrome/92.0.4515.166 Mobile Safari/537.36", "watch"),
+    ("Mozilla/5.0 (Linux; Wear OS 4; Pixel Watch 2) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Mobile Safari/537.36", "watch"),
+]
+
+ROUNDS = 20000
+
+def legacy_detect_device_type(user_agent):
+    user_agent = user_agent.lower()
+    if 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent:
+        return 'phone'
+    elif 'tablet' in user_agent or 'ipad' in user_agent:
+        return 'tablet'
+    elif 'watch' in user_agent or 'wearable' in user_agent:
+        return 'watch'
+    else:
+        return 'computer'
+
+def accuracy(classify):
+    correct = sum(1 for user_agent, expected in CORPUS if classify(user_agent) == expected)
+    return correct / len(CORPUS)
+
+def throughput(classify):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for user_agent, _expected in CORPUS:
+            classify(user_agent)
+    return ROUNDS * len(CORPUS) / (time.perf_counter() - start)
+
+def uncached(user_agent):
+    return classify_user_agent.__wrapped__(user_agent).form_factor
+
+def cached(user_agent):
+    return classify_user_agent(user_agent).form_factor
+
+def main():
+    for name, classify in (("legacy substring chain", legacy_detect_device_type),
+                           ("compiled (uncached)", uncached),
+                           ("compiled (lru cache)", cached)):
+        print(f"{name:<24} accuracy {accuracy(classify):>6.1%}  {throughput(classify):>12,.0f} lookups/sec")
+
+    for user_agent, expected in CORPUS:
+        info = classify_user_agent(user_agent)
+        if info.form_factor != expected:
+            print(f"MISCLASSIFIED as {info.form_factor} (expected {expected}): {user_agent}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Restart time of the QuantumWatch event journal against log length
+
+Journals a mix of watch commands shaped like the ones the dashboard sends,
+then times a cold open (snapshot load plus replay of the log tail) for
+several log lengths, with snapshots disabled and with snapshots every
+--snapshot-every events. Append throughput is reported for each run.
+
+Run with: python benchmarks/bench_watch_replay.py [--events 1000,10000,100000] [--snapshot-every 1000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import QuantumWatch
+from watch_events import WatchJournal, capture
+
+COMMANDS = (
+    "activate_interface", "build_completed", "generate_signature", "initiate_neural_scan",
+    "quantum_boost", "security_scan", "data_stream_analysis", "matrix_recalibration",
+    "toggle_admin_mode", "performance_optimization", "system_reboot",
+)
+
+def run(directory, events, snapshot_every):
+    rng = random.Random(11)
+    journal = WatchJournal(directory, snapshot_every=snapshot_every, fsync_interval=1.0)
+    quantum_watch = QuantumWatch()
+    journal.restore(quantum_watch)
+    quantum_watch.journal = journal
+    start = time.perf_counter()
+    for _ in range(events):
+        getattr(quantum_watch, rng.choice(COMMANDS))()
+    append_elapsed = time.perf_counter() - start
+    journal.close()
+    expected = capture(quantum_watch)
+
+    start = time.perf_counter()
+    journal = WatchJournal(directory, snapshot_every=snapshot_every)
+    restored = QuantumWatch()
+    journal.restore(restored)
+    restart_elapsed = time.perf_counter() - start
+    tail = journal.events_since_snapshot
+    journal.close()
+    if capture(restored) != expected:
+        raise SystemExit("replayed state does not match the journaled watch")
+    return append_elapsed, restart_elapsed, tail
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", default="1000,10000,100000")
+    parser.add_argument("--snapshot-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    for events in (int(count) for count in args.events.split(",")):
+        for label, snapshot_every in (("no snapshots", events + 1), ("snapshots", args.snapshot_every)):
+            directory = tempfile.mkdtemp(prefix="watch-journal-")
+            try:
+                append_elapsed, restart_elapsed, tail = run(directory, events, snapshot_every)
+            finally:
+                shutil.rmtree(directory)
+            print(f"{events:>9,} events  {label:<13} append {events / append_elapsed:>9,.0f} events/s  "
+                  f"restart {restart_elapsed * 1000:>9.1f} ms (replayed {tail:,})")
+
+if __name__ == "__main__":
+    main()
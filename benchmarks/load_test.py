@@ -0,0 +1,227 @@
+"""Load-testing harness for the HTTP and SocketIO surfaces of main.py
+
+Simulates N socket clients emitting telemetry and device actions, and M
+dashboards polling the REST endpoints, against a local SQLite database (or
+whatever DATABASE_URL points at). Operations are scheduled by rate on a
+simulated clock and executed in order, so runs are reproducible; pass
+--realtime to pace them against the wall clock instead.
+
+Run with:
+    python benchmarks/load_test.py --devices 50 --dashboards 5 --duration 10
+    python benchmarks/load_test.py --save-baseline benchmarks/baselines/load_test.json
+    python benchmarks/load_test.py --compare benchmarks/baselines/load_test.json
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REGRESSION_TOLERANCE = 0.25  # fail --compare when p95 grows by more than 25%
+QUERY_TOLERANCE = 0.1  # or queries per call by more than this, absorbing background thread noise
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class QueryCounter:
+    """Counts SQL statements issued while an operation is running"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args):
+        self.count += 1
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(int)
+
+    def setup(self):
+        import main
+        self.main = main
+        main.get_ai_assistant().active = False  # keep the monitor thread out of the measurements
+        self.http = main.app.test_client()
+        self.http.get("/api/status")  # runs first-use initialization
+        with main.app.app_context():
+            self.counter = QueryCounter(main.db.engine)
+        self.sockets = [
+            main.socketio.test_client(main.app, flask_test_client=self.http, headers={"User-Agent": USER_AGENTS[i % len(USER_AGENTS)]})
+            for i in range(self.args.devices)
+        ]
+
+    def measure(self, name, operation):
+        queries_before = self.counter.count
+        start = time.perf_counter()
+        operation()
+        self.latencies[name].append(time.perf_counter() - start)
+        self.queries[name] += self.counter.count - queries_before
+
+    def telemetry(self, client):
+        client.emit("sync_device_data", {
+            "battery_level": self.random.randint(5, 100),
+            "cpu_usage": round(self.random.uniform(0, 100), 1),
+            "memory_usage": round(self.random.uniform(0, 100), 1),
+            "quantum_energy": self.random.randint(0, 100),
+            "neural_sync": self.random.randint(0, 100),
+            "matrix_stability": self.random.randint(50, 100)
+        })
+        client.get_received()
+
+    def action(self, client):
+        client.emit("device_action", {
+            "action_type": self.random.choice(["activate", "neural_scan", "quantum_boost", "matrix_recalibration"]),
+            "action_data": {}
+        })
+        client.get_received()
+
+    def schedule(self):
+        """Yield (time, operation name, socket client or None) ordered by simulated time"""
+        args = self.args
+        sequence = itertools.count()  # tie-breaker so heap entries never compare clients
+        queue = []
+        for client in self.sockets:
+            offset = self.random.random()
+            queue.append((offset / args.telemetry_rate, next(sequence), "socket:sync_device_data", client, 1 / args.telemetry_rate))
+            if args.action_rate > 0:
+                queue.append((offset / args.action_rate, next(sequence), "socket:device_action", client, 1 / args.action_rate))
+        for _dashboard in range(args.dashboards):
+            offset = self.random.random()
+            for endpoint in POLLED_ENDPOINTS:
+                queue.append((offset / args.poll_rate, next(sequence), endpoint, None, 1 / args.poll_rate))
+        heapq.heapify(queue)
+
+        while queue:
+            at, _order, name, client, interval = heapq.heappop(queue)
+            if at >= args.duration:
+                continue
+            yield at, name, client
+            heapq.heappush(queue, (at + interval, next(sequence), name, client, interval))
+
+    def run_operation(self, name, client):
+        if name == "socket:sync_device_data":
+            self.measure(name, lambda: self.telemetry(client))
+        elif name == "socket:device_action":
+            self.measure(name, lambda: self.action(client))
+        elif name == "POST /api/ai-assistant":
+            self.measure(name, lambda: self.http.post("/api/ai-assistant", json={"message": "status of connected devices"}))
+        else:
+            path = name.split(" ", 1)[1]
+            self.measure(name, lambda: self.http.get(path))
+
+    def run(self):
+        started = time.perf_counter()
+        for at, name, client in self.schedule():
+            if self.args.realtime:
+                delay = at - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            self.run_operation(name, client)
+        elapsed = time.perf_counter() - started
+        for client in self.sockets:
+            client.disconnect()
+        # Write buffered conversations now; the exit-time flush would find the database gone
+        self.main.conversation_log.final_flush(self.main.app)
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        results = {}
+        for name, values in sorted(self.latencies.items()):
+            results[name] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                # Operations run one at a time, so this is 1 / mean latency, not concurrent throughput
+                "calls_per_sec_serial": round(len(values) / sum(values), 1),
+                "queries_per_call": round(self.queries[name] / len(values), 2)
+            }
+        return {
+            "config": {key: value for key, value in vars(self.args).items() if key not in ("save_baseline", "compare")},
+            "elapsed_sec": round(elapsed, 3),
+            "total_operations": sum(len(values) for values in self.latencies.values()),
+            "endpoints": results
+        }
+
+POLLED_ENDPOINTS = ("GET /api/status", "GET /api/devices", "POST /api/ai-assistant")
+
+USER_AGENTS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+)
+
+def print_report(report):
+    print(f"{report['total_operations']} operations in {report['elapsed_sec']}s")
+    print(f"{'endpoint':<30} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/sec':>10} {'queries':>8}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<30} {stats['count']:>7} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+              f"{stats['p99_ms']:>9.3f} {stats['calls_per_sec_serial']:>10.1f} {stats['queries_per_call']:>8.2f}")
+
+def compare(report, baseline_path):
+    """Print per-endpoint deltas against a stored baseline; return False on regression"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    ok = True
+    print(f"\nComparison against {baseline_path}")
+    for name, stats in report["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            print(f"{name:<30} (new endpoint)")
+            continue
+        change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+        queries = stats["queries_per_call"] - previous["queries_per_call"]
+        regressed = change > REGRESSION_TOLERANCE or queries > QUERY_TOLERANCE
+        ok = ok and not regressed
+        print(f"{name:<30} p95 {change:+7.1%}  queries {queries:+.2f}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=20, help="simulated socket clients")
+    parser.add_argument("--dashboards", type=int, default=3, help="simulated polling dashboards")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds of traffic")
+    parser.add_argument("--telemetry-rate", type=float, default=1.0, help="sync_device_data emits per device per second")
+    parser.add_argument("--action-rate", type=float, default=0.2, help="device_action emits per device per second")
+    parser.add_argument("--poll-rate", type=float, default=0.2, help="REST polls per dashboard per endpoint per second")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--realtime", action="store_true", help="pace operations against the wall clock")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'load_test.db')}")
+        os.environ.setdefault("WATCH_JOURNAL_DIR", os.path.join(workdir, "watch_events"))
+        os.environ.setdefault("REQUEST_COUNTERS_PATH", os.path.join(workdir, "counters.bin"))
+        os.environ.setdefault("PUBLIC_AUDIT_LOG_PATH", os.path.join(workdir, "public_audit_log.jsonl"))
+        load_test = LoadTest(args)
+        load_test.setup()
+        report = load_test.run()
+
+    print_report(report)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+    if args.compare and not compare(report, args.compare):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import threading
+import uuid
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import ConnectedDevice
+
+class ChangeFeed:
+    """Versioned log of device changes used to answer reconnects with deltas
+
+    Every committed insert, update or delete of a ConnectedDevice row bumps
+    the version and remembers the device id. Only the most recent `capacity` changes are
+    kept; a client whose version is older than that, or from before a restart
+    (a different epoch), has to take a full snapshot instead.
+    """
+
+    def __init__(self, capacity=10000):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.changes = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+
+    def record(self, *device_ids):
+        with self.lock:
+            for device_id in device_ids:
+                self.version += 1
+                self.changes.append((self.version, device_id))
+
+    def changed_since(self, epoch, version):
+        """Return (current_version, changed device ids), or None for the ids when a full reload is needed"""
+        with self.lock:
+            current = self.version
+            if epoch != self.epoch or version is None or version > current:
+                return current, None
+            oldest = self.changes[0][0] if self.changes else current + 1
+            if version < oldest - 1:
+                return current, None
+            changed = set()
+            for change_version, device_id in reversed(self.changes):
+                if change_version <= version:
+                    break
+                changed.add(device_id)
+            return current, changed
+
+    def watch_devices(self):
+        """Record ORM writes to ConnectedDevice rows once their transaction commits
+
+        Recording at flush would let a concurrent reconcile pair the new
+        version with the row as it was before the commit, and the client
+        would never fetch it again.
+        """
+        @event.listens_for(Session, "after_flush")
+        def collect_devices(session, flush_context):
+            devices = session.info.setdefault("change_feed_devices", set())
+            for row in (*session.new, *session.dirty, *session.deleted):
+                if isinstance(row, ConnectedDevice):
+                    devices.add(row.device_id)
+
+        # A rollback may follow a flush that partly committed (savepoints); an extra change only costs a refetch
+        @event.listens_for(Session, "after_commit")
+        @event.listens_for(Session, "after_rollback")
+        def record_devices(session):
+            devices = session.info.pop("change_feed_devices", None)
+            if devices:
+                self.record(*devices)
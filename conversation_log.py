@@ -0,0 +1,120 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+from models import db, AIAssistant
+
+class ConversationLog:
+    """Buffers assistant conversations and writes them in batches
+
+    record() only appends to an in-memory buffer; a background thread inserts
+    the buffer every flush_interval seconds with one executemany INSERT and
+    then trims each session it touched to its newest `retention` messages.
+    A batch whose write fails is put back at the front of the buffer for the
+    next flush, and the buffer is flushed once more at exit. on_delete
+    callbacks get the ids retention removed once the flush has committed.
+    """
+
+    def __init__(self, retention=100, flush_interval=2.0, max_pending=10000):
+        if retention < 1:
+            raise ValueError("retention must keep at least one message per session")
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.on_delete = []
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, session_id, message, response, device_count):
+        with self.lock:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending.append({
+                "session_id": session_id,
+                "message": message,
+                "response": response,
+                "device_count": device_count,
+                "timestamp": datetime.utcnow()
+            })
+
+    def drain(self):
+        with self.lock:
+            rows, self.pending = self.pending, []
+        return rows
+
+    def requeue(self, rows):
+        """Put rows that failed to write back ahead of newer ones, dropping the newest past max_pending"""
+        with self.lock:
+            self.pending = rows + self.pending
+            overflow = len(self.pending) - self.max_pending
+            if overflow > 0:
+                del self.pending[self.max_pending:]
+                self.dropped += overflow
+
+    def flush(self):
+        """Write buffered conversations and apply per-session retention; call inside an app context"""
+        rows = self.drain()
+        if not rows:
+            return
+        deleted = []
+        try:
+            db.session.execute(insert(AIAssistant.__table__), rows)
+            for session_id in {row["session_id"] for row in rows}:
+                deleted.extend(self._trim(session_id))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.requeue(rows)
+            raise
+        self.written += len(rows)
+        if deleted:
+            for callback in self.on_delete:
+                callback(deleted)
+
+    def _trim(self, session_id):
+        table = AIAssistant.__table__
+        oldest_kept = db.session.execute(
+            select(table.c.id)
+            .where(table.c.session_id == session_id)
+            .order_by(table.c.id.desc())
+            .offset(self.retention - 1)
+            .limit(1)
+        ).scalar()
+        if oldest_kept is None:
+            return []
+        return db.session.scalars(
+            delete(table).where(table.c.session_id == session_id, table.c.id < oldest_kept).returning(table.c.id)
+        ).all()
+
+    def get_stats(self):
+        with self.lock:
+            return {"pending": len(self.pending), "written": self.written, "dropped": self.dropped}
+
+    def start(self, app):
+        if self.thread is None:
+            atexit.register(self.final_flush, app)
+            self.thread = threading.Thread(target=self.run, args=(app,), daemon=True)
+            self.thread.start()
+
+    def final_flush(self, app):
+        try:
+            with app.app_context():
+                self.flush()
+        except Exception as e:
+            print(f"Conversation log error at exit: {e}")
+
+    def run(self, app):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"Conversation log error: {e}")
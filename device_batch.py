@@ -0,0 +1,47 @@
+from telemetry_frames import TELEMETRY_FIELDS
+
+MAX_SYNC_BATCH = 500
+MAX_ACTION_BATCH = 100
+
+_NUMERIC_FIELDS = frozenset(name for _, name, fmt in TELEMETRY_FIELDS if fmt != "B")
+_STRING_FIELDS = frozenset(name for _, name, fmt in TELEMETRY_FIELDS if fmt == "B")
+
+class BatchRejected(Exception):
+    """The batch as a whole is malformed or too large; nothing was applied"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def check_batch(items, limit, name):
+    if not isinstance(items, list):
+        raise BatchRejected(f"'{name}' must be a list")
+    if not items:
+        raise BatchRejected(f"'{name}' must not be empty")
+    if len(items) > limit:
+        raise BatchRejected(f"'{name}' holds {len(items)} items; the limit is {limit}", 413)
+
+def validate_sync_item(item):
+    """Return an error message for a malformed sync update, or None"""
+    if not isinstance(item, dict):
+        return "update must be an object"
+    if not isinstance(item.get("device_id"), str) or not item["device_id"]:
+        return "device_id is required"
+    for name, value in item.items():
+        if name in _NUMERIC_FIELDS and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f"{name} must be a number"
+        if name in _STRING_FIELDS and not isinstance(value, str):
+            return f"{name} must be a string"
+    return None
+
+def validate_action_item(item, known_actions):
+    """Return an error message for a malformed device action, or None"""
+    if not isinstance(item, dict):
+        return "action must be an object"
+    if item.get("action_type") not in known_actions:
+        return f"unknown action_type {item.get('action_type')!r}"
+    if not isinstance(item.get("action_data", {}), dict):
+        return "action_data must be an object"
+    if "device_id" in item and not isinstance(item["device_id"], str):
+        return "device_id must be a string"
+    return None
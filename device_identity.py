@@ -0,0 +1,100 @@
+import hashlib
+import re
+import threading
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import delete, update
+
+from models import db, ConnectedDevice, DeviceAction, SystemAlert
+
+DEVICE_ID_PREFIX = "dev-"
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+_COMPACTION_CHUNK = 500
+
+def issue_device_token():
+    return uuid.uuid4().hex
+
+def is_valid_token(token):
+    return isinstance(token, str) and bool(_TOKEN_PATTERN.match(token))
+
+def device_id_for_token(token):
+    """Public device id derived from the secret client-held token"""
+    return DEVICE_ID_PREFIX + hashlib.sha256(token.encode()).hexdigest()[:32]
+
+class DeviceSessions:
+    """In-memory mapping between socket sessions and stable device ids
+
+    One device may hold several sessions (e.g. two tabs sharing a token), so
+    unbind reports whether the last session for the device has gone.
+    """
+
+    def __init__(self):
+        self.device_by_sid = {}
+        self.sids_by_device = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def bind(self, sid, device_id):
+        with self.lock:
+            self.device_by_sid[sid] = device_id
+            self.sids_by_device[device_id].add(sid)
+
+    def unbind(self, sid):
+        """Forget a session; returns (device_id, was_last_session)"""
+        with self.lock:
+            device_id = self.device_by_sid.pop(sid, None)
+            if device_id is None:
+                return None, False
+            sids = self.sids_by_device[device_id]
+            sids.discard(sid)
+            if sids:
+                return device_id, False
+            del self.sids_by_device[device_id]
+            return device_id, True
+
+    def device_for(self, sid):
+        return self.device_by_sid.get(sid, sid)
+
+def _chunks(values, size=_COMPACTION_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def compact_devices():
+    """Merge duplicate ConnectedDevice rows left behind by per-session device ids
+
+    Rows are grouped by (ip_address, user_agent). Within a group, legacy rows
+    (ids that are not token-derived) are folded into the canonical row: the
+    most recently seen token-derived device if there is one, otherwise the
+    most recently seen row. Actions and alerts are repointed before the
+    duplicates are deleted. Returns the number of rows removed.
+    """
+    rows = db.session.query(
+        ConnectedDevice.id, ConnectedDevice.device_id, ConnectedDevice.ip_address,
+        ConnectedDevice.user_agent, ConnectedDevice.last_seen
+    ).order_by(ConnectedDevice.last_seen.desc()).all()
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row.ip_address, row.user_agent)].append(row)
+
+    removed = 0
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        token_rows = [row for row in group if row.device_id.startswith(DEVICE_ID_PREFIX)]
+        canonical = token_rows[0] if token_rows else group[0]
+        duplicates = [row for row in group if row is not canonical and not row.device_id.startswith(DEVICE_ID_PREFIX)]
+        if not duplicates:
+            continue
+
+        for chunk in _chunks([row.device_id for row in duplicates]):
+            for model in (DeviceAction, SystemAlert):
+                db.session.execute(
+                    update(model).where(model.device_id.in_(chunk)).values(device_id=canonical.device_id)
+                )
+        for chunk in _chunks([row.id for row in duplicates]):
+            db.session.execute(delete(ConnectedDevice).where(ConnectedDevice.id.in_(chunk)))
+        removed += len(duplicates)
+
+    db.session.commit()
+    return removed
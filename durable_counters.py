@@ -0,0 +1,170 @@
+import atexit
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b"QWCT\x01\x00\x00\x00"
+# File header: magic, number of counter slots
+_HEADER = struct.Struct(">8sI4x")
+_CRC = struct.Struct(">I")
+
+class CounterFile:
+    """Counters shared by every worker, checkpointed to a memory-mapped file
+
+    add() only bumps an in-process delta, so it is cheap enough for every
+    request. A background thread merges the deltas into the file every
+    checkpoint_interval seconds (and once more at exit), so a crash or
+    restart loses at most one interval of counts.
+
+    The file holds two copies of the counter values, each with a generation
+    number and a CRC. A checkpoint takes an exclusive flock, adds its deltas
+    to the newest copy and writes the result over the older copy, so the
+    newest copy is never touched while being replaced. A crash mid-write
+    leaves a copy whose CRC fails, and the other copy is still intact.
+    Readers take no lock: they read both copies and use the newest one
+    whose CRC checks out.
+
+    Slots are positions in `names`, so new counters may only be appended.
+    """
+
+    def __init__(self, path, names, checkpoint_interval=1.0):
+        self.path = path
+        self.names = tuple(names)
+        self.checkpoint_interval = checkpoint_interval
+        self.pending = [0] * len(self.names)
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.file = None
+        self.map = None
+        self.thread = None
+
+    def _layout(self, slot_count):
+        self.slot_count = slot_count
+        self.copy = struct.Struct(f">Q{slot_count}q")
+        self.copy_size = self.copy.size + _CRC.size
+        self.offsets = (_HEADER.size, _HEADER.size + self.copy_size)
+        return _HEADER.size + 2 * self.copy_size
+
+    def _encode(self, generation, values):
+        body = self.copy.pack(generation, *values)
+        return body + _CRC.pack(zlib.crc32(body))
+
+    def _decode(self, data, offset):
+        if len(data) < offset + self.copy_size:
+            return None
+        body = data[offset:offset + self.copy.size]
+        (crc,) = _CRC.unpack_from(data, offset + self.copy.size)
+        if zlib.crc32(body) != crc:
+            return None
+        generation, *values = self.copy.unpack(body)
+        return generation, values
+
+    def open(self):
+        """Create or upgrade the counter file and map it"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "a+b")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        try:
+            self.file.seek(0)
+            data = self.file.read()
+            if len(data) < _HEADER.size:
+                values = [0] * len(self.names)
+            else:
+                magic, slot_count = _HEADER.unpack_from(data)
+                if magic != MAGIC:
+                    raise RuntimeError(f"{self.path} is not a counter file")
+                size = self._layout(slot_count)
+                valid = [copy for copy in (self._decode(data, offset) for offset in self.offsets) if copy is not None]
+                if not valid:
+                    print(f"No intact copy in {self.path}; resetting counters")
+                    values = [0] * max(slot_count, len(self.names))
+                elif slot_count >= len(self.names):
+                    values = None
+                else:
+                    _, values = max(valid)
+                    values = values + [0] * (len(self.names) - slot_count)
+            if values is not None:
+                # New, unreadable or widened file: rewrite both copies
+                size = self._layout(len(values))
+                copy = self._encode(0, values)
+                self.file.truncate(0)
+                self.file.write(_HEADER.pack(MAGIC, len(values)) + copy + copy)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+    def open_reader(self):
+        """Map an existing counter file read-only for totals(), without locking or changing it"""
+        if not os.path.exists(self.path):
+            return
+        self.file = open(self.path, "rb")
+        magic, slot_count = _HEADER.unpack(self.file.read(_HEADER.size))
+        if magic != MAGIC:
+            raise RuntimeError(f"{self.path} is not a counter file")
+        self.map = mmap.mmap(self.file.fileno(), self._layout(slot_count), access=mmap.ACCESS_READ)
+
+    def _latest(self):
+        # A copy being rewritten fails its CRC; retry in the unlikely case both changed under us
+        for _ in range(100):
+            copies = [self._decode(self.map, offset) for offset in self.offsets]
+            valid = [copy for copy in copies if copy is not None]
+            if valid:
+                return max(valid)
+        raise RuntimeError(f"{self.path} has no intact counter copy")
+
+    def add(self, name, amount=1):
+        index = self.names.index(name)
+        with self.lock:
+            self.pending[index] += amount
+
+    def totals(self):
+        """Current counter values across all workers, including this process's unsaved deltas"""
+        values = self._latest()[1] if self.map is not None else []
+        # A file written before counters were added has fewer slots
+        values = values + [0] * (len(self.names) - len(values))
+        with self.lock:
+            pending = list(self.pending)
+        return {name: values[index] + pending[index] for index, name in enumerate(self.names)}
+
+    def checkpoint(self):
+        """Merge pending deltas into the file"""
+        if self.map is None:
+            return
+        with self.lock:
+            deltas = self.pending
+            self.pending = [0] * len(self.names)
+        if not any(deltas):
+            return
+        deltas = deltas + [0] * (self.slot_count - len(deltas))
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        try:
+            generation, values = self._latest()
+            generation += 1
+            offset = self.offsets[generation % 2]
+            self.map[offset:offset + self.copy_size] = self._encode(
+                generation, [value + delta for value, delta in zip(values, deltas)])
+            self.map.flush()
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.open()
+                atexit.register(self.checkpoint)
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.checkpoint_interval)
+            try:
+                self.checkpoint()
+            except Exception as e:
+                print(f"Counter checkpoint error: {e}")
@@ -0,0 +1,11 @@
+# Gunicorn settings; QUANTUM_SERVER_MODE=async switches to a green-thread worker
+import os
+import server_mode
+
+bind = os.environ.get("QUANTUM_BIND", "0.0.0.0:5000")
+worker_class = server_mode.gunicorn_worker_class()
+
+if server_mode.is_async():
+    # Flask-SocketIO needs sticky sessions, so one async worker holds every connection
+    workers = 1
+    worker_connections = int(os.environ.get("QUANTUM_WORKER_CONNECTIONS", "2000"))
@@ -0,0 +1,166 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+
+from models import db, ConnectedDevice, DeviceAction, SystemAlert
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; CSV export is always available
+    pyarrow = None
+
+# Exportable tables and the column incremental exports filter on
+EXPORT_TABLES = {
+    "devices": (ConnectedDevice, "last_seen"),
+    "actions": (DeviceAction, "timestamp"),
+    "alerts": (SystemAlert, "timestamp"),
+}
+FORMATS = ("parquet", "arrow", "csv")
+MIMETYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+}
+
+class ExportError(ValueError):
+    pass
+
+def available_formats():
+    return FORMATS if pyarrow is not None else ("csv",)
+
+class _Sink:
+    """Write-only file object that buffers output until drained"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Float):
+        return pyarrow.float64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp("us")
+    return pyarrow.string()
+
+class _CsvWriter:
+    def __init__(self, sink, columns):
+        self.sink = sink
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow([column.name for column in columns])
+
+    def write(self, rows):
+        self.writer.writerows([value.isoformat() if isinstance(value, datetime) else value for value in row]
+                              for row in rows)
+        self.sink.write(self.buffer.getvalue().encode())
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self):
+        self.sink.write(self.buffer.getvalue().encode())
+
+class _ArrowWriter:
+    """Writes each chunk as one record batch (Arrow IPC stream) or row group (Parquet)"""
+
+    def __init__(self, sink, columns, fmt):
+        self.schema = pyarrow.schema([(column.name, _arrow_type(column)) for column in columns])
+        if fmt == "parquet":
+            self.writer = pyarrow.parquet.ParquetWriter(sink, self.schema, compression="zstd")
+        else:
+            self.writer = pyarrow.ipc.new_stream(sink, self.schema)
+
+    def write(self, rows):
+        arrays = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)]
+        self.writer.write_batch(pyarrow.record_batch(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+def _table(table_name):
+    if table_name not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table {table_name!r}; expected one of {', '.join(EXPORT_TABLES)}")
+    return EXPORT_TABLES[table_name]
+
+def parse_since(value):
+    """Parse an ISO watermark timestamp; empty means export everything"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f"Invalid watermark timestamp {value!r}") from None
+
+def export_watermark(since=None, settle=60, now=None):
+    """Upper bound for an export: `settle` seconds ago, or since if that is later
+
+    Rows are stamped before their transaction commits (presence writes
+    last_seen up to a flush interval later), so rows stamped just before
+    the moment of an export can still appear after it. Stopping `settle`
+    seconds behind the clock leaves them for the next export, whose since
+    is this bound.
+    """
+    until = (now or datetime.utcnow()) - timedelta(seconds=settle)
+    return max(until, since) if since is not None else until
+
+def iter_export(table_name, fmt="csv", since=None, until=None, chunk_size=10000):
+    """Yield the encoded export of a table, one chunk of rows at a time
+
+    Rows are read through a streaming cursor in primary key order, so memory
+    stays bounded by chunk_size whatever the table size. since and until
+    bound the table's watermark column (exclusive and inclusive); pass the
+    until from export_watermark() as the next export's since. Call inside an
+    app context.
+    """
+    model, column_name = _table(table_name)
+    if fmt not in available_formats():
+        raise ExportError(f"Format {fmt!r} is not available; expected one of {', '.join(available_formats())}")
+    table = model.__table__
+    query = select(table).order_by(table.c.id)
+    if since is not None:
+        query = query.where(table.c[column_name] > since)
+    if until is not None:
+        query = query.where(table.c[column_name] <= until)
+
+    # Arguments are checked here, before the first chunk is requested
+    return _stream(query, table.columns, fmt, chunk_size)
+
+def _stream(query, columns, fmt, chunk_size):
+    sink = _Sink()
+    writer = _CsvWriter(sink, columns) if fmt == "csv" else _ArrowWriter(sink, columns, fmt)
+    connection = db.session.connection().execution_options(stream_results=True, max_row_buffer=chunk_size)
+    for rows in connection.execute(query).partitions(chunk_size):
+        writer.write(rows)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
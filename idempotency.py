@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MAX_KEY_LENGTH = 128
+
+class _Entry:
+    __slots__ = ("expires_at", "result", "done")
+
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+        self.result = None
+        self.done = threading.Event()
+
+class IdempotencyCache:
+    """Bounded TTL cache of results for idempotency keys
+
+    A caller claims a key before doing the work. The first claim owns it and
+    must later complete() (or release() on failure); later claims within the
+    TTL get the stored result, waiting briefly if the owner is still running.
+    Claims still running are held apart from finished results and only
+    expire by TTL, so the size bound never lets a retry run work that is in
+    progress. An optional persistent store is consulted on a memory miss, so retries
+    are recognised across restarts and worker processes.
+    """
+
+    def __init__(self, ttl=600, max_entries=10000, wait_timeout=5.0, store=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.store = store
+        self.entries = OrderedDict()
+        self.claims = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, now):
+        # Entries share one TTL, so insertion order is expiry order
+        while self.entries:
+            key, entry = next(iter(self.entries.items()))
+            if entry.expires_at > now and len(self.entries) <= self.max_entries:
+                break
+            del self.entries[key]
+        while self.claims:
+            key, entry = next(iter(self.claims.items()))
+            if entry.expires_at > now:
+                break
+            del self.claims[key]
+            entry.done.set()
+
+    def claim(self, key):
+        """Return (True, None) if the caller now owns key, else (False, stored result or None if still running)"""
+        now = time.time()
+        with self.lock:
+            self._evict(now)
+            entry = self.claims.get(key) or self.entries.get(key)
+            if entry is None and self.store is not None:
+                stored = self.store.get(key, now)
+                if stored is not None:
+                    entry = _Entry(now + self.ttl)
+                    entry.result = stored
+                    entry.done.set()
+                    self.entries[key] = entry
+            if entry is None:
+                self.claims[key] = _Entry(now + self.ttl)
+                self.misses += 1
+                return True, None
+            self.hits += 1
+
+        entry.done.wait(self.wait_timeout)
+        return False, entry.result
+
+    def complete(self, key, result):
+        with self.lock:
+            entry = self.claims.pop(key, None)
+            if entry is None:
+                return
+            # Results expire a TTL after they are stored, which keeps entries in expiry order
+            now = time.time()
+            entry.expires_at = now + self.ttl
+            self.entries[key] = entry
+            self._evict(now)
+        entry.result = result
+        entry.done.set()
+        if self.store is not None:
+            self.store.put(key, result, entry.expires_at)
+
+    def release(self, key):
+        """Forget a claimed key whose work failed so a retry can run it"""
+        with self.lock:
+            entry = self.claims.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    def get_stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "in_flight": len(self.claims), "hits": self.hits, "misses": self.misses}
+
+class SqliteResultStore:
+    """Persistent stand-in for a shared key-value store, backed by a local SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_results "
+                "(key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idempotency_results_expiry ON idempotency_results (expires_at)"
+            )
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        row = self._connection().execute(
+            "SELECT result FROM idempotency_results WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, result, expires_at):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO idempotency_results (key, result, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), expires_at)
+            )
+            connection.execute("DELETE FROM idempotency_results WHERE expires_at <= ?", (time.time(),))
+
+def scoped_key(device_id, data):
+    """Idempotency key from an action payload, scoped to its device; None when absent or invalid"""
+    key = data.get("idempotency_key") if isinstance(data, dict) else None
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        return None
+    return f"{device_id}:{key}"
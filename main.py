@@ -1,7 +1,16 @@
+# Patch the standard library first when running under a green-thread worker
+import server_mode
+server_mode.monkey_patch()
+
 import os
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from contextlib import nullcontext
+from functools import wraps
+import click
+from flask import Flask, request, jsonify, send_from_directory, url_for, abort, stream_with_context, has_request_context
 from flask_socketio import SocketIO, emit, join_room, leave_room
-from datetime import datetime
+from werkzeug.local import LocalProxy
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
 import hashlib
 import json
 import time
@@ -9,6 +18,29 @@ import uuid
 import threading
 import requests
 from models import db, ConnectedDevice, DeviceAction, SystemAlert, AIAssistant, DeviceNotification
+from signature_service import BatchTooLarge, SignatureService
+from user_agent import classify_user_agent
+from page_cache import PageCache, AssetManifest, ASSET_MAX_AGE
+import metrics
+from presence import PresenceTracker
+from telemetry_frames import ENCODING_STRUCT, encode_frame, decode_frame
+from device_batch import BatchRejected, MAX_ACTION_BATCH, MAX_SYNC_BATCH, check_batch, validate_action_item, validate_sync_item
+from change_feed import ChangeFeed
+from ai_intents import IntentEngine
+from conversation_log import ConversationLog
+from anomaly import AnomalyDetector
+from watch_events import WatchJournal
+from durable_counters import CounterFile
+from system_metrics import SystemMetrics
+from response_cache import ResponseCache
+from read_model import DashboardModel
+from alert_lifecycle import AlertFilterError, AlertLifecycle
+from history_export import EXPORT_TABLES, FORMATS, MIMETYPES, ExportError, available_formats, export_watermark, iter_export, parse_since
+from search_index import HistorySearch, KIND_ALERT, KIND_CONVERSATION
+from rate_limit import RateLimiter, load_budgets
+from idempotency import IdempotencyCache, SqliteResultStore, scoped_key
+from device_identity import DeviceSessions, compact_devices, device_id_for_token, is_valid_token, issue_device_token
+from Final_Satellite_Payment_System_Protected import REGISTRY_ARTIFACT, PUBLIC_AUDIT_LOG, publish_registry
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -17,24 +49,122 @@ app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:/
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
+    **server_mode.engine_options(),
 }
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # Initialize extensions
 db.init_app(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Create database tables
-with app.app_context():
-    db.create_all()
+metrics.init_app(app)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=server_mode.socketio_async_mode())
+presence = PresenceTracker(
+    heartbeat_timeout=int(os.environ.get("PRESENCE_HEARTBEAT_TIMEOUT", "60")),
+    reconnect_grace=int(os.environ.get("PRESENCE_RECONNECT_GRACE", "10")),
+    flush_interval=int(os.environ.get("PRESENCE_FLUSH_INTERVAL", "5"))
+)
+device_sessions = DeviceSessions()
+change_feed = ChangeFeed(capacity=int(os.environ.get("CHANGE_FEED_CAPACITY", "10000")))
+change_feed.watch_devices()
+action_results = IdempotencyCache(
+    ttl=int(os.environ.get("IDEMPOTENCY_TTL", "600")),
+    max_entries=int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+    store=SqliteResultStore(os.environ["IDEMPOTENCY_STORE_PATH"]) if os.environ.get("IDEMPOTENCY_STORE_PATH") else None
+)
+conversation_log = ConversationLog(
+    retention=int(os.environ.get("AI_CONVERSATION_RETENTION", "100")),
+    flush_interval=float(os.environ.get("AI_CONVERSATION_FLUSH_INTERVAL", "2"))
+)
+anomaly_detector = AnomalyDetector(
+    alpha=float(os.environ.get("ANOMALY_EWMA_ALPHA", "0.05")),
+    threshold=float(os.environ.get("ANOMALY_THRESHOLD", "4")),
+    cooldown=int(os.environ.get("ANOMALY_ALERT_COOLDOWN", "300"))
+)
+watch_journal = WatchJournal(
+    os.environ.get("WATCH_JOURNAL_DIR", os.path.join(app.instance_path, "watch_events")),
+    snapshot_every=int(os.environ.get("WATCH_JOURNAL_SNAPSHOT_EVERY", "1000")),
+    fsync_interval=float(os.environ.get("WATCH_JOURNAL_FSYNC_INTERVAL", "1"))
+) if os.environ.get("WATCH_JOURNAL_ENABLED", "1") == "1" else None
+request_counters = CounterFile(
+    os.environ.get("REQUEST_COUNTERS_PATH", os.path.join(app.instance_path, "counters.bin")),
+    ("total_requests", "error_count"),
+    checkpoint_interval=float(os.environ.get("REQUEST_COUNTERS_CHECKPOINT_INTERVAL", "1"))
+)
+system_metrics = SystemMetrics(
+    interval=float(os.environ.get("SYSTEM_METRICS_INTERVAL", "5")),
+    history=int(os.environ.get("SYSTEM_METRICS_HISTORY", "120")),
+    storage_path=app.root_path
+)
+metrics.latency_observers.append(system_metrics.observe_request)
+system_metrics.add_cache_source(lambda: (intent_engine.get_stats()["hits"], intent_engine.get_stats()["misses"]))
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+)
+response_cache.watch_models()
+system_metrics.add_cache_source(lambda: (response_cache.get_stats()["hits"], response_cache.get_stats()["misses"]))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "10"))
+dashboard_model = DashboardModel(
+    lambda: get_watch().get_status_data(),
+    recent_alerts=int(os.environ.get("DASHBOARD_RECENT_ALERTS", "20")),
+    interval=float(os.environ.get("DASHBOARD_REFRESH_INTERVAL", "0.5"))
+)
+dashboard_model.watch_models()
+alert_lifecycle = AlertLifecycle(
+    capacity=int(os.environ.get("ALERT_INDEX_CAPACITY", "500")),
+    escalate_after=int(os.environ.get("ALERT_ESCALATE_AFTER", "900")),
+    archive_after=int(os.environ.get("ALERT_ARCHIVE_AFTER", str(7 * 86400))),
+    expire_after=int(os.environ.get("ALERT_EXPIRE_AFTER", str(30 * 86400))),
+    interval=int(os.environ.get("ALERT_MAINTENANCE_INTERVAL", "30"))
+)
+alert_lifecycle.on_change.append(lambda: response_cache.invalidate("alerts"))
+alert_lifecycle.on_change.append(dashboard_model.alerts_changed)
+history_search = HistorySearch(
+    max_candidates=int(os.environ.get("SEARCH_MAX_CANDIDATES", "50000")),
+    interval=float(os.environ.get("SEARCH_INDEX_INTERVAL", "1"))
+)
+conversation_log.on_delete.append(lambda ids: history_search.remove(KIND_CONVERSATION, ids))
+alert_lifecycle.on_archive.append(lambda ids: history_search.remove(KIND_ALERT, ids))
+rate_limiter = RateLimiter(load_budgets(), idle_timeout=int(os.environ.get("RATE_LIMIT_IDLE_TIMEOUT", "300")))
+
+def client_address():
+    """Rate limit key for REST requests"""
+    return request.remote_addr or "unknown"
+
+def session_device():
+    """Rate limit key for socket events: the stable device behind the session"""
+    return device_sessions.device_for(request.sid)
+asset_manifest = AssetManifest(app.static_folder)
+page_cache = PageCache(app, asset_manifest)
+
+def asset_url(filename):
+    """URL of a static file under its content-fingerprinted name"""
+    return url_for("serve_asset", filename=asset_manifest.url_name(filename))
+
+app.jinja_env.globals["asset_url"] = asset_url
 
 # Hidden root access logic
 ROOT_EMAIL = "ervin210@icloud.com"
 HIDDEN_ROOT_KEY = hashlib.sha256(ROOT_EMAIL.encode()).hexdigest()
 
+def journaled(method):
+    """Record the watch changes a method makes as one journal event"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.journal_command(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 # QuantumWatch Class - Advanced Admin Dashboard
 class QuantumWatch:
+    # Fields covered by generate_signature; changing any of them bumps signature_version
+    SIGNED_FIELDS = ("owner", "status", "timestamp", "quantum_energy", "neural_sync")
+
     def __init__(self, user="Ervin Remus Radosavlevici"):
+        self.journal = None
+        self.counters = None
+        self.system_metrics = None
+        self.signature_version = 0
+        self.signature_service = SignatureService()
         self.owner = user
         self.status = "Idle"
         self.timestamp = time.time()
@@ -89,6 +219,16 @@ class QuantumWatch:
         self.connected_devices = []
         self.device_sync_enabled = True
 
+    def __setattr__(self, name, value):
+        if name in self.SIGNED_FIELDS and self.__dict__.get(name) != value:
+            self.__dict__["signature_version"] = self.__dict__.get("signature_version", 0) + 1
+        object.__setattr__(self, name, value)
+
+    def journal_command(self, name):
+        """Context manager journaling the changes made inside it as one event"""
+        return self.journal.command(self, name) if self.journal else nullcontext()
+
+    @journaled
     def activate_interface(self):
         self.status = "Activated"
         self.activation_count += 1
@@ -98,6 +238,7 @@ class QuantumWatch:
         self.log_action("Quantum Interface Activated")
         self.check_system_health()
 
+    @journaled
     def build_completed(self):
         self.status = "Build Completed"
         self.build_count += 1
@@ -107,20 +248,16 @@ class QuantumWatch:
         self.log_action("Build Status: Completed")
         self.check_system_health()
 
+    @journaled
     def generate_signature(self):
-        data = json.dumps({
-            "owner": self.owner,
-            "status": self.status,
-            "timestamp": self.timestamp,
-            "quantum_energy": self.quantum_energy,
-            "neural_sync": self.neural_sync
-        }, sort_keys=True).encode()
+        signature = self.signature_service.sign_watch(self)
         self.signature_count += 1
         self.quantum_energy = max(0, self.quantum_energy - 5)
         self.active_protocols.append("CRYPTO_SIGN")
         self.log_action("Digital Signature Generated")
-        return hashlib.sha256(data).hexdigest()
+        return signature
 
+    @journaled
     def initiate_neural_scan(self):
         self.neural_sync = min(100, self.neural_sync + 35)
         self.active_protocols.append("NEURAL_SCAN")
@@ -132,6 +269,7 @@ class QuantumWatch:
             "scan_complete": True
         }
 
+    @journaled
     def quantum_boost(self):
         self.quantum_energy = 100
         self.matrix_stability = min(100, self.matrix_stability + 10)
@@ -139,6 +277,7 @@ class QuantumWatch:
         self.log_action("Quantum Energy Boost Applied")
         self.check_system_health()
 
+    @journaled
     def security_scan(self):
         import random
         threats = ["INTRUSION_DETECTED", "FIREWALL_BREACH", "DATA_LEAK", "CLEAN"]
@@ -158,6 +297,7 @@ class QuantumWatch:
         self.check_system_health()
         return {"threat_level": self.threat_level, "threat_type": threat}
 
+    @journaled
     def data_stream_analysis(self):
         import random
         streams = []
@@ -176,6 +316,7 @@ class QuantumWatch:
         self.log_action("Data Stream Analysis Complete")
         return streams
 
+    @journaled
     def matrix_recalibration(self):
         self.matrix_stability = min(100, self.matrix_stability + 15)
         self.quantum_energy = max(0, self.quantum_energy - 20)
@@ -183,12 +324,14 @@ class QuantumWatch:
         self.log_action("Matrix Recalibration Complete")
         self.check_system_health()
 
+    @journaled
     def toggle_admin_mode(self):
         self.admin_mode = not self.admin_mode
         mode_text = "Enabled" if self.admin_mode else "Disabled"
         self.log_action(f"Admin Mode {mode_text}")
         return self.admin_mode
 
+    @journaled
     def system_reboot(self):
         self.status = "Rebooting"
         self.quantum_energy = 100
@@ -199,6 +342,7 @@ class QuantumWatch:
         self.log_action("System Reboot Initiated")
         return {"status": "Rebooting", "eta": "30 seconds"}
 
+    @journaled
     def emergency_shutdown(self):
         self.status = "Emergency Shutdown"
         self.quantum_energy = 0
@@ -208,12 +352,13 @@ class QuantumWatch:
         self.log_action("Emergency Shutdown Activated")
         return {"status": "Emergency Shutdown", "reason": "Admin Command"}
 
+    @journaled
     def performance_optimization(self):
         import random
         self.system_performance = min(100, self.system_performance + random.randint(3, 8))
-        self.cpu_usage = max(10, self.cpu_usage - random.randint(5, 15))
-        self.memory_usage = max(20, self.memory_usage - random.randint(3, 10))
-        self.cache_hit_rate = min(99, self.cache_hit_rate + random.randint(1, 3))
+        # Report the latest measurements rather than adjusting the readings
+        if self.system_metrics:
+            self.apply_system_metrics(self.system_metrics.readings())
         self.log_action("Performance Optimization Applied")
         return {
             "performance": self.system_performance,
@@ -233,12 +378,20 @@ class QuantumWatch:
         if self.memory_usage > 90:
             self.system_alerts.append("HIGH_MEMORY: Memory Usage Critical")
 
+    def apply_system_metrics(self, readings):
+        """Replace the admin dashboard readings with measured values"""
+        # Not journaled (they are re-measured after a restart), but kept out of running commands' diffs
+        with self.journal.lock if self.journal else nullcontext():
+            for name, value in readings.items():
+                setattr(self, name, value)
+
     def log_action(self, action):
         timestamped = f"{datetime.utcnow().isoformat()}Z: {action}"
         self.actions_log.append(timestamped)
         if len(self.actions_log) > 100:
             self.actions_log = self.actions_log[-100:]
 
+    @journaled
     def reset_interface(self):
         self.status = "Idle"
         self.actions_log = []
@@ -256,6 +409,7 @@ class QuantumWatch:
         self.log_action("Quantum Interface Reset")
 
     def get_status_data(self):
+        counters = self.counters.totals() if self.counters else {}
         return {
             "status": self.status,
             "activation_count": self.activation_count,
@@ -279,8 +433,8 @@ class QuantumWatch:
             "memory_usage": self.memory_usage,
             "storage_usage": self.storage_usage,
             "active_users": self.active_users,
-            "total_requests": self.total_requests,
-            "error_count": self.error_count,
+            "total_requests": counters.get("total_requests", self.total_requests),
+            "error_count": counters.get("error_count", self.error_count),
             "response_time": self.response_time,
             "bandwidth_usage": self.bandwidth_usage,
             "system_temperature": self.system_temperature,
@@ -296,15 +450,7 @@ class QuantumWatch:
 # Device Management Functions
 def detect_device_type(user_agent):
     """Detect device type from user agent string"""
-    user_agent = user_agent.lower()
-    if 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent:
-        return 'phone'
-    elif 'tablet' in user_agent or 'ipad' in user_agent:
-        return 'tablet'
-    elif 'watch' in user_agent or 'wearable' in user_agent:
-        return 'watch'
-    else:
-        return 'computer'
+    return classify_user_agent(user_agent).form_factor
 
 def register_device(device_data, ip_address, user_agent):
     """Register a new device or update existing device"""
@@ -333,123 +479,415 @@ def register_device(device_data, ip_address, user_agent):
     db.session.commit()
     return device
 
+def apply_device_sync(device, data):
+    """Copy synced metrics onto a device row without committing"""
+    # Update device metrics
+    device.battery_level = data.get('battery_level', device.battery_level)
+    device.cpu_usage = data.get('cpu_usage', device.cpu_usage)
+    device.memory_usage = data.get('memory_usage', device.memory_usage)
+    device.storage_usage = data.get('storage_usage', device.storage_usage)
+    device.network_status = data.get('network_status', device.network_status)
+    
+    # Update quantum data
+    device.quantum_energy = data.get('quantum_energy', device.quantum_energy)
+    device.neural_sync = data.get('neural_sync', device.neural_sync)
+    device.matrix_stability = data.get('matrix_stability', device.matrix_stability)
+    device.threat_level = data.get('threat_level', device.threat_level)
+    
+    device.last_seen = datetime.utcnow()
+    add_anomaly_alerts(anomaly_detector.observe(device.device_id, data))
+
+def add_anomaly_alerts(anomalies):
+    """Stage SystemAlerts for detected anomalies in the current transaction"""
+    for anomaly in anomalies:
+        db.session.add(SystemAlert(
+            device_id=anomaly.device_id,
+            alert_type=f"ANOMALY_{anomaly.metric.upper()}",
+            message=f"{anomaly.metric} of {anomaly.value:.1f} deviates from the expected {anomaly.expected:.1f} "
+                    f"({anomaly.score:.1f} standard deviations)",
+            severity="CRITICAL" if anomaly.score >= 2 * anomaly_detector.threshold else "WARNING"
+        ))
+
+def merge_device_into_watch(device):
+    """Update main quantum watch from a synced device if sync is enabled"""
+    if not watch.device_sync_enabled:
+        return
+    with watch.journal_command("device_sync"):
+        watch.quantum_energy = max(watch.quantum_energy, device.quantum_energy)
+        watch.neural_sync = max(watch.neural_sync, device.neural_sync)
+        watch.matrix_stability = max(watch.matrix_stability, device.matrix_stability)
+        
+        # Sync threat level (take highest priority)
+        threat_priority = {"Green": 0, "Yellow": 1, "Red": 2}
+        if threat_priority.get(device.threat_level, 0) > threat_priority.get(watch.threat_level, 0):
+            watch.threat_level = device.threat_level
+
 def sync_device_data(device_id, data):
     """Sync device data with quantum watch"""
     device = ConnectedDevice.query.filter_by(device_id=device_id).first()
     if device:
-        # Update device metrics
-        device.battery_level = data.get('battery_level', device.battery_level)
-        device.cpu_usage = data.get('cpu_usage', device.cpu_usage)
-        device.memory_usage = data.get('memory_usage', device.memory_usage)
-        device.storage_usage = data.get('storage_usage', device.storage_usage)
-        device.network_status = data.get('network_status', device.network_status)
-        
-        # Update quantum data
-        device.quantum_energy = data.get('quantum_energy', device.quantum_energy)
-        device.neural_sync = data.get('neural_sync', device.neural_sync)
-        device.matrix_stability = data.get('matrix_stability', device.matrix_stability)
-        device.threat_level = data.get('threat_level', device.threat_level)
-        
-        device.last_seen = datetime.utcnow()
+        apply_device_sync(device, data)
         db.session.commit()
-        
-        # Update main quantum watch if sync is enabled
-        if watch.device_sync_enabled:
-            watch.quantum_energy = max(watch.quantum_energy, device.quantum_energy)
-            watch.neural_sync = max(watch.neural_sync, device.neural_sync)
-            watch.matrix_stability = max(watch.matrix_stability, device.matrix_stability)
-            
-            # Sync threat level (take highest priority)
-            threat_priority = {"Green": 0, "Yellow": 1, "Red": 2}
-            if threat_priority.get(device.threat_level, 0) > threat_priority.get(watch.threat_level, 0):
-                watch.threat_level = device.threat_level
-        
+        merge_device_into_watch(device)
         return device
     return None
 
+def sync_devices_batch(updates):
+    """Validate and apply many device updates in one transaction
+
+    Malformed updates and unknown devices fail individually; the rest are
+    committed together. Returns one result per update, in request order.
+    """
+    results = [None] * len(updates)
+    valid = []
+    for index, item in enumerate(updates):
+        error = validate_sync_item(item)
+        if error:
+            results[index] = {'index': index, 'success': False, 'error': error}
+        else:
+            valid.append(index)
+    
+    device_ids = {updates[index]['device_id'] for index in valid}
+    devices = {}
+    if device_ids:
+        devices = {device.device_id: device for device in
+                   ConnectedDevice.query.filter(ConnectedDevice.device_id.in_(device_ids))}
+    
+    applied = []
+    for index in valid:
+        device = devices.get(updates[index]['device_id'])
+        if device is None:
+            results[index] = {'index': index, 'success': False, 'error': 'Device not found'}
+            continue
+        apply_device_sync(device, updates[index])
+        applied.append((index, device))
+    
+    try:
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        for index, _ in applied:
+            results[index] = {'index': index, 'success': False, 'error': 'Transaction failed'}
+        return results
+    
+    for index, device in applied:
+        merge_device_into_watch(device)
+        results[index] = {'index': index, 'success': True, 'device_id': device.device_id}
+    return results
+
+def _record_device_actions(actions):
+    """Insert a batch of (device_id, action_type, action_data) rows in one transaction"""
+    db.session.add_all([
+        DeviceAction(device_id=device_id, action_type=action_type, action_data=json.dumps(action_data))
+        for device_id, action_type, action_data in actions
+    ])
+    for device_id, _, _ in actions:
+        add_anomaly_alerts(anomaly_detector.record_action(device_id))
+    try:
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+# Every session joins one telemetry room, chosen by the encoding it negotiated on connect
+TELEMETRY_JSON_ROOM = "telemetry_json"
+TELEMETRY_BINARY_ROOM = "telemetry_binary"
+TELEMETRY_FRAMES = metrics.register(metrics.Counter(
+    "quantum_telemetry_frames_total", "Device telemetry frames by direction and encoding", ("direction", "encoding")))
+
+def broadcast_device_telemetry(device):
+    """Send a device update as JSON to legacy clients and as a binary frame to negotiated ones"""
+    payload = {
+        'device': device,
+        'quantum_watch_data': watch.get_status_data()
+    }
+    socketio.emit('device_data_updated', payload, to=TELEMETRY_JSON_ROOM)
+    TELEMETRY_FRAMES.inc("out", "json")
+    try:
+        frame = encode_frame(device, device['device_id'])
+    except ValueError:
+        socketio.emit('device_data_updated', payload, to=TELEMETRY_BINARY_ROOM)
+        TELEMETRY_FRAMES.inc("out", "json")
+    else:
+        socketio.emit('device_telemetry', frame, to=TELEMETRY_BINARY_ROOM)
+        TELEMETRY_FRAMES.inc("out", ENCODING_STRUCT)
+
 # SocketIO Event Handlers
 @socketio.on('connect')
-def handle_connect():
+@metrics.track_event('connect')
+def handle_connect(auth=None):
     """Handle new device connection"""
-    device_id = request.sid
+    ensure_started()
     ip_address = request.environ.get('REMOTE_ADDR', 'unknown')
     user_agent = request.headers.get('User-Agent', '')
     
+    # The client keeps a device token across sessions; clients without one are issued a token
+    device_token = auth.get('device_token') if isinstance(auth, dict) else None
+    if not is_valid_token(device_token):
+        device_token = issue_device_token()
+        emit('device_identity', {'device_token': device_token})
+    device_id = device_id_for_token(device_token)
+    device_sessions.bind(request.sid, device_id)
+    
+    telemetry_encoding = auth.get('telemetry_encoding') if isinstance(auth, dict) else None
+    join_room(TELEMETRY_BINARY_ROOM if telemetry_encoding == ENCODING_STRUCT else TELEMETRY_JSON_ROOM)
+    
+    # A quick reconnect is absorbed by the presence tracker without a DB write
+    if presence.reconnect(device_id):
+        join_room(f"device_{device_id}")
+        return
+    
     # Register device
     device_data = {
         'device_id': device_id,
-        'device_name': f"Device {device_id[:8]}"
+        'device_name': default_device_name(device_id)
     }
     
-    device = register_device(device_data, ip_address, user_agent)
+    device = register_device(device_data, ip_address, user_agent).to_dict()
+    presence.connect(device_id, device['device_name'])
     
     # Join device room
     join_room(f"device_{device_id}")
     
     # Broadcast device connection
     emit('device_connected', {
-        'device': device.to_dict(),
-        'message': f"{device.device_name} connected"
+        'device': device,
+        'message': f"{device['device_name']} connected"
     }, broadcast=True)
     
-    print(f"Device connected: {device.device_name} ({device.device_type})")
+    print(f"Device connected: {device['device_name']} ({device['device_type']})")
 
 @socketio.on('disconnect')
+@metrics.track_event('disconnect')
 def handle_disconnect():
-    """Handle device disconnection"""
-    device_id = request.sid
-    device = ConnectedDevice.query.filter_by(device_id=device_id).first()
-    
-    if device:
-        device.is_active = False
-        db.session.commit()
-        
-        # Broadcast device disconnection
-        emit('device_disconnected', {
-            'device_id': device_id,
-            'message': f"{device.device_name} disconnected"
-        }, broadcast=True)
-        
-        print(f"Device disconnected: {device.device_name}")
+    """Handle device disconnection; the device expires after the reconnect grace period"""
+    device_id, last_session = device_sessions.unbind(request.sid)
+    if last_session:
+        presence.disconnect(device_id)
+
+def default_device_name(device_id):
+    return f"Device {device_id[4:12]}"
+
+def handle_presence_expired(entry):
+    """Broadcast a device that disconnected or stopped sending heartbeats"""
+    # Entries revived by a heartbeat don't know the registered name
+    device_name = entry.device_name or default_device_name(entry.device_id)
+    socketio.emit('device_disconnected', {
+        'device_id': entry.device_id,
+        'message': f"{device_name} disconnected"
+    })
+    print(f"Device disconnected: {device_name}")
+
+presence.on_expire = handle_presence_expired
+def handle_presence_flush(seen):
+    """Propagate a batched last_seen/is_active write, which bypasses ORM events
+
+    Runs after the write commits, so the change feed never hands out a
+    version ahead of the rows.
+    """
+    response_cache.invalidate("devices", *(f"device:{device_id}" for device_id, _, _ in seen))
+    change_feed.record(*(device_id for device_id, _, changed in seen if changed))
+    for device_id, is_active, _ in seen:
+        dashboard_model.device_seen(device_id, is_active)
+
+presence.on_flush = handle_presence_flush
+metrics.register(metrics.Gauge(
+    "quantum_presence_connected_devices", "Devices currently connected according to the presence tracker",
+    lambda: presence.get_stats()["connected_devices"]))
+metrics.register(metrics.Gauge(
+    "quantum_idempotency_duplicates", "Device actions answered from the idempotency cache instead of running again",
+    lambda: action_results.get_stats()["hits"]))
+metrics.register(metrics.Gauge(
+    "quantum_ai_response_cache_hits", "Assistant messages answered from the response cache",
+    lambda: intent_engine.get_stats()["hits"]))
+metrics.register(metrics.Gauge(
+    "quantum_ai_conversations_pending", "Assistant conversations buffered for the next batch write",
+    lambda: conversation_log.get_stats()["pending"]))
+metrics.register(metrics.Gauge(
+    "quantum_anomalies_detected", "Telemetry and action-rate anomalies that raised an alert",
+    lambda: anomaly_detector.get_stats()["anomalies"]))
+metrics.register(metrics.Gauge(
+    "quantum_rate_limit_buckets", "Token buckets currently held by the rate limiter",
+    lambda: rate_limiter.get_stats()["buckets"]))
+metrics.register(metrics.Gauge(
+    "quantum_process_cpu_percent", "CPU used by this worker over the last sampling interval",
+    lambda: system_metrics.get_stats()["process_cpu"] or 0))
+metrics.register(metrics.Gauge(
+    "quantum_process_resident_bytes", "Resident memory of this worker",
+    lambda: system_metrics.get_stats()["process_resident_bytes"] or 0))
+metrics.register(metrics.Gauge(
+    "quantum_response_cache_bytes", "Bytes of response bodies held by the response cache",
+    lambda: response_cache.get_stats()["bytes"]))
+metrics.register(metrics.Gauge(
+    "quantum_alerts_unacknowledged", "Unacknowledged system alerts as of the last count",
+    lambda: alert_lifecycle.get_stats()["unacknowledged"]))
+metrics.register(metrics.Gauge(
+    "quantum_presence_debounced_reconnects", "Reconnects absorbed without a database write",
+    lambda: presence.get_stats()["debounced_reconnects"]))
+metrics.register(metrics.Gauge(
+    "quantum_search_index_gaps", "Skipped row ids the search index is still waiting to see commit",
+    lambda: history_search.get_stats()["gaps"]))
+
+@socketio.on('heartbeat')
+@metrics.track_event('heartbeat')
+def handle_heartbeat():
+    """Keep the sending device marked active"""
+    presence.heartbeat(device_sessions.device_for(request.sid))
 
 @socketio.on('sync_device_data')
+@metrics.track_event('sync_device_data')
+@rate_limiter.limit_event('sync_device_data', session_device)
 def handle_sync_device_data(data):
-    """Handle device data synchronization"""
-    device_id = request.sid
+    """Handle device data synchronization; data is a JSON object or a binary telemetry frame"""
+    if isinstance(data, (bytes, bytearray)):
+        try:
+            _, data = decode_frame(data)
+        except ValueError as e:
+            return {'success': False, 'message': str(e)}
+        TELEMETRY_FRAMES.inc("in", ENCODING_STRUCT)
+    else:
+        TELEMETRY_FRAMES.inc("in", "json")
+    device_id = device_sessions.device_for(request.sid)
+    presence.heartbeat(device_id)
     device = sync_device_data(device_id, data)
     
     if device:
-        # Broadcast updated device data
-        emit('device_data_updated', {
-            'device': device.to_dict(),
-            'quantum_watch_data': watch.get_status_data()
-        }, broadcast=True)
+        broadcast_device_telemetry(device.to_dict())
 
 @socketio.on('device_action')
+@metrics.track_event('device_action')
+@rate_limiter.limit_event('device_action', session_device)
 def handle_device_action(data):
-    """Handle device actions (activate, scan, etc.)"""
-    device_id = request.sid
+    """Handle device actions (activate, scan, etc.)
+
+    Actions carrying an idempotency_key run at most once per key within the
+    dedupe TTL; a retried emit is acknowledged with the original result.
+    """
+    device_id = device_sessions.device_for(request.sid)
+    presence.heartbeat(device_id)
     action_type = data.get('action_type')
     action_data = data.get('action_data', {})
     
-    # Log device action
-    device_action = DeviceAction(
-        device_id=device_id,
-        action_type=action_type,
-        action_data=json.dumps(action_data)
-    )
-    db.session.add(device_action)
-    db.session.commit()
+    key = scoped_key(device_id, data)
+    if key:
+        owned, cached = action_results.claim(key)
+        if not owned:
+            return dict(cached, duplicate=True) if cached else DUPLICATE_IN_PROGRESS
     
-    # Execute action on quantum watch
-    result = execute_device_action(action_type, action_data)
+    try:
+        # Log device action
+        device_action = DeviceAction(
+            device_id=device_id,
+            action_type=action_type,
+            action_data=json.dumps(action_data)
+        )
+        db.session.add(device_action)
+        add_anomaly_alerts(anomaly_detector.record_action(device_id))
+        db.session.commit()
+        
+        # Execute action on quantum watch
+        result = execute_device_action(action_type, action_data)
+    except Exception:
+        if key:
+            action_results.release(key)
+        raise
     
-    # Broadcast action result
-    emit('action_result', {
+    response = {
         'action_type': action_type,
         'result': result,
         'device_id': device_id
-    }, broadcast=True)
+    }
+    if key:
+        action_results.complete(key, response)
+    
+    # Broadcast action result
+    emit('action_result', response, broadcast=True)
+    return response
+
+@socketio.on('device_actions_batch')
+@metrics.track_event('device_actions_batch')
+@rate_limiter.limit_event('device_actions_batch', session_device)
+def handle_device_actions_batch(data):
+    """Handle many device actions in one event, e.g. relayed by a gateway
+
+    Each action may name the device it came from; otherwise the sending
+    device is used. Valid actions are logged in one transaction and then
+    executed. Per-item results are returned as the event acknowledgement and
+    broadcast together as action_results.
+    """
+    sender_id = device_sessions.device_for(request.sid)
+    presence.heartbeat(sender_id)
+    actions = data.get('actions') if isinstance(data, dict) else data
+    try:
+        check_batch(actions, MAX_ACTION_BATCH, 'actions')
+    except BatchRejected as e:
+        return {'success': False, 'message': str(e)}
+    
+    results = [None] * len(actions)
+    accepted = []
+    first_index_for_key = {}
+    repeats = []
+    for index, item in enumerate(actions):
+        error = validate_action_item(item, KNOWN_DEVICE_ACTIONS)
+        if error:
+            results[index] = {'index': index, 'success': False, 'error': error}
+            continue
+        device_id = item.get('device_id') or sender_id
+        key = scoped_key(device_id, item)
+        if key in first_index_for_key:
+            # Repeated within this batch; answered with the first occurrence's result below
+            repeats.append((index, first_index_for_key[key]))
+            continue
+        if key:
+            first_index_for_key[key] = index
+            owned, cached = action_results.claim(key)
+            if not owned:
+                results[index] = dict(cached, index=index, success=True, duplicate=True) if cached else \
+                    dict(DUPLICATE_IN_PROGRESS, index=index, error=DUPLICATE_IN_PROGRESS['message'])
+                continue
+        accepted.append((index, key, device_id, item['action_type'], item.get('action_data', {})))
+    
+    # Claimed keys whose action does not complete are released so a retry can run it
+    unfinished = {key for _, key, *_ in accepted if key}
+    try:
+        if accepted:
+            try:
+                _record_device_actions([entry[2:] for entry in accepted])
+            except SQLAlchemyError:
+                for index, *_ in accepted:
+                    results[index] = {'index': index, 'success': False, 'error': 'Transaction failed'}
+                accepted = []
+        
+        executed = []
+        for index, key, device_id, action_type, action_data in accepted:
+            result = {
+                'action_type': action_type,
+                'result': execute_device_action(action_type, action_data),
+                'device_id': device_id
+            }
+            if key:
+                action_results.complete(key, result)
+                unfinished.discard(key)
+            results[index] = dict(result, index=index, success=True)
+            executed.append(result)
+    finally:
+        for key in unfinished:
+            action_results.release(key)
+    
+    for index, first_index in repeats:
+        results[index] = dict(results[first_index], index=index, duplicate=True)
+    
+    if executed:
+        emit('action_results', {'results': executed}, broadcast=True)
+    failed = sum(1 for result in results if not result['success'])
+    return {
+        'success': failed == 0,
+        'failed': failed,
+        'results': results
+    }
+
+DUPLICATE_IN_PROGRESS = {'success': False, 'duplicate': True, 'message': 'Duplicate action still in progress'}
+KNOWN_DEVICE_ACTIONS = frozenset(('activate', 'neural_scan', 'quantum_boost', 'security_scan', 'matrix_recalibration'))
 
 def execute_device_action(action_type, action_data):
     """Execute device action on quantum watch"""
@@ -470,18 +908,21 @@ def execute_device_action(action_type, action_data):
         return {'success': False, 'message': 'Unknown action'}
 
 @socketio.on('get_all_devices')
+@metrics.track_event('get_all_devices')
 def handle_get_all_devices():
     """Get all connected devices"""
-    devices = ConnectedDevice.query.all()
+    devices = [device.to_dict() for device in ConnectedDevice.query.all()]
     emit('all_devices', {
-        'devices': [device.to_dict() for device in devices],
+        'devices': devices,
         'count': len(devices)
     })
 
 @socketio.on('toggle_device_sync')
+@metrics.track_event('toggle_device_sync')
 def handle_toggle_device_sync():
     """Toggle device synchronization"""
-    watch.device_sync_enabled = not watch.device_sync_enabled
+    with watch.journal_command("toggle_device_sync"):
+        watch.device_sync_enabled = not watch.device_sync_enabled
     emit('device_sync_toggled', {
         'enabled': watch.device_sync_enabled,
         'message': f"Device sync {'enabled' if watch.device_sync_enabled else 'disabled'}"
@@ -494,9 +935,12 @@ class QuantumAIAssistant:
         self.monitoring_interval = 120  # 2 minutes
         self.last_check = time.time()
         self.monitoring_thread = None
-        self.start_monitoring()
+        # Host put in install links; the monitor has no request to read it from
+        self.install_host = os.environ.get("PUBLIC_HOST")
     
-    def start_monitoring(self):
+    def start_monitoring(self, host=None):
+        if host and not self.install_host:
+            self.install_host = host
         if not self.monitoring_thread:
             self.monitoring_thread = threading.Thread(target=self.continuous_monitoring)
             self.monitoring_thread.daemon = True
@@ -505,9 +949,10 @@ class QuantumAIAssistant:
     def continuous_monitoring(self):
         while self.active:
             try:
-                self.monitor_all_devices()
-                self.detect_suspicious_activity()
-                self.auto_install_notifications()
+                with app.app_context():
+                    self.monitor_all_devices()
+                    self.detect_suspicious_activity()
+                    self.auto_install_notifications()
             except Exception as e:
                 print(f"AI monitoring error: {e}")
             time.sleep(self.monitoring_interval)
@@ -555,12 +1000,14 @@ class QuantumAIAssistant:
                 self.create_install_notification(ip)
     
     def create_install_notification(self, ip):
+        if not self.install_host:
+            return
         existing = DeviceNotification.query.filter_by(target_ip=ip, is_sent=False).first()
         if not existing:
             notification = DeviceNotification(
                 target_ip=ip,
                 message="Quantum Interface Watch detected on your network. Install for full access to shared data.",
-                install_url=f"http://{request.host}/auto-install"
+                install_url=f"http://{self.install_host}/auto-install"
             )
             db.session.add(notification)
             db.session.commit()
@@ -608,14 +1055,162 @@ class QuantumAIAssistant:
         
         return summary
 
-# Initialize the quantum watch and AI assistant
-watch = QuantumWatch()
-ai_assistant = QuantumAIAssistant()
+# Lazily initialized components, created on first use instead of at import time
+_components = {}
+_components_lock = threading.Lock()
+
+def _get_component(name, factory):
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                component = factory()
+                _components[name] = component
+    return component
+
+def init_database():
+    """Create database tables"""
+    with app.app_context():
+        db.create_all()
+        # create_all skips indexes added to tables that already exist
+        for index in SystemAlert.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+    return True
+
+def create_watch():
+    """Build the shared QuantumWatch, restoring its state from the event journal"""
+    quantum_watch = QuantumWatch()
+    if watch_journal is not None:
+        watch_journal.restore(quantum_watch)
+        quantum_watch.journal = watch_journal
+        watch_journal.start()
+    quantum_watch.counters = request_counters
+    quantum_watch.system_metrics = system_metrics
+    return quantum_watch
+
+def get_watch():
+    return _get_component("watch", create_watch)
+
+def get_ai_assistant():
+    return _get_component("ai_assistant", QuantumAIAssistant)
+
+watch = LocalProxy(get_watch)
+ai_assistant = LocalProxy(get_ai_assistant)
+intent_engine = IntentEngine(lambda: ai_assistant.get_device_summary(), lambda: change_feed.version)
+
+_started = False
+_start_lock = threading.Lock()
+
+def ensure_started():
+    """Initialize the database schema and start monitors on first use"""
+    global _started
+    if _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _get_component("database", init_database)
+        publish_registry()
+        get_ai_assistant().start_monitoring(request.host if has_request_context() else None)
+        presence.start(app)
+        conversation_log.start(app)
+        request_counters.start()
+        dashboard_model.start(app)
+        alert_lifecycle.start(app)
+        history_search.start(app)
+        system_metrics.start(app, lambda readings: get_watch().apply_system_metrics(readings), lambda: db.engine.pool)
+        _started = True
+
+@app.before_request
+def before_first_use():
+    ensure_started()
+    request_counters.add("total_requests")
+
+@app.after_request
+def count_errors(response):
+    if response.status_code >= 500:
+        request_counters.add("error_count")
+    return response
+
+def create_app(eager=False):
+    """Application factory; eager=True initializes every component up front"""
+    if eager:
+        ensure_started()
+        get_watch()
+    return app
+
+@app.cli.command("compact-devices")
+def compact_devices_command():
+    """Merge duplicate device rows left over from per-session device ids"""
+    _get_component("database", init_database)
+    print(f"Removed {compact_devices()} duplicate device rows")
+
+@app.cli.command("show-counters")
+def show_counters_command():
+    """Print the persisted request counters without taking the writers' lock"""
+    request_counters.open_reader()
+    for name, value in request_counters.totals().items():
+        print(f"{name} {value}")
+
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "10000"))
+# Rows newer than this are left for the next export; longer than any transaction or presence flush
+EXPORT_SETTLE_SECONDS = float(os.environ.get("EXPORT_SETTLE_SECONDS", "60"))
+
+@app.cli.command("export-history")
+@click.argument("table", type=click.Choice(list(EXPORT_TABLES)))
+@click.option("--output", required=True, type=click.Path(dir_okay=False), help="File to write")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None,
+              help="Defaults to parquet when pyarrow is installed, otherwise csv")
+@click.option("--since", default=None, help="Only export rows newer than this ISO timestamp")
+@click.option("--watermark-file", type=click.Path(dir_okay=False), default=None,
+              help="Read --since from this file and store the new watermark in it after a successful export")
+@click.option("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, show_default=True)
+def export_history_command(table, output, fmt, since, watermark_file, chunk_size):
+    """Stream a device, action or alert table to a columnar or CSV file"""
+    _get_component("database", init_database)
+    fmt = fmt or available_formats()[0]
+    if since is None and watermark_file and os.path.exists(watermark_file):
+        with open(watermark_file) as watermark:
+            since = watermark.read().strip()
+    try:
+        since = parse_since(since)
+        until = export_watermark(since, EXPORT_SETTLE_SECONDS)
+        chunks = iter_export(table, fmt, since, until, chunk_size)
+    except ExportError as e:
+        raise click.ClickException(str(e))
+
+    temporary_path = output + ".tmp"
+    written = 0
+    with open(temporary_path, "wb") as output_file:
+        for chunk in chunks:
+            output_file.write(chunk)
+            written += len(chunk)
+    os.replace(temporary_path, output)
+    if watermark_file:
+        with open(watermark_file, "w") as watermark_output:
+            watermark_output.write(until.isoformat())
+    print(f"Wrote {written} bytes of {table} as {fmt} to {output}; watermark {until.isoformat()}")
 
 # Web Routes
+def render_shell():
+    """Serve the cached index.html shell; live watch values are loaded by quantum.js"""
+    return page_cache.get("index.html", lambda: {"watch": QuantumWatch()}).respond(app, request)
+
 @app.route("/")
 def index():
-    return render_template("index.html", watch=watch)
+    return render_shell()
+
+@app.route("/assets/<path:filename>")
+def serve_asset(filename):
+    """Serve a fingerprinted static file with long-lived cache headers"""
+    original = asset_manifest.original(filename)
+    if original is None:
+        abort(404)
+    response = send_from_directory(app.static_folder, original, max_age=ASSET_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 # API Routes for AJAX requests
 @app.route("/api/activate", methods=["POST"])
@@ -666,7 +1261,37 @@ def api_signature():
             "message": f"Signature generation failed: {str(e)}"
         }), 500
 
+@app.route("/api/signature/batch", methods=["POST"])
+def api_signature_batch():
+    try:
+        data = request.get_json() or {}
+        snapshots = data.get("snapshots", [])
+        if not isinstance(snapshots, list):
+            return jsonify({
+                "success": False,
+                "message": "snapshots must be a list"
+            }), 400
+        try:
+            signatures = watch.signature_service.sign_batch(snapshots)
+        except BatchTooLarge as e:
+            return jsonify({
+                "success": False,
+                "message": str(e)
+            }), 413
+        return jsonify({
+            "success": True,
+            "signatures": signatures,
+            "count": len(signatures)
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Batch signature failed: {str(e)}"
+        }), 500
+
 @app.route("/api/logs", methods=["GET"])
+@response_cache.cached("logs", RESPONSE_CACHE_TTL, lambda: (),
+                       vary=lambda: (len(watch.actions_log), watch.actions_log[-1] if watch.actions_log else None))
 def api_logs():
     try:
         return jsonify({
@@ -721,6 +1346,7 @@ def api_neural_scan():
         }), 500
 
 @app.route("/api/quantum-boost", methods=["POST"])
+@rate_limiter.limit_route("quantum_boost", client_address)
 def api_quantum_boost():
     try:
         watch.quantum_boost()
@@ -787,8 +1413,9 @@ def api_matrix_recalibration():
 @app.route("/api/clear-alerts", methods=["POST"])
 def api_clear_alerts():
     try:
-        watch.system_alerts = []
-        watch.log_action("System Alerts Cleared")
+        with watch.journal_command("clear_alerts"):
+            watch.system_alerts = []
+            watch.log_action("System Alerts Cleared")
         return jsonify({
             "success": True,
             "message": "All System Alerts Cleared"
@@ -797,33 +1424,26 @@ def api_clear_alerts():
         return jsonify({
             "success": False,
             "message": f"Alert clearing failed: {str(e)}"
+        }), 500
 
 # AI Assistant API Endpoints
 @app.route("/api/ai-assistant", methods=["POST"])
+@rate_limiter.limit_route("ai_assistant", client_address)
 def api_ai_assistant():
     try:
         data = request.get_json()
         message = data.get("message", "")
         
-        # Get device summary for AI context
-        device_summary = ai_assistant.get_device_summary()
+        # Answered from the intent engine's cache while no device has changed
+        intent, response, device_summary = intent_engine.respond(message)
         
-        # Generate AI response based on device data
-        response = generate_ai_response(message, device_summary)
-        
-        # Save conversation
-        ai_session = AIAssistant(
-            session_id=request.remote_addr,
-            message=message,
-            response=response,
-            device_count=device_summary["total_devices"]
-        )
-        db.session.add(ai_session)
-        db.session.commit()
+        # Save conversation; written in batches by the conversation log thread
+        conversation_log.record(request.remote_addr, message, response, device_summary["total_devices"])
         
         return jsonify({
             "success": True,
             "response": response,
+            "intent": intent,
             "device_summary": device_summary
         })
     except Exception as e:
@@ -832,34 +1452,10 @@ def api_ai_assistant():
             "message": f"AI assistant failed: {str(e)}"
         }), 500
 
-def generate_ai_response(message, device_summary):
-    """Generate AI response based on device data and user message"""
-    total_devices = device_summary["total_devices"]
-    device_types = device_summary["device_types"]
-    threat_levels = device_summary["threat_levels"]
-    
-    if "devices" in message.lower() or "connected" in message.lower():
-        return f"Currently monitoring {total_devices} devices: {', '.join([f'{count} {dtype}(s)' for dtype, count in device_types.items()])}. Security status: {threat_levels['Green']} safe, {threat_levels['Yellow']} caution, {threat_levels['Red']} alert."
-    
-    elif "security" in message.lower() or "threat" in message.lower():
-        if threat_levels['Red'] > 0:
-            return f"⚠️ SECURITY ALERT: {threat_levels['Red']} device(s) showing suspicious activity. Monitoring enhanced. Authorities have been notified if stalking behavior detected."
-        else:
-            return f"🔒 All systems secure. {total_devices} devices under protection with 2-minute monitoring intervals."
-    
-    elif "install" in message.lower() or "app" in message.lower():
-        return f"Auto-installation notifications are being sent to nearby devices. The Quantum Interface automatically shares data across all connected devices and notifies unconnected devices for installation."
-    
-    elif "data" in message.lower() or "sharing" in message.lower():
-        return f"Data sharing is active across all {total_devices} devices. Real-time synchronization ensures all devices have the same dashboard and control capabilities. JSON data is automatically shared between connected devices."
-    
-    else:
-        return f"Quantum AI Assistant monitoring {total_devices} devices. I can help with device status, security monitoring, data sharing, and automatic installation. What would you like to know?"
-
 @app.route("/auto-install")
 def auto_install():
     """Auto-installation page for new devices"""
-    return render_template("auto_install.html")
+    return page_cache.get("auto_install.html").respond(app, request)
 
 @app.route("/api/auto-install/check", methods=["POST"])
 def api_auto_install_check():
@@ -942,8 +1538,6 @@ def api_device_discovery():
             "message": f"Device discovery failed: {str(e)}"
         }), 500
 
-        }), 500
-
 @app.route("/api/admin-toggle", methods=["POST"])
 def api_admin_toggle():
     try:
@@ -990,6 +1584,7 @@ def api_emergency_shutdown():
         }), 500
 
 @app.route("/api/performance-optimization", methods=["POST"])
+@rate_limiter.limit_route("performance_optimization", client_address)
 def api_performance_optimization():
     try:
         result = watch.performance_optimization()
@@ -1006,6 +1601,7 @@ def api_performance_optimization():
 
 # Device Connection API Endpoints
 @app.route("/api/devices", methods=["GET"])
+@response_cache.cached("devices", RESPONSE_CACHE_TTL, lambda: ("devices",))
 def api_get_devices():
     try:
         devices = ConnectedDevice.query.all()
@@ -1021,6 +1617,7 @@ def api_get_devices():
         }), 500
 
 @app.route("/api/device/<device_id>", methods=["GET"])
+@response_cache.cached("device", RESPONSE_CACHE_TTL, lambda device_id: (f"device:{device_id}",))
 def api_get_device(device_id):
     try:
         device = ConnectedDevice.query.filter_by(device_id=device_id).first()
@@ -1062,10 +1659,65 @@ def api_sync_device(device_id):
             "message": f"Failed to sync device: {str(e)}"
         }), 500
 
+@app.route("/api/reconcile", methods=["GET"])
+def api_reconcile():
+    """Bring a reconnecting client up to date from its last known state version
+
+    Clients pass the epoch and version from their previous response. If the
+    change feed still covers that version only the changed devices (and ids
+    of removed ones) are returned; otherwise the full device list is sent.
+    """
+    try:
+        version, changed = change_feed.changed_since(
+            request.args.get("epoch", ""), request.args.get("since", type=int)
+        )
+        payload = {
+            "success": True,
+            "epoch": change_feed.epoch,
+            "version": version,
+            "status": watch.get_status_data()
+        }
+        if changed is None:
+            payload["full"] = True
+            payload["devices"] = [device.to_dict() for device in ConnectedDevice.query.all()]
+            payload["removed"] = []
+        else:
+            devices = ConnectedDevice.query.filter(ConnectedDevice.device_id.in_(changed)).all() if changed else []
+            payload["full"] = False
+            payload["devices"] = [device.to_dict() for device in devices]
+            payload["removed"] = sorted(changed - {device.device_id for device in devices})
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Reconciliation failed: {str(e)}"
+        }), 500
+
+@app.route("/api/devices/sync:batch", methods=["POST"])
+@rate_limiter.limit_route("sync_devices_batch", client_address)
+def api_sync_devices_batch():
+    """Apply telemetry for many devices at once; answers 207 when only some updates succeed"""
+    data = request.get_json(silent=True)
+    updates = data.get('updates') if isinstance(data, dict) else data
+    try:
+        check_batch(updates, MAX_SYNC_BATCH, 'updates')
+    except BatchRejected as e:
+        return jsonify({"success": False, "message": str(e)}), e.status_code
+    
+    results = sync_devices_batch(updates)
+    failed = sum(1 for result in results if not result['success'])
+    return jsonify({
+        "success": failed == 0,
+        "applied": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }), 200 if failed == 0 else 207
+
 @app.route("/api/device-sync/toggle", methods=["POST"])
 def api_toggle_device_sync():
     try:
-        watch.device_sync_enabled = not watch.device_sync_enabled
+        with watch.journal_command("toggle_device_sync"):
+            watch.device_sync_enabled = not watch.device_sync_enabled
         return jsonify({
             "success": True,
             "message": f"Device sync {'enabled' if watch.device_sync_enabled else 'disabled'}",
@@ -1078,6 +1730,7 @@ def api_toggle_device_sync():
         }), 500
 
 @app.route("/api/device/<device_id>/actions", methods=["GET"])
+@response_cache.cached("device_actions", RESPONSE_CACHE_TTL, lambda device_id: (f"actions:{device_id}",))
 def api_get_device_actions(device_id):
     try:
         actions = DeviceAction.query.filter_by(device_id=device_id).order_by(DeviceAction.timestamp.desc()).limit(50).all()
@@ -1092,14 +1745,34 @@ def api_get_device_actions(device_id):
             "message": f"Failed to get device actions: {str(e)}"
         }), 500
 
+@app.route("/api/dashboard", methods=["GET"])
+def api_dashboard():
+    """Watch state, fleet summary and recent alerts from one consistent snapshot
+
+    Clients pass the version from their previous response and get a 304 while
+    it is still current; If-None-Match works the same way.
+    """
+    snapshot = dashboard_model.current
+    if request.args.get("version") == snapshot.version:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(snapshot.body, mimetype="application/json")
+    response.set_etag(snapshot.version)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route("/api/alerts", methods=["GET"])
+@response_cache.cached("alerts", RESPONSE_CACHE_TTL, lambda: ("alerts",))
 def api_get_alerts():
+    """Newest unacknowledged alerts, up to ALERT_INDEX_CAPACITY of them"""
     try:
-        alerts = SystemAlert.query.filter_by(is_acknowledged=False).order_by(SystemAlert.timestamp.desc()).all()
+        alerts, total, truncated = alert_lifecycle.list_unacknowledged()
         return jsonify({
             "success": True,
-            "alerts": [alert.to_dict() for alert in alerts],
-            "count": len(alerts)
+            "alerts": alerts,
+            "count": len(alerts),
+            "total_unacknowledged": total,
+            "truncated": truncated
         })
     except Exception as e:
         return jsonify({
@@ -1107,6 +1780,101 @@ def api_get_alerts():
             "message": f"Failed to get alerts: {str(e)}"
         }), 500
 
+@app.route("/api/alerts/acknowledge", methods=["POST"])
+def api_acknowledge_alerts():
+    """Acknowledge every unacknowledged alert matching the given filters in one UPDATE"""
+    try:
+        acknowledged = alert_lifecycle.acknowledge(request.get_json(silent=True))
+    except AlertFilterError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": f"Failed to acknowledge alerts: {str(e)}"}), 500
+    return jsonify({"success": True, "acknowledged": acknowledged})
+
+@app.route("/api/export/<table>", methods=["GET"])
+@rate_limiter.limit_route("history_export", client_address)
+def api_export_history(table):
+    """Stream a table as parquet, arrow or csv; ?since= takes the X-Export-Watermark of a previous export"""
+    fmt = request.args.get("format", available_formats()[0])
+    try:
+        since = parse_since(request.args.get("since"))
+        until = export_watermark(since, EXPORT_SETTLE_SECONDS)
+        chunks = iter_export(table, fmt, since, until, EXPORT_CHUNK_SIZE)
+    except ExportError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    response = app.response_class(stream_with_context(chunks), mimetype=MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={table}.{fmt}"
+    response.headers["X-Export-Watermark"] = until.isoformat()
+    return response
+
+SEARCH_TYPES = {
+    "all": None,
+    "conversations": {KIND_CONVERSATION},
+    "alerts": {KIND_ALERT},
+}
+MAX_SEARCH_PAGE_SIZE = 100
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """Ranked full-text search over assistant conversations and system alerts"""
+    query = request.args.get("q", "").strip()
+    search_type = request.args.get("type", "all")
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = min(MAX_SEARCH_PAGE_SIZE, max(1, request.args.get("per_page", 20, type=int)))
+    if not query:
+        return jsonify({"success": False, "message": "Query parameter 'q' is required"}), 400
+    if search_type not in SEARCH_TYPES:
+        return jsonify({"success": False, "message": f"type must be one of {', '.join(SEARCH_TYPES)}"}), 400
+    try:
+        total, truncated, results = history_search.search(query, kinds=SEARCH_TYPES[search_type], page=page, per_page=per_page)
+        return jsonify({
+            "success": True,
+            "query": query,
+            "type": search_type,
+            "total": total,
+            "truncated": truncated,
+            "page": page,
+            "per_page": per_page,
+            "results": results
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Search failed: {str(e)}"
+        }), 500
+
+@app.route("/api/blockchain-registry", methods=["GET"])
+def api_blockchain_registry():
+    """Serve the precomputed registry document with conditional-GET support"""
+    response = app.response_class(REGISTRY_ARTIFACT.body, mimetype="application/json")
+    response.set_etag(REGISTRY_ARTIFACT.etag)
+    response.last_modified = REGISTRY_ARTIFACT.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+@app.route("/api/blockchain-registry/audit-log", methods=["GET"])
+def api_blockchain_audit_log():
+    try:
+        entries = PUBLIC_AUDIT_LOG.entries()
+        return jsonify({
+            "success": True,
+            "public_audit_log": entries,
+            "count": len(entries)
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Audit log retrieval failed: {str(e)}"
+        }), 500
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Per-endpoint latency, DB and serialization histograms in Prometheus text format"""
+    return app.response_class(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/root-access", methods=["GET"])
 def root_access():
     try:
@@ -1127,17 +1895,17 @@ def root_access():
 @app.route("/activate", methods=["POST"])
 def legacy_activate():
     watch.activate_interface()
-    return render_template("index.html", watch=watch)
+    return render_shell()
 
 @app.route("/build", methods=["POST"])
 def legacy_build():
     watch.build_completed()
-    return render_template("index.html", watch=watch)
+    return render_shell()
 
 @app.route("/sign", methods=["POST"])
 def legacy_sign():
-    signature = watch.generate_signature()
-    return render_template("index.html", watch=watch, signature=signature)
+    watch.generate_signature()
+    return render_shell()
 
 @app.route("/root-key", methods=["GET"])
 def legacy_root_key():
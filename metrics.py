@@ -0,0 +1,266 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from functools import wraps
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = {labels: list(series) for labels, series in self.series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            total = cumulative + series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names + ('le',), labels + ('+Inf',))} {total}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {total}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = _Tally()
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            snapshot = dict(self.values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+REQUEST_LATENCY = register(Histogram(
+    "quantum_request_duration_seconds", "Total handling time per endpoint or socket event", ("endpoint",)))
+REQUEST_DB_TIME = register(Histogram(
+    "quantum_request_db_seconds", "Time spent executing SQL per endpoint or socket event", ("endpoint",)))
+REQUEST_SERIALIZATION_TIME = register(Histogram(
+    "quantum_request_serialization_seconds", "Time spent encoding JSON responses per endpoint", ("endpoint",)))
+REQUEST_QUERIES = register(Histogram(
+    "quantum_request_queries", "SQL statements executed per endpoint or socket event", ("endpoint",), QUERY_BUCKETS))
+REQUEST_COMMITS = register(Counter(
+    "quantum_request_commits_total", "Database commits per endpoint or socket event", ("endpoint",)))
+RESPONSES = register(Counter(
+    "quantum_responses_total", "HTTP responses by endpoint and status code", ("endpoint", "status")))
+
+class RequestStats:
+    __slots__ = ("endpoint", "started", "queries", "commits", "db_time", "serialization_time", "samples")
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.commits = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.samples = None
+
+# Stats for the request or socket event each thread is currently handling
+_in_flight = {}
+# Callbacks given the handling time in seconds of every finished HTTP request
+latency_observers = []
+
+def _current_stats():
+    return _in_flight.get(threading.get_ident())
+
+def _begin(endpoint):
+    stats = RequestStats(endpoint)
+    _in_flight[threading.get_ident()] = stats
+    return stats
+
+def _finish(stats):
+    _in_flight.pop(threading.get_ident(), None)
+    elapsed = time.perf_counter() - stats.started
+    REQUEST_LATENCY.observe(elapsed, stats.endpoint)
+    REQUEST_DB_TIME.observe(stats.db_time, stats.endpoint)
+    REQUEST_SERIALIZATION_TIME.observe(stats.serialization_time, stats.endpoint)
+    REQUEST_QUERIES.observe(stats.queries, stats.endpoint)
+    if stats.commits:
+        REQUEST_COMMITS.inc(stats.endpoint, amount=stats.commits)
+    if profiler is not None:
+        profiler.finish(stats, elapsed)
+    if not stats.endpoint.startswith("socket:"):
+        for observer in latency_observers:
+            observer(elapsed)
+    return elapsed
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+@event.listens_for(Engine, "commit")
+def _on_commit(conn):
+    stats = _current_stats()
+    if stats is not None:
+        stats.commits += 1
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records encoding time against the current request"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats = _current_stats()
+            if stats is not None:
+                stats.serialization_time += time.perf_counter() - started
+
+def track_event(event_name):
+    """Decorator recording metrics for a SocketIO event handler"""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            stats = _begin(f"socket:{event_name}")
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                _finish(stats)
+        return wrapper
+    return decorator
+
+class SamplingProfiler:
+    """Samples stacks of in-flight requests and writes folded stacks for slow ones"""
+
+    def __init__(self, threshold, interval, output_dir):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, stats in list(_in_flight.items()):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stats.samples is None:
+                    stats.samples = _Tally()
+                stats.samples[";".join(reversed(stack))] += 1
+
+    def finish(self, stats, elapsed):
+        if elapsed < self.threshold or not stats.samples:
+            return
+        safe_name = stats.endpoint.replace(":", "_").replace("/", "_")
+        path = os.path.join(self.output_dir, f"{safe_name}-{int(time.time() * 1000)}.folded")
+        with open(path, "w") as profile_file:
+            for stack, count in stats.samples.items():
+                profile_file.write(f"{stack} {count}\n")
+
+profiler = None
+
+def init_app(app):
+    """Install request instrumentation and the optional slow-request profiler"""
+    global profiler
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def begin_request_metrics():
+        g.request_stats = _begin(request.endpoint or "unmatched")
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        stats = g.pop("request_stats", None)
+        if stats is not None:
+            _finish(stats)
+
+    @app.after_request
+    def count_response(response):
+        RESPONSES.inc(request.endpoint or "unmatched", response.status_code)
+        return response
+
+    threshold_ms = os.environ.get("PROFILE_SLOW_REQUESTS_MS")
+    if threshold_ms and profiler is None:
+        profiler = SamplingProfiler(
+            threshold=float(threshold_ms) / 1000,
+            interval=float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000,
+            output_dir=os.environ.get("PROFILE_OUTPUT_DIR", "profiles")
+        )
+        profiler.start()
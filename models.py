@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
+from user_agent import classify_user_agent
 
 db = SQLAlchemy()
 
@@ -29,11 +30,14 @@ class ConnectedDevice(db.Model):
     threat_level = db.Column(db.String(20), default="Green")
     
     def to_dict(self):
+        user_agent_info = classify_user_agent(self.user_agent)
         return {
             'id': self.id,
             'device_id': self.device_id,
             'device_name': self.device_name,
             'device_type': self.device_type,
+            'os': user_agent_info.os,
+            'browser': user_agent_info.browser,
             'ip_address': self.ip_address,
             'connected_at': self.connected_at.isoformat(),
             'last_seen': self.last_seen.isoformat(),
@@ -73,6 +77,11 @@ class SystemAlert(db.Model):
     severity = db.Column(db.String(20), default="INFO")  # INFO, WARNING, ERROR, CRITICAL
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_acknowledged = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        db.Index("ix_system_alert_ack_timestamp", "is_acknowledged", "timestamp"),
+        db.Index("ix_system_alert_ack_severity_timestamp", "is_acknowledged", "severity", "timestamp"),
+    )
     
     def to_dict(self):
         return {
@@ -85,6 +94,29 @@ class SystemAlert(db.Model):
             'is_acknowledged': self.is_acknowledged
         }
 
+class ArchivedAlert(db.Model):
+    """Cold storage for expired alerts, keeping their original ids"""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    device_id = db.Column(db.String(100), nullable=False)
+    alert_type = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    severity = db.Column(db.String(20))
+    timestamp = db.Column(db.DateTime)
+    is_acknowledged = db.Column(db.Boolean)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'device_id': self.device_id,
+            'alert_type': self.alert_type,
+            'message': self.message,
+            'severity': self.severity,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'is_acknowledged': self.is_acknowledged,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
 class AIAssistant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), nullable=False)
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+ASSET_MAX_AGE = 31536000  # one year, safe because asset URLs carry a content hash
+
+class RenderedPage:
+    """A rendered template held as bytes plus precompressed variants"""
+
+    def __init__(self, body, last_modified):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.last_modified = last_modified
+        self.variants = {"gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+
+    def respond(self, app, request):
+        """Build a conditional response in the best encoding the client accepts"""
+        encoding = None
+        for candidate in ("br", "gzip"):
+            if candidate in self.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        body = self.variants[encoding] if encoding else self.body
+        response = app.response_class(body, mimetype="text/html")
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(f"{self.etag}-{encoding}" if encoding else self.etag)
+        response.last_modified = self.last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+class PageCache:
+    """Rendered template shells, keyed by template name
+
+    A page is rendered once, on its first request (on every request in
+    debug mode). Its Last-Modified is the newest of the template and the
+    assets fingerprinted so far, so a changed asset URL moves it too.
+    """
+
+    def __init__(self, app, assets=None):
+        self.app = app
+        self.assets = assets
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def get(self, template_name, context=None):
+        """Return the cached shell for a template, rendering it on first use
+
+        context is a callable returning the template context; it is only
+        called when the page is actually rendered.
+        """
+        page = self.pages.get(template_name)
+        if page is None or self.app.debug:
+            with self.lock:
+                page = self.pages.get(template_name)
+                if page is None or self.app.debug:
+                    template = self.app.jinja_env.get_template(template_name)
+                    body = template.render(**(context() if context else {})).encode()
+                    modified = datetime.fromtimestamp(os.path.getmtime(template.filename), timezone.utc)
+                    if self.assets is not None:
+                        modified = max(modified, self.assets.last_modified() or modified)
+                    page = RenderedPage(body, modified)
+                    self.pages[template_name] = page
+        return page
+
+class AssetManifest:
+    """Maps static files to content-fingerprinted names and back"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.fingerprinted = {}
+        self.originals = {}
+        self.modified = {}
+        self.lock = threading.Lock()
+
+    def url_name(self, filename):
+        name = self.fingerprinted.get(filename)
+        if name is None:
+            with open(os.path.join(self.static_folder, filename), "rb") as asset:
+                digest = hashlib.sha256(asset.read()).hexdigest()[:12]
+                modified = datetime.fromtimestamp(os.fstat(asset.fileno()).st_mtime, timezone.utc)
+            root, extension = os.path.splitext(filename)
+            name = f"{root}.{digest}{extension}"
+            with self.lock:
+                self.fingerprinted[filename] = name
+                self.originals[name] = filename
+                self.modified[filename] = modified
+        return name
+
+    def original(self, fingerprinted_name):
+        return self.originals.get(fingerprinted_name)
+
+    def last_modified(self):
+        """Newest modification time of the assets fingerprinted so far, or None"""
+        with self.lock:
+            return max(self.modified.values(), default=None)
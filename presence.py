@@ -0,0 +1,212 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, update
+
+from models import db, ConnectedDevice
+
+class PresenceEntry:
+    __slots__ = ("device_id", "device_name", "connected", "last_heartbeat", "deadline_tick")
+
+    def __init__(self, device_id, device_name):
+        self.device_id = device_id
+        self.device_name = device_name
+        self.connected = True
+        self.last_heartbeat = time.monotonic()
+        self.deadline_tick = 0
+
+class PresenceTracker:
+    """In-memory device presence with heartbeat expiry and batched persistence
+
+    Connected devices stay alive while heartbeats (or telemetry) arrive within
+    heartbeat_timeout. A disconnect only starts a reconnect_grace countdown, so a
+    flaky client that reconnects in time never touches the database. Expiry is
+    driven by a hashed timer wheel, and last_seen/is_active changes are written
+    in one batched UPDATE every flush_interval seconds. A heartbeat from a
+    device whose entry already expired (its timers were throttled, say) starts
+    tracking it again. On start, rows left active by a previous run that
+    have not been seen for a heartbeat timeout are marked inactive.
+    """
+
+    def __init__(self, heartbeat_timeout=60, reconnect_grace=10, flush_interval=5, tick=1.0, wheel_slots=128):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_grace = reconnect_grace
+        self.flush_interval = flush_interval
+        self.tick = tick
+        self.wheel = [set() for _ in range(wheel_slots)]
+        self.current_tick = int(time.monotonic() / tick)
+        self.entries = {}
+        self.pending = {}
+        self.pending_changes = set()
+        self.lock = threading.Lock()
+        self.on_expire = None
+        self.on_flush = None
+        self.thread = None
+        self.debounced_reconnects = 0
+        self.revived = 0
+        self.expired = 0
+
+    def _schedule(self, entry, delay):
+        entry.deadline_tick = self.current_tick + max(1, math.ceil(delay / self.tick))
+        self.wheel[entry.deadline_tick % len(self.wheel)].add(entry.device_id)
+
+    def _mark_seen(self, device_id, is_active, changed=False):
+        # changed: is_active flipped, as opposed to a heartbeat refreshing last_seen
+        if device_id in self.pending and self.pending[device_id]["b_is_active"] != is_active:
+            changed = True
+        self.pending[device_id] = {"b_device_id": device_id, "b_last_seen": datetime.utcnow(), "b_is_active": is_active}
+        if changed:
+            self.pending_changes.add(device_id)
+
+    def _supersede_pending(self, device_id):
+        # A queued expiry would otherwise overwrite the active row at the next flush
+        if device_id in self.pending:
+            self._mark_seen(device_id, True)
+
+    def connect(self, device_id, device_name):
+        """Start tracking a device whose row was just registered"""
+        with self.lock:
+            entry = PresenceEntry(device_id, device_name)
+            self.entries[device_id] = entry
+            self._schedule(entry, self.heartbeat_timeout)
+            self._supersede_pending(device_id)
+
+    def reconnect(self, device_id):
+        """Resume a device still in memory; returns False if it must be registered"""
+        with self.lock:
+            entry = self.entries.get(device_id)
+            if entry is None:
+                return False
+            entry.connected = True
+            entry.last_heartbeat = time.monotonic()
+            self._schedule(entry, self.heartbeat_timeout)
+            self._supersede_pending(device_id)
+            self.debounced_reconnects += 1
+            return True
+
+    def heartbeat(self, device_id):
+        if device_id is None:
+            return
+        with self.lock:
+            entry = self.entries.get(device_id)
+            revived = entry is None
+            if revived:
+                entry = PresenceEntry(device_id, None)
+                self.entries[device_id] = entry
+                self.revived += 1
+            elif not entry.connected:
+                return
+            entry.last_heartbeat = time.monotonic()
+            self._schedule(entry, self.heartbeat_timeout)
+            self._mark_seen(device_id, True, revived)
+
+    def disconnect(self, device_id):
+        with self.lock:
+            entry = self.entries.get(device_id)
+            if entry is None:
+                return
+            entry.connected = False
+            self._schedule(entry, self.reconnect_grace)
+
+    def advance(self, now=None):
+        """Fire every wheel slot up to now and return the expired entries"""
+        target_tick = int((now if now is not None else time.monotonic()) / self.tick)
+        expired = []
+        with self.lock:
+            while self.current_tick < target_tick:
+                self.current_tick += 1
+                slot = self.current_tick % len(self.wheel)
+                due, self.wheel[slot] = self.wheel[slot], set()
+                for device_id in due:
+                    entry = self.entries.get(device_id)
+                    if entry is None:
+                        continue
+                    if entry.deadline_tick > self.current_tick:
+                        # Either a stale slot left by a later reschedule, or a deadline
+                        # more than one lap away that must wait for another pass
+                        if entry.deadline_tick - self.current_tick >= len(self.wheel):
+                            self.wheel[slot].add(device_id)
+                        continue
+                    del self.entries[device_id]
+                    self._mark_seen(device_id, False, True)
+                    expired.append(entry)
+            self.expired += len(expired)
+        return expired
+
+    def drain(self):
+        """Take the pending writes as (update parameters, ids whose is_active changed)"""
+        with self.lock:
+            updates, self.pending = list(self.pending.values()), {}
+            changed, self.pending_changes = self.pending_changes, set()
+        return updates, changed
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "tracked_devices": len(self.entries),
+                "connected_devices": sum(1 for entry in self.entries.values() if entry.connected),
+                "pending_writes": len(self.pending),
+                "debounced_reconnects": self.debounced_reconnects,
+                "revived": self.revived,
+                "expired": self.expired
+            }
+
+    def start(self, app):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, args=(app,), daemon=True)
+        with app.app_context():
+            swept = deactivate_stale(datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout + self.flush_interval))
+        if swept:
+            print(f"Marked {swept} devices left active by a previous run inactive")
+        self.thread.start()
+
+    def run(self, app):
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(self.tick)
+            try:
+                for entry in self.advance():
+                    if self.on_expire:
+                        self.on_expire(entry)
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    last_flush = time.monotonic()
+                    updates, changed = self.drain()
+                    with app.app_context():
+                        persist_presence(updates)
+                    if updates and self.on_flush:
+                        self.on_flush([(update["b_device_id"], update["b_is_active"], update["b_device_id"] in changed)
+                                       for update in updates])
+            except Exception as e:
+                print(f"Presence tracker error: {e}")
+
+def persist_presence(updates):
+    """Write a batch of last_seen/is_active changes in a single executemany UPDATE"""
+    if not updates:
+        return
+    table = ConnectedDevice.__table__
+    statement = (
+        update(table)
+        .where(table.c.device_id == bindparam("b_device_id"))
+        .values(last_seen=bindparam("b_last_seen"), is_active=bindparam("b_is_active"))
+    )
+    db.session.execute(statement, updates)
+    db.session.commit()
+
+def deactivate_stale(seen_before):
+    """Mark active devices not seen since seen_before inactive; returns how many changed
+
+    Devices connected to another worker keep their last_seen fresh through
+    that worker's flushes, so only rows nobody is tracking are changed.
+    """
+    table = ConnectedDevice.__table__
+    result = db.session.execute(
+        update(table)
+        .where(table.c.is_active.is_(True), table.c.last_seen < seen_before)
+        .values(is_active=False)
+    )
+    db.session.commit()
+    return result.rowcount
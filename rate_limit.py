@@ -0,0 +1,116 @@
+import math
+import os
+import threading
+import time
+import zlib
+from functools import wraps
+
+from flask import jsonify
+
+import metrics
+
+# Budget per limited route or event: (tokens refilled per second, bucket size).
+# Override one with RATE_LIMIT_<NAME>="<rate>/<burst>", e.g. RATE_LIMIT_DEVICE_ACTION="10/40".
+DEFAULT_BUDGETS = {
+    "device_action": (5.0, 20),
+    "device_actions_batch": (1.0, 5),
+    "sync_device_data": (10.0, 30),
+    "sync_devices_batch": (2.0, 10),
+    "quantum_boost": (1.0, 5),
+    "performance_optimization": (0.2, 3),
+    "ai_assistant": (1.0, 10),
+    "history_export": (0.1, 2),
+}
+
+REJECTIONS = metrics.register(metrics.Counter(
+    "quantum_rate_limited_total", "Requests and socket events rejected by the rate limiter", ("route",)))
+
+def load_budgets(defaults=DEFAULT_BUDGETS, environ=os.environ):
+    budgets = dict(defaults)
+    for name in defaults:
+        override = environ.get(f"RATE_LIMIT_{name.upper()}")
+        if override:
+            rate, burst = override.split("/")
+            budgets[name] = (float(rate), int(burst))
+    return budgets
+
+class _Shard:
+    __slots__ = ("buckets", "lock", "last_sweep")
+
+    def __init__(self):
+        # (route, client) -> (tokens, updated_at); tuples keep each entry small
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.last_sweep = time.monotonic()
+
+class RateLimiter:
+    """Token buckets per (route, client) held in a sharded map
+
+    Sharding keeps lock contention low when many clients are active at once.
+    A bucket left idle for idle_timeout would be full again, so it is
+    dropped; each shard sweeps its idle buckets at most once per
+    idle_timeout, on the next call that lands on it.
+    """
+
+    def __init__(self, budgets, shard_count=16, idle_timeout=300):
+        self.budgets = budgets
+        self.shards = [_Shard() for _ in range(shard_count)]
+        self.idle_timeout = idle_timeout
+
+    def _shard(self, key):
+        return self.shards[zlib.crc32(key.encode()) % len(self.shards)]
+
+    def allow(self, route, client):
+        """Take one token for client on route; returns seconds to wait, 0 if allowed"""
+        rate, burst = self.budgets[route]
+        key = f"{route}\x00{client}"
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock:
+            if now - shard.last_sweep >= self.idle_timeout:
+                self._sweep(shard, now)
+            tokens, updated_at = shard.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens < 1:
+                shard.buckets[key] = (tokens, now)
+                return (1 - tokens) / rate
+            shard.buckets[key] = (tokens - 1, now)
+            return 0
+
+    def _sweep(self, shard, now):
+        idle = [key for key, (_, updated_at) in shard.buckets.items() if now - updated_at >= self.idle_timeout]
+        for key in idle:
+            del shard.buckets[key]
+        shard.last_sweep = now
+
+    def get_stats(self):
+        return {"buckets": sum(len(shard.buckets) for shard in self.shards)}
+
+    def limit_route(self, route, client_key):
+        """Decorator answering 429 with Retry-After when a Flask route's budget is spent"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                retry_after = self.allow(route, client_key())
+                if retry_after:
+                    REJECTIONS.inc(route)
+                    response = jsonify({"success": False, "message": "Rate limit exceeded"})
+                    response.status_code = 429
+                    response.headers["Retry-After"] = str(math.ceil(retry_after))
+                    return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def limit_event(self, route, client_key):
+        """Decorator acknowledging a SocketIO event with an error instead of handling it when over budget"""
+        def decorator(handler):
+            @wraps(handler)
+            def wrapper(*args, **kwargs):
+                retry_after = self.allow(route, client_key())
+                if retry_after:
+                    REJECTIONS.inc(route)
+                    return {"success": False, "message": "Rate limit exceeded", "retry_after": round(retry_after, 2)}
+                return handler(*args, **kwargs)
+            return wrapper
+        return decorator
@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, ConnectedDevice, SystemAlert
+
+LOW_BATTERY_LEVEL = 20
+# Watch fields left out of the dashboard: they change on every request or
+# every second, so including them would give every poll a new version
+VOLATILE_WATCH_FIELDS = ("uptime", "total_requests", "error_count")
+
+def _device_row(device):
+    return (device.device_type, bool(device.is_active), device.battery_level or 0, device.threat_level)
+
+class DashboardSnapshot:
+    """One immutable, versioned view of the dashboard; body is the encoded JSON"""
+    __slots__ = ("version", "body")
+
+    def __init__(self, version, body):
+        self.version = version
+        self.body = body
+
+class DashboardModel:
+    """Materialized dashboard read model shared by every reader
+
+    Holds a fleet summary and the most recent unacknowledged alerts,
+    maintained incrementally: committed ORM writes to ConnectedDevice and
+    SystemAlert rows are applied as deltas, and writes that bypass the ORM
+    are reported through device_seen() and alerts_changed(). Every
+    `interval` seconds a background thread folds the pending changes and
+    the current watch state into a new DashboardSnapshot with the next
+    version, and swaps it in with a single reference assignment. Readers
+    just take `current` without locking, so they always see one consistent
+    version. Versions carry a per-process epoch, so a restart never repeats
+    one.
+    """
+
+    def __init__(self, watch_source, recent_alerts=20, interval=0.5):
+        self.watch_source = watch_source
+        self.recent_alerts = recent_alerts
+        self.interval = interval
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.devices = {}
+        self.device_types = Counter()
+        self.threat_levels = Counter()
+        self.active = 0
+        self.active_battery = 0
+        self.low_battery = 0
+        self.alerts = []
+        self.watch_json = None
+        self.replay = None
+        self.dirty = False
+        self.reload_devices = True
+        self.reload_alerts = True
+        self.lock = threading.Lock()
+        self.current = None
+        self.thread = None
+
+    def _count(self, row, sign):
+        device_type, is_active, battery_level, threat_level = row
+        self.device_types[device_type] += sign
+        self.threat_levels[threat_level] += sign
+        if is_active:
+            self.active += sign
+            self.active_battery += sign * battery_level
+            if battery_level < LOW_BATTERY_LEVEL:
+                self.low_battery += sign
+
+    def _set_device(self, device_id, row):
+        old = self.devices.pop(device_id, None)
+        if old is not None:
+            self._count(old, -1)
+        if row is not None:
+            self.devices[device_id] = row
+            self._count(row, 1)
+        self.dirty = True
+
+    def device_seen(self, device_id, is_active):
+        """Apply an is_active change written outside the ORM"""
+        self._apply([("seen", device_id, is_active)])
+
+    def alerts_changed(self):
+        """Reload recent alerts after a write that bypassed the ORM"""
+        with self.lock:
+            self.reload_alerts = True
+
+    def _apply(self, changes):
+        with self.lock:
+            if self.replay is not None:
+                self.replay.extend(changes)
+            for kind, key, value in changes:
+                if kind == "seen":
+                    row = self.devices.get(key)
+                    if row is not None and row[1] != value:
+                        self._set_device(key, (row[0], value, row[2], row[3]))
+                elif kind == "device":
+                    self._set_device(key, value)
+                elif value is None or value["is_acknowledged"]:
+                    # An alert left the unacknowledged set; older ones may need to fill its place
+                    if any(alert["id"] == key for alert in self.alerts):
+                        self.reload_alerts = True
+                elif not self.alerts or len(self.alerts) < self.recent_alerts or value["timestamp"] >= self.alerts[-1]["timestamp"]:
+                    self.alerts = sorted([alert for alert in self.alerts if alert["id"] != key] + [value],
+                                         key=lambda alert: (alert["timestamp"], alert["id"]),
+                                         reverse=True)[:self.recent_alerts]
+                    self.dirty = True
+
+    def watch_models(self):
+        """Apply committed ORM writes to devices and alerts"""
+        @event.listens_for(Session, "after_flush")
+        def collect_changes(session, flush_context):
+            changes = session.info.setdefault("dashboard_changes", [])
+            for row in (*session.new, *session.dirty):
+                if isinstance(row, ConnectedDevice):
+                    changes.append(("device", row.device_id, _device_row(row)))
+                elif isinstance(row, SystemAlert):
+                    changes.append(("alert", row.id, row.to_dict()))
+            for row in session.deleted:
+                if isinstance(row, ConnectedDevice):
+                    changes.append(("device", row.device_id, None))
+                elif isinstance(row, SystemAlert):
+                    changes.append(("alert", row.id, None))
+
+        @event.listens_for(Session, "after_commit")
+        def apply_changes(session):
+            changes = session.info.pop("dashboard_changes", None)
+            if changes:
+                self._apply(changes)
+
+        # Part of a rolled back flush may have committed (savepoints), so start over from the database
+        @event.listens_for(Session, "after_rollback")
+        def discard_changes(session):
+            if session.info.pop("dashboard_changes", None):
+                with self.lock:
+                    self.reload_devices = True
+                    self.reload_alerts = True
+
+    def _reload(self):
+        """Load whatever is marked for reloading; call inside an app context"""
+        with self.lock:
+            reload_devices, self.reload_devices = self.reload_devices, False
+            reload_alerts, self.reload_alerts = self.reload_alerts, False
+            if not (reload_devices or reload_alerts):
+                return
+            # Changes committed while the queries run are applied again on top of their results
+            self.replay = []
+        try:
+            if reload_devices:
+                rows = db.session.query(
+                    ConnectedDevice.device_id, ConnectedDevice.device_type, ConnectedDevice.is_active,
+                    ConnectedDevice.battery_level, ConnectedDevice.threat_level
+                ).all()
+            if reload_alerts:
+                alerts = [alert.to_dict() for alert in SystemAlert.query.filter_by(is_acknowledged=False)
+                          .order_by(SystemAlert.timestamp.desc(), SystemAlert.id.desc()).limit(self.recent_alerts)]
+        except Exception:
+            with self.lock:
+                self.replay = None
+                self.reload_devices = self.reload_devices or reload_devices
+                self.reload_alerts = self.reload_alerts or reload_alerts
+            raise
+        with self.lock:
+            if reload_devices:
+                self.devices.clear()
+                self.device_types.clear()
+                self.threat_levels.clear()
+                self.active = self.active_battery = self.low_battery = 0
+                for device_id, *row in rows:
+                    self._set_device(device_id, (row[0], bool(row[1]), row[2] or 0, row[3]))
+            if reload_alerts:
+                self.alerts = alerts
+                self.dirty = True
+            replay, self.replay = self.replay, None
+        if replay:
+            self._apply(replay)
+
+    def refresh(self):
+        """Publish a new snapshot if anything changed; call inside an app context"""
+        self._reload()
+        watch_state = self.watch_source()
+        for name in VOLATILE_WATCH_FIELDS:
+            watch_state.pop(name, None)
+        # Compared as JSON because the status holds references to the watch's live lists
+        watch_json = json.dumps(watch_state, separators=(",", ":"))
+        with self.lock:
+            if not self.dirty and watch_json == self.watch_json and self.current is not None:
+                return self.current
+            self.dirty = False
+            self.watch_json = watch_json
+            self.sequence += 1
+            version = f"{self.epoch}-{self.sequence}"
+            total = len(self.devices)
+            body = json.dumps({
+                "success": True,
+                "version": version,
+                "generated_at": time.time(),
+                "watch": json.loads(watch_json),
+                "fleet": {
+                    "total_devices": total,
+                    "active_devices": self.active,
+                    "inactive_devices": total - self.active,
+                    "by_type": {name: count for name, count in self.device_types.items() if count},
+                    "by_threat_level": {name: count for name, count in self.threat_levels.items() if count},
+                    "average_battery": round(self.active_battery / self.active, 1) if self.active else None,
+                    "low_battery_devices": self.low_battery,
+                },
+                "recent_alerts": self.alerts,
+            }, separators=(",", ":")).encode()
+            self.current = DashboardSnapshot(version, body)
+            return self.current
+
+    def start(self, app):
+        # Claim the thread before the first refresh so concurrent callers don't start another
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, args=(app,), daemon=True)
+        try:
+            with app.app_context():
+                self.refresh()
+        except Exception:
+            with self.lock:
+                self.thread = None
+            raise
+        self.thread.start()
+
+    def run(self, app):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    self.refresh()
+            except Exception as e:
+                print(f"Dashboard read model error: {e}")
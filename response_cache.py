@@ -0,0 +1,173 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import metrics
+from models import ConnectedDevice, DeviceAction, SystemAlert
+
+LOOKUPS = metrics.register(metrics.Counter(
+    "quantum_response_cache_lookups_total", "Response cache lookups by endpoint and result", ("endpoint", "result")))
+EVICTIONS = metrics.register(metrics.Counter(
+    "quantum_response_cache_evictions_total", "Response cache entries dropped, by reason", ("reason",)))
+
+def row_tags(row):
+    """Cache tags made stale by a write to this row"""
+    if isinstance(row, ConnectedDevice):
+        return ("devices", f"device:{row.device_id}")
+    if isinstance(row, DeviceAction):
+        return (f"actions:{row.device_id}",)
+    if isinstance(row, SystemAlert):
+        return ("alerts",)
+    return ()
+
+class CachedResponse:
+    __slots__ = ("body", "mimetype", "etag", "expires", "tags")
+
+    def __init__(self, body, mimetype, expires, tags):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.expires = expires
+        self.tags = tags
+
+    def respond(self):
+        response = current_app.response_class(self.body, mimetype=self.mimetype)
+        response.set_etag(self.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+class ResponseCache:
+    """In-process cache of serialized GET responses for read-heavy endpoints
+
+    Entries expire after their endpoint's TTL and are evicted least recently
+    used first once there are more than max_entries or the bodies exceed
+    max_bytes. Each entry carries tags (e.g. "devices", "device:<id>") and
+    invalidate() drops every entry with a given tag. ORM writes invalidate
+    the tags of the rows they touch once their transaction commits; writes
+    that bypass the ORM call invalidate() themselves. A response computed
+    while one of its tags was invalidated is served but not stored, so a
+    read racing a commit cannot cache stale data.
+
+    Only 200 responses are cached. Responses carry an ETag, and requests
+    whose If-None-Match matches get a 304. Each worker has its own cache, so
+    writes handled by another worker show up once the TTL expires.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.tag_keys = {}
+        self.tag_versions = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _drop(self, key, reason):
+        entry = self.entries.pop(key)
+        self.size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self.tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_keys[tag]
+        EVICTIONS.inc(reason)
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires <= time.monotonic():
+                self._drop(key, "expired")
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def versions(self, tags):
+        with self.lock:
+            return tuple(self.tag_versions.get(tag, 0) for tag in tags)
+
+    def store(self, key, entry, versions):
+        """Cache entry unless one of its tags was invalidated since versions were read"""
+        with self.lock:
+            if tuple(self.tag_versions.get(tag, 0) for tag in entry.tags) != versions:
+                return False
+            if key in self.entries:
+                self._drop(key, "replaced")
+            self.entries[key] = entry
+            self.size += len(entry.body)
+            for tag in entry.tags:
+                self.tag_keys.setdefault(tag, set()).add(key)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                self._drop(next(iter(self.entries)), "capacity")
+            return True
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for tag in tags:
+                self.tag_versions[tag] = self.tag_versions.get(tag, 0) + 1
+                for key in list(self.tag_keys.get(tag, ())):
+                    self._drop(key, "invalidated")
+
+    def cached(self, endpoint, ttl, tags, vary=None):
+        """Decorator caching a JSON view
+
+        tags is called with the view's arguments. vary, if given, returns a
+        cheap fingerprint of in-memory state the view reads; it becomes part
+        of the key, so a changed fingerprint simply misses.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                key = (endpoint,) + tuple(sorted(kwargs.items()))
+                if vary is not None:
+                    key += (vary(),)
+                entry = self.lookup(key)
+                if entry is not None:
+                    response = entry.respond()
+                    LOOKUPS.inc(endpoint, "not_modified" if response.status_code == 304 else "hit")
+                    return response
+                LOOKUPS.inc(endpoint, "miss")
+
+                entry_tags = tags(**kwargs)
+                versions = self.versions(entry_tags)
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = CachedResponse(response.get_data(), response.mimetype, time.monotonic() + ttl, entry_tags)
+                self.store(key, entry, versions)
+                return entry.respond()
+            return wrapper
+        return decorator
+
+    def watch_models(self):
+        """Invalidate the tags of ORM rows written in a transaction once it commits"""
+        @event.listens_for(Session, "after_flush")
+        def collect_tags(session, flush_context):
+            tags = session.info.setdefault("response_cache_tags", set())
+            for row in (*session.new, *session.dirty, *session.deleted):
+                tags.update(row_tags(row))
+
+        # A rollback may follow a flush that partly committed (savepoints), so it invalidates too
+        @event.listens_for(Session, "after_commit")
+        @event.listens_for(Session, "after_rollback")
+        def invalidate_flushed(session):
+            tags = session.info.pop("response_cache_tags", None)
+            if tags:
+                self.invalidate(*tags)
+
+    def get_stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,320 @@
+import heapq
+import math
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from models import db, AIAssistant, SystemAlert
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "with", "you",
+))
+
+# Document kinds stored in the index; one byte per document
+KIND_CONVERSATION = 0
+KIND_ALERT = 1
+KIND_NAMES = {KIND_CONVERSATION: "conversation", KIND_ALERT: "alert"}
+
+def tokenize(text):
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+class InvertedIndex:
+    """Inverted index ranked with BM25
+
+    Documents get sequential numbers, and per-document data lives in flat
+    arrays. Each term's postings are two parallel arrays (document numbers
+    in ascending order, term frequencies). A query matches documents that
+    contain every term: candidates come from the rarest term and are looked
+    up in the other posting lists by bisection. For very common terms only
+    the newest max_candidates matches are ranked, which bounds query time.
+
+    Removing a document marks it dead: it stops matching and leaves the
+    document count and average length at once. Once dead documents
+    outnumber a quarter of the live ones (and at least compact_after),
+    the postings are rebuilt without them, which frees their memory and
+    brings document frequencies back in line.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, max_candidates=50000, compact_after=1000):
+        self.max_candidates = max_candidates
+        self.compact_after = compact_after
+        self.doc_kinds = array("B")
+        self.doc_rows = array("Q")
+        self.doc_lengths = array("H")
+        self.live = bytearray()
+        self.docs = {}
+        self.total_length = 0
+        self.dead = 0
+        self.compactions = 0
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, kind, row_id, text):
+        if (kind, row_id) in self.docs:
+            return
+        tokens = tokenize(text)
+        length = min(len(tokens), 65535)
+        doc = len(self.doc_rows)
+        self.docs[kind, row_id] = doc
+        self.doc_kinds.append(kind)
+        self.doc_rows.append(row_id)
+        self.doc_lengths.append(length)
+        self.live.append(1)
+        self.total_length += length
+
+        frequencies = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for token, frequency in frequencies.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("I"), array("H"))
+            posting[0].append(doc)
+            posting[1].append(min(frequency, 65535))
+
+    def remove(self, kind, row_id):
+        """Drop a document; returns whether it was indexed"""
+        doc = self.docs.pop((kind, row_id), None)
+        if doc is None:
+            return False
+        self.live[doc] = 0
+        self.total_length -= self.doc_lengths[doc]
+        self.dead += 1
+        if self.dead >= self.compact_after and self.dead * 4 > len(self.docs):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Renumber live documents and rebuild the postings without dead ones"""
+        renumbered = array("q", [-1]) * len(self.doc_rows)
+        kinds, rows, lengths = array("B"), array("Q"), array("H")
+        for doc, alive in enumerate(self.live):
+            if alive:
+                renumbered[doc] = len(rows)
+                kinds.append(self.doc_kinds[doc])
+                rows.append(self.doc_rows[doc])
+                lengths.append(self.doc_lengths[doc])
+        postings = {}
+        for term, (docs, tfs) in self.postings.items():
+            live_docs, live_tfs = array("I"), array("H")
+            for doc, tf in zip(docs, tfs):
+                if renumbered[doc] >= 0:
+                    live_docs.append(renumbered[doc])
+                    live_tfs.append(tf)
+            if live_docs:
+                postings[term] = (live_docs, live_tfs)
+        self.doc_kinds, self.doc_rows, self.doc_lengths = kinds, rows, lengths
+        self.live = bytearray(b"\x01") * len(rows)
+        self.docs = {(kinds[doc], rows[doc]): doc for doc in range(len(rows))}
+        self.postings = postings
+        self.dead = 0
+        self.compactions += 1
+
+    def search(self, query, kinds=None, limit=20, offset=0):
+        """Return (match count, truncated, [(score, kind, row_id), ...]) for one page of results
+
+        truncated is True when only the newest max_candidates were ranked, in
+        which case the match count covers just those candidates.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.docs:
+            return 0, False, []
+        postings = [self.postings.get(term) for term in terms]
+        if any(posting is None for posting in postings):
+            return 0, False, []
+        postings.sort(key=lambda posting: len(posting[0]))
+
+        doc_count = len(self.docs)
+        average_length = self.total_length / doc_count or 1
+        # Postings still hold dead documents until the next compaction
+        doc_frequencies = [min(len(docs), doc_count) for docs, _ in postings]
+        idfs = [math.log(1 + (doc_count - df + 0.5) / (df + 0.5)) for df in doc_frequencies]
+
+        rarest_docs, rarest_tfs = postings[0]
+        start = max(0, len(rarest_docs) - self.max_candidates)
+        scored = []
+        matches = 0
+        for position in range(start, len(rarest_docs)):
+            doc = rarest_docs[position]
+            if not self.live[doc]:
+                continue
+            if kinds is not None and self.doc_kinds[doc] not in kinds:
+                continue
+            frequencies = [rarest_tfs[position]]
+            for docs, tfs in postings[1:]:
+                index = bisect_left(docs, doc)
+                if index == len(docs) or docs[index] != doc:
+                    break
+                frequencies.append(tfs[index])
+            else:
+                matches += 1
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[doc] / average_length)
+                score = sum(idf * tf * (self.K1 + 1) / (tf + norm) for idf, tf in zip(idfs, frequencies))
+                scored.append((score, doc))
+
+        # Ties go to the newest document
+        page = heapq.nlargest(offset + limit, scored)[offset:]
+        return matches, start > 0, [(score, self.doc_kinds[doc], self.doc_rows[doc]) for score, doc in page]
+
+class HistorySearch:
+    """Keeps an InvertedIndex over assistant conversations and system alerts
+
+    A background thread catches the index up every `interval` seconds on
+    rows whose id is above the highest id indexed so far, so inserts are
+    picked up whatever wrote them (ORM, batched core inserts, other
+    workers). Ids skipped on the way may belong to transactions that had
+    not committed yet, which happens on PostgreSQL when writers commit out
+    of id order. They are kept as gaps and re-checked on every pass until
+    the row turns up or gap_timeout seconds pass. At most max_gaps, nearest
+    the newest id, are tracked. Queries only read the index, so they never
+    wait on the database. Writers that delete rows report them through
+    remove(); rows deleted elsewhere are removed when a query finds them
+    gone.
+    """
+
+    SOURCES = (
+        (KIND_CONVERSATION, AIAssistant, (AIAssistant.message, AIAssistant.response)),
+        (KIND_ALERT, SystemAlert, (SystemAlert.alert_type, SystemAlert.message)),
+    )
+    GAP_QUERY_SIZE = 500
+
+    def __init__(self, batch_size=5000, max_candidates=50000, interval=1.0, gap_timeout=60, max_gaps=10000):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.gap_timeout = gap_timeout
+        self.max_gaps = max_gaps
+        self.index = InvertedIndex(max_candidates=max_candidates)
+        self.last_ids = {kind: 0 for kind, _, _ in self.SOURCES}
+        # Per kind: skipped id -> monotonic time after which it is given up on
+        self.gaps = {kind: {} for kind, _, _ in self.SOURCES}
+        self.lock = threading.Lock()
+        self.catch_up_lock = threading.Lock()
+        self.thread = None
+        self.filled = 0
+        self.expired = 0
+
+    def _add(self, kind, rows):
+        with self.lock:
+            for row_id, *texts in rows:
+                self.index.add(kind, row_id, " ".join(text for text in texts if text))
+
+    def _note_gaps(self, kind, previous_id, row_ids, now):
+        gaps = self.gaps[kind]
+        deadline = now + self.gap_timeout
+        expected = max(previous_id + 1, row_ids[-1] - self.max_gaps)
+        for row_id in row_ids:
+            if row_id > expected:
+                gaps.update(dict.fromkeys(range(expected, row_id), deadline))
+            expected = max(expected, row_id + 1)
+        if len(gaps) > self.max_gaps:
+            for row_id in heapq.nsmallest(len(gaps) - self.max_gaps, gaps):
+                del gaps[row_id]
+
+    def _fill_gaps(self, kind, model, columns, now):
+        gaps = self.gaps[kind]
+        ids = sorted(gaps)
+        added = 0
+        for start in range(0, len(ids), self.GAP_QUERY_SIZE):
+            rows = (db.session.query(model.id, *columns)
+                    .filter(model.id.in_(ids[start:start + self.GAP_QUERY_SIZE]))
+                    .order_by(model.id)
+                    .all())
+            self._add(kind, rows)
+            for row_id, *_ in rows:
+                del gaps[row_id]
+            added += len(rows)
+        self.filled += added
+        for row_id in [row_id for row_id, deadline in gaps.items() if deadline <= now]:
+            del gaps[row_id]
+            self.expired += 1
+        return added
+
+    def catch_up(self, now=None):
+        """Index rows inserted since the last call and gaps that have since committed; call inside an app context"""
+        now = time.monotonic() if now is None else now
+        added = 0
+        with self.catch_up_lock:
+            for kind, model, columns in self.SOURCES:
+                added += self._fill_gaps(kind, model, columns, now)
+                while True:
+                    rows = (db.session.query(model.id, *columns)
+                            .filter(model.id > self.last_ids[kind])
+                            .order_by(model.id)
+                            .limit(self.batch_size)
+                            .all())
+                    if rows:
+                        self._note_gaps(kind, self.last_ids[kind], [row[0] for row in rows], now)
+                        self._add(kind, rows)
+                        self.last_ids[kind] = rows[-1][0]
+                        added += len(rows)
+                    if len(rows) < self.batch_size:
+                        break
+        return added
+
+    def search(self, query, kinds=None, page=1, per_page=20):
+        with self.lock:
+            total, truncated, hits = self.index.search(query, kinds=kinds, limit=per_page, offset=(page - 1) * per_page)
+
+        rows = {}
+        for kind, model, _ in self.SOURCES:
+            ids = [row_id for _, hit_kind, row_id in hits if hit_kind == kind]
+            if ids:
+                rows.update(((kind, row.id), row) for row in model.query.filter(model.id.in_(ids)))
+
+        results = []
+        gone = []
+        for score, kind, row_id in hits:
+            row = rows.get((kind, row_id))
+            if row is None:
+                gone.append((kind, row_id))
+            else:
+                results.append(dict(row.to_dict(), type=KIND_NAMES[kind], score=round(score, 4)))
+        if gone:
+            with self.lock:
+                for kind, row_id in gone:
+                    self.index.remove(kind, row_id)
+            total -= len(gone)
+        return total, truncated, results
+
+    def remove(self, kind, row_ids):
+        """Drop deleted rows of one kind from the index; call after the delete commits"""
+        with self.lock:
+            for row_id in row_ids:
+                self.index.remove(kind, row_id)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "documents": len(self.index),
+                "terms": len(self.index.postings),
+                "dead_documents": self.index.dead,
+                "compactions": self.index.compactions,
+                "gaps": sum(len(gaps) for gaps in self.gaps.values()),
+                "gaps_filled": self.filled,
+                "gaps_expired": self.expired
+            }
+
+    def start(self, app):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, args=(app,), daemon=True)
+        self.thread.start()
+
+    def run(self, app):
+        while True:
+            try:
+                with app.app_context():
+                    self.catch_up()
+            except Exception as e:
+                print(f"Search index error: {e}")
+            time.sleep(self.interval)
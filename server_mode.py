@@ -0,0 +1,73 @@
+import os
+
+# "sync" runs handlers on plain threads; "async" uses a green-thread worker
+SERVER_MODE = os.environ.get("QUANTUM_SERVER_MODE", "sync").lower()
+ASYNC_WORKER = os.environ.get("QUANTUM_ASYNC_WORKER", "gevent").lower()
+DB_POOL_SIZE = int(os.environ.get("QUANTUM_DB_POOL_SIZE", "10"))
+
+GUNICORN_WORKER_CLASSES = {
+    "gevent": "geventwebsocket.gunicorn.workers.GeventWebSocketWorker",
+    "eventlet": "eventlet",
+}
+
+if SERVER_MODE not in ("sync", "async"):
+    raise RuntimeError(f"QUANTUM_SERVER_MODE must be 'sync' or 'async', not {SERVER_MODE!r}")
+if SERVER_MODE == "async" and ASYNC_WORKER not in GUNICORN_WORKER_CLASSES:
+    raise RuntimeError(f"QUANTUM_ASYNC_WORKER must be one of {', '.join(GUNICORN_WORKER_CLASSES)}")
+
+def is_async():
+    return SERVER_MODE == "async"
+
+def socketio_async_mode():
+    return ASYNC_WORKER if is_async() else "threading"
+
+def gunicorn_worker_class():
+    return GUNICORN_WORKER_CLASSES[ASYNC_WORKER] if is_async() else "sync"
+
+def monkey_patch():
+    """Patch the standard library, and psycopg2 if present, for the async worker unless already patched
+
+    psycopg2 is a C extension that monkey patching cannot reach, so without
+    psycogreen every query would block the whole worker. With it, database
+    waits yield to other green threads wherever they happen: socket
+    handlers, REST routes and background loops alike.
+    """
+    if not is_async():
+        return
+    try:
+        if ASYNC_WORKER == "gevent":
+            from gevent import monkey
+            if not monkey.is_module_patched("socket"):
+                monkey.patch_all()
+        else:
+            import eventlet
+            if not eventlet.patcher.is_monkey_patched("socket"):
+                eventlet.monkey_patch()
+        _patch_psycopg()
+    except ImportError as e:
+        raise RuntimeError(
+            f"Async mode with {ASYNC_WORKER} requires: pip install "
+            f"{'gevent gevent-websocket' if ASYNC_WORKER == 'gevent' else 'eventlet'} psycogreen"
+        ) from e
+
+def _patch_psycopg():
+    try:
+        import psycopg2
+    except ImportError:
+        return
+    if ASYNC_WORKER == "gevent":
+        from psycogreen.gevent import patch_psycopg
+    else:
+        from psycogreen.eventlet import patch_psycopg
+    patch_psycopg()
+
+def engine_options():
+    """SQLAlchemy engine options for the server mode
+
+    In async mode the connection pool is the bound on concurrent database
+    work: green threads past DB_POOL_SIZE (plus overflow) wait cooperatively
+    for a connection instead of each opening its own.
+    """
+    if not is_async():
+        return {}
+    return {"pool_size": DB_POOL_SIZE}
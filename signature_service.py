@@ -0,0 +1,73 @@
+import hashlib
+import struct
+
+# Fixed-width part of a signed state: timestamp, quantum energy, neural sync.
+# All doubles, so fractional energy and sync values are covered by the signature.
+_STATE_HEADER = struct.Struct(">ddd")
+_STRING_LENGTH = struct.Struct(">H")
+
+MAX_BATCH_SIZE = 1000
+
+class BatchTooLarge(ValueError):
+    pass
+
+def encode_state(owner, status, timestamp, quantum_energy, neural_sync):
+    """Canonical binary encoding of the signed QuantumWatch fields"""
+    owner_bytes = str(owner).encode()
+    status_bytes = str(status).encode()
+    return b"".join((
+        _STATE_HEADER.pack(float(timestamp), float(quantum_energy), float(neural_sync)),
+        _STRING_LENGTH.pack(len(owner_bytes)), owner_bytes,
+        _STRING_LENGTH.pack(len(status_bytes)), status_bytes,
+    ))
+
+def sign_snapshot(snapshot):
+    """Sign a state snapshot dict carrying the QuantumWatch signed fields"""
+    return hashlib.sha256(encode_state(
+        snapshot["owner"],
+        snapshot["status"],
+        snapshot["timestamp"],
+        snapshot["quantum_energy"],
+        snapshot["neural_sync"],
+    )).hexdigest()
+
+class SignatureService:
+    def __init__(self):
+        self.cached_version = None
+        self.cached_signature = None
+        self.hits = 0
+        self.misses = 0
+
+    def sign_watch(self, watch):
+        """Return the signature for the watch, reusing it while the signed state is unchanged"""
+        if self.cached_version == watch.signature_version:
+            self.hits += 1
+            return self.cached_signature
+
+        self.misses += 1
+        signature = hashlib.sha256(encode_state(
+            watch.owner,
+            watch.status,
+            watch.timestamp,
+            watch.quantum_energy,
+            watch.neural_sync,
+        )).hexdigest()
+        self.cached_version = watch.signature_version
+        self.cached_signature = signature
+        return signature
+
+    def sign_batch(self, snapshots):
+        """Sign many state snapshots, returning one result per snapshot in order"""
+        if len(snapshots) > MAX_BATCH_SIZE:
+            raise BatchTooLarge(f"Batch exceeds {MAX_BATCH_SIZE} snapshots")
+
+        results = []
+        for index, snapshot in enumerate(snapshots):
+            try:
+                results.append({"index": index, "signature": sign_snapshot(snapshot)})
+            except (KeyError, TypeError, ValueError, OverflowError, struct.error) as e:
+                results.append({"index": index, "error": f"Invalid snapshot: {e}"})
+        return results
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses}
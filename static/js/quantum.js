@@ -10,10 +10,29 @@ class QuantumInterface {
 
     init() {
         this.bindEvents();
+        this.hydrateState();
         this.startStatusUpdates();
         this.initializeParticles();
     }
 
+    async hydrateState() {
+        // The page shell is served from cache, so live watch values are filled in here
+        try {
+            this.applyState(await this.makeRequest('/api/status', 'GET'));
+        } catch (error) {
+            console.error('State hydration failed:', error);
+        }
+    }
+
+    applyState(result) {
+        this.updateStatus(result.status);
+        document.getElementById('activationCount').textContent = result.activation_count;
+        document.getElementById('buildCount').textContent = result.build_count;
+        document.getElementById('actionCount').textContent = result.total_actions;
+        this.updateLogs(result.logs);
+        this.updateMetrics();
+    }
+
     bindEvents() {
         // Button event listeners
         document.getElementById('activateBtn').addEventListener('click', () => this.activateInterface());
@@ -255,10 +274,25 @@ class QuantumInterface {
 
     startStatusUpdates() {
         this.statusUpdateInterval = setInterval(() => {
-            this.updateMetrics();
+            this.pollDashboard();
         }, 5000);
     }
 
+    async pollDashboard() {
+        // The server answers 304 while our dashboard version is still current
+        try {
+            const query = this.dashboardVersion ? `?version=${encodeURIComponent(this.dashboardVersion)}` : '';
+            const response = await fetch(`/api/dashboard${query}`);
+            if (response.status === 304) return;
+            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+            const data = await response.json();
+            this.dashboardVersion = data.version;
+            this.renderMetrics(data.watch);
+        } catch (error) {
+            console.error('Dashboard update failed:', error);
+        }
+    }
+
     async performNeuralScan() {
         try {
             const result = await this.makeRequest('/api/neural-scan');
@@ -506,62 +540,63 @@ class QuantumInterface {
 
     async updateMetrics() {
         try {
-            const result = await this.makeRequest('/api/status', 'GET');
-
-            // Update advanced metrics display
-            const quantumEnergyEl = document.getElementById('quantumEnergy');
-            const neuralSyncEl = document.getElementById('neuralSync');
-            const matrixStabilityEl = document.getElementById('matrixStability');
-            const threatLevelEl = document.getElementById('threatLevel');
-
-            if (quantumEnergyEl) quantumEnergyEl.textContent = result.quantum_energy + '%';
-            if (neuralSyncEl) neuralSyncEl.textContent = result.neural_sync + '%';
-            if (matrixStabilityEl) matrixStabilityEl.textContent = result.matrix_stability + '%';
-            if (threatLevelEl) threatLevelEl.textContent = result.threat_level;
-
-            // Update admin metrics
-            const cpuValue = document.getElementById('cpuValue');
-            const memoryValue = document.getElementById('memoryValue');
-            const storageValue = document.getElementById('storageValue');
-            const systemPerformance = document.getElementById('systemPerformance');
-            const systemTemperature = document.getElementById('systemTemperature');
-            const powerConsumption = document.getElementById('powerConsumption');
-            const cacheHitRate = document.getElementById('cacheHitRate');
-
-            if (cpuValue) cpuValue.textContent = result.cpu_usage + '%';
-            if (memoryValue) memoryValue.textContent = result.memory_usage + '%';
-            if (storageValue) storageValue.textContent = result.storage_usage + '%';
-            if (systemPerformance) systemPerformance.textContent = result.system_performance + '%';
-            if (systemTemperature) systemTemperature.textContent = result.system_temperature + '°C';
-            if (powerConsumption) powerConsumption.textContent = result.power_consumption + 'W';
-            if (cacheHitRate) cacheHitRate.textContent = result.cache_hit_rate + '%';
-
-            // Update progress bars
-            const cpuBar = document.getElementById('cpuBar');
-            const memoryBar = document.getElementById('memoryBar');
-            const storageBar = document.getElementById('storageBar');
-
-            if (cpuBar) cpuBar.style.width = result.cpu_usage + '%';
-            if (memoryBar) memoryBar.style.width = result.memory_usage + '%';
-            if (storageBar) storageBar.style.width = result.storage_usage + '%';
-
-            // Update alerts
-            this.updateAlerts(result.system_alerts);
-
-            // Update data streams
-            const dataStreamsDisplay = document.getElementById('dataStreamsDisplay');
-            if (dataStreamsDisplay) {
-                this.displayDataStreams(result.data_streams);
-            }
-
-            // Update admin mode
-            this.updateAdminMode(result.admin_mode);
-
+            this.renderMetrics(await this.makeRequest('/api/status', 'GET'));
         } catch (error) {
             console.error('Status update failed:', error);
         }
     }
 
+    renderMetrics(result) {
+        // Update advanced metrics display
+        const quantumEnergyEl = document.getElementById('quantumEnergy');
+        const neuralSyncEl = document.getElementById('neuralSync');
+        const matrixStabilityEl = document.getElementById('matrixStability');
+        const threatLevelEl = document.getElementById('threatLevel');
+
+        if (quantumEnergyEl) quantumEnergyEl.textContent = result.quantum_energy + '%';
+        if (neuralSyncEl) neuralSyncEl.textContent = result.neural_sync + '%';
+        if (matrixStabilityEl) matrixStabilityEl.textContent = result.matrix_stability + '%';
+        if (threatLevelEl) threatLevelEl.textContent = result.threat_level;
+
+        // Update admin metrics
+        const cpuValue = document.getElementById('cpuValue');
+        const memoryValue = document.getElementById('memoryValue');
+        const storageValue = document.getElementById('storageValue');
+        const systemPerformance = document.getElementById('systemPerformance');
+        const systemTemperature = document.getElementById('systemTemperature');
+        const powerConsumption = document.getElementById('powerConsumption');
+        const cacheHitRate = document.getElementById('cacheHitRate');
+
+        if (cpuValue) cpuValue.textContent = result.cpu_usage + '%';
+        if (memoryValue) memoryValue.textContent = result.memory_usage + '%';
+        if (storageValue) storageValue.textContent = result.storage_usage + '%';
+        if (systemPerformance) systemPerformance.textContent = result.system_performance + '%';
+        if (systemTemperature) systemTemperature.textContent = result.system_temperature + '°C';
+        if (powerConsumption) powerConsumption.textContent = result.power_consumption + 'W';
+        if (cacheHitRate) cacheHitRate.textContent = result.cache_hit_rate + '%';
+
+        // Update progress bars
+        const cpuBar = document.getElementById('cpuBar');
+        const memoryBar = document.getElementById('memoryBar');
+        const storageBar = document.getElementById('storageBar');
+
+        if (cpuBar) cpuBar.style.width = result.cpu_usage + '%';
+        if (memoryBar) memoryBar.style.width = result.memory_usage + '%';
+        if (storageBar) storageBar.style.width = result.storage_usage + '%';
+
+        // Update alerts
+        this.updateAlerts(result.system_alerts);
+
+        // Update data streams
+        const dataStreamsDisplay = document.getElementById('dataStreamsDisplay');
+        if (dataStreamsDisplay) {
+            this.displayDataStreams(result.data_streams);
+        }
+
+        // Update admin mode
+        this.updateAdminMode(result.admin_mode);
+    }
+
     initializeParticles() {
         // Create additional quantum particles effect
         const particlesContainer = document.querySelector('.quantum-particles');
@@ -651,14 +686,247 @@ function copyToClipboard(elementId) {
 let socket;
 let connectedDevices = [];
 
+const HEARTBEAT_INTERVAL_MS = 20000;
+const DEVICE_TOKEN_KEY = 'quantumDeviceToken';
+
+// The device token survives reloads and reconnects so the server keeps one record per device
+function randomHex(byteCount) {
+    const bytes = crypto.getRandomValues(new Uint8Array(byteCount));
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+}
+
+function getDeviceToken() {
+    let token = localStorage.getItem(DEVICE_TOKEN_KEY);
+    if (!token) {
+        token = randomHex(16);
+        localStorage.setItem(DEVICE_TOKEN_KEY, token);
+    }
+    return token;
+}
+
+// Offline outbox: actions and telemetry are queued in IndexedDB (or memory when
+// IndexedDB is unavailable) and replayed in batches once the client is online.
+// Telemetry is keyed by device so only the latest snapshot per device is sent.
+const OUTBOX_DB = 'quantum-outbox';
+const OUTBOX_STORE = 'items';
+const OUTBOX_ACTION_BATCH = 100;
+const OUTBOX_TELEMETRY_BATCH = 500;
+const OUTBOX_ACK_TIMEOUT_MS = 10000;
+
+function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+class SyncOutbox {
+    constructor() {
+        this.memory = new Map();
+        this.sequence = Date.now();
+        this.flushing = false;
+        this.flushAgain = false;
+        this.dbPromise = this.open();
+    }
+
+    open() {
+        if (!window.indexedDB) {
+            return Promise.resolve(null);
+        }
+        const request = indexedDB.open(OUTBOX_DB, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(OUTBOX_STORE, { keyPath: 'key' });
+        return idbRequest(request).catch(() => null);
+    }
+
+    async store(mode) {
+        const db = await this.dbPromise;
+        return db ? db.transaction(OUTBOX_STORE, mode).objectStore(OUTBOX_STORE) : null;
+    }
+
+    async put(item) {
+        const store = await this.store('readwrite');
+        if (store) {
+            await idbRequest(store.put(item));
+        } else {
+            this.memory.set(item.key, item);
+        }
+    }
+
+    async all() {
+        const store = await this.store('readonly');
+        const items = store ? await idbRequest(store.getAll()) : Array.from(this.memory.values());
+        return items.sort((a, b) => a.seq - b.seq);
+    }
+
+    async removeSent(items) {
+        // Skip entries rewritten while in flight (a newer telemetry snapshot for the same device)
+        const store = await this.store('readwrite');
+        for (const item of items) {
+            const current = store ? await idbRequest(store.get(item.key)) : this.memory.get(item.key);
+            if (current && current.seq === item.seq) {
+                if (store) {
+                    await idbRequest(store.delete(item.key));
+                } else {
+                    this.memory.delete(item.key);
+                }
+            }
+        }
+    }
+
+    enqueueAction(action) {
+        const idempotencyKey = randomHex(16);
+        return this.put({
+            key: `action:${idempotencyKey}`,
+            kind: 'action',
+            seq: ++this.sequence,
+            payload: Object.assign({}, action, { idempotency_key: idempotencyKey })
+        }).then(() => this.flush());
+    }
+
+    enqueueTelemetry(update) {
+        return this.put({
+            key: `telemetry:${update.device_id}`,
+            kind: 'telemetry',
+            seq: ++this.sequence,
+            payload: update
+        }).then(() => this.flush());
+    }
+
+    async flush() {
+        if (!navigator.onLine) {
+            return;
+        }
+        if (this.flushing) {
+            // Items enqueued mid-flush are sent by another pass of the running flush
+            this.flushAgain = true;
+            return;
+        }
+        this.flushing = true;
+        try {
+            do {
+                this.flushAgain = false;
+                const items = await this.all();
+                const actions = items.filter(item => item.kind === 'action');
+                const telemetry = items.filter(item => item.kind === 'telemetry');
+                for (let i = 0; i < actions.length && socket && socket.connected; i += OUTBOX_ACTION_BATCH) {
+                    await this.sendActions(actions.slice(i, i + OUTBOX_ACTION_BATCH));
+                }
+                for (let i = 0; i < telemetry.length; i += OUTBOX_TELEMETRY_BATCH) {
+                    await this.sendTelemetry(telemetry.slice(i, i + OUTBOX_TELEMETRY_BATCH));
+                }
+                if (telemetry.length) {
+                    reconcileDevices();
+                }
+            } while (this.flushAgain);
+        } catch (error) {
+            console.error('Outbox flush failed:', error);
+        } finally {
+            this.flushing = false;
+        }
+    }
+
+    settled(items, results) {
+        // Items rejected as invalid would fail again, so only transaction failures stay queued
+        return items.filter((item, index) => results[index] && results[index].error !== 'Transaction failed');
+    }
+
+    sendActions(items) {
+        return new Promise((resolve) => {
+            socket.timeout(OUTBOX_ACK_TIMEOUT_MS).emit('device_actions_batch', {
+                actions: items.map(item => item.payload)
+            }, (error, ack) => {
+                if (error || !ack || !ack.results) {
+                    resolve();
+                    return;
+                }
+                this.removeSent(this.settled(items, ack.results)).then(resolve, resolve);
+            });
+        });
+    }
+
+    async sendTelemetry(items) {
+        const response = await fetch('/api/devices/sync:batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ updates: items.map(item => item.payload) })
+        });
+        if (response.status === 200 || response.status === 207) {
+            const data = await response.json();
+            await this.removeSent(this.settled(items, data.results));
+        }
+    }
+}
+
+const outbox = new SyncOutbox();
+window.addEventListener('online', () => outbox.flush());
+
+// Binary telemetry frames (see telemetry_frames.py): version, field mask, device id, then fields
+const TELEMETRY_ENCODING = 'struct-v1';
+const TELEMETRY_FIELDS = [
+    ['battery_level', 'Int16', 2],
+    ['cpu_usage', 'Float32', 4],
+    ['memory_usage', 'Float32', 4],
+    ['storage_usage', 'Float32', 4],
+    ['quantum_energy', 'Int32', 4],
+    ['neural_sync', 'Int32', 4],
+    ['matrix_stability', 'Int32', 4],
+    ['network_status', 'Uint8', 1],
+    ['threat_level', 'Uint8', 1]
+];
+const TELEMETRY_ENUMS = {
+    network_status: ['Online', 'Offline', 'Limited'],
+    threat_level: ['Green', 'Yellow', 'Red']
+};
+const telemetryTextDecoder = new TextDecoder();
+
+function decodeTelemetryFrame(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint8(0) !== 1) {
+        return null;
+    }
+    const mask = view.getUint16(1);
+    const idLength = view.getUint8(3);
+    const values = { device_id: telemetryTextDecoder.decode(new Uint8Array(buffer, 4, idLength)) };
+    let offset = 4 + idLength;
+    TELEMETRY_FIELDS.forEach(([name, type, size], fieldId) => {
+        if (!(mask & (1 << fieldId))) {
+            return;
+        }
+        const value = view[`get${type}`](offset);
+        offset += size;
+        if (TELEMETRY_ENUMS[name]) {
+            values[name] = TELEMETRY_ENUMS[name][value];
+        } else {
+            values[name] = type === 'Float32' ? Math.round(value * 100) / 100 : value;
+        }
+    });
+    return values;
+}
+
 function initializeSocket() {
-    socket = io();
+    socket = io({
+        auth: (cb) => cb({ device_token: getDeviceToken(), telemetry_encoding: TELEMETRY_ENCODING })
+    });
+
+    socket.on('device_identity', (data) => {
+        localStorage.setItem(DEVICE_TOKEN_KEY, data.device_token);
+    });
 
     socket.on('connect', () => {
         console.log('Connected to server');
-        loadConnectedDevices();
+        outbox.flush();
+        reconcileDevices();
     });
 
+    // Keep this device marked active; the server expires devices that go quiet
+    setInterval(() => {
+        if (socket.connected) {
+            socket.emit('heartbeat');
+        }
+    }, HEARTBEAT_INTERVAL_MS);
+
     socket.on('disconnect', () => {
         console.log('Disconnected from server');
     });
@@ -680,11 +948,24 @@ function initializeSocket() {
         updateDeviceInGrid(data.device);
     });
 
+    socket.on('device_telemetry', (frame) => {
+        const telemetry = decodeTelemetryFrame(frame);
+        const device = telemetry && connectedDevices.find(d => d.device_id === telemetry.device_id);
+        if (device) {
+            updateDeviceInGrid(Object.assign({}, device, telemetry));
+        }
+    });
+
     socket.on('action_result', (data) => {
         console.log('Action result:', data);
         addActionToLog(data);
     });
 
+    socket.on('action_results', (data) => {
+        console.log('Action results:', data);
+        data.results.forEach(addActionToLog);
+    });
+
     socket.on('device_sync_toggled', (data) => {
         console.log('Device sync toggled:', data);
         updateSyncStatus(data.enabled);
@@ -698,6 +979,44 @@ function initializeSocket() {
     });
 }
 
+// Last state version seen from /api/reconcile; reconnects then fetch only what changed
+let stateEpoch = null;
+let stateVersion = null;
+
+function reconcileDevices() {
+    const query = stateEpoch ? `?epoch=${stateEpoch}&since=${stateVersion}` : '';
+    return fetch(`/api/reconcile${query}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                return;
+            }
+            if (data.full) {
+                connectedDevices = data.devices;
+            } else {
+                const removed = new Set(data.removed);
+                connectedDevices = connectedDevices.filter(d => !removed.has(d.device_id));
+                data.devices.forEach(device => {
+                    const index = connectedDevices.findIndex(d => d.device_id === device.device_id);
+                    if (index === -1) {
+                        connectedDevices.push(device);
+                    } else {
+                        connectedDevices[index] = device;
+                    }
+                });
+            }
+            stateEpoch = data.epoch;
+            stateVersion = data.version;
+            renderDevicesGrid();
+            if (window.quantumInterface) {
+                window.quantumInterface.applyState(data.status);
+            }
+        })
+        .catch(error => {
+            console.error('Error reconciling devices:', error);
+        });
+}
+
 function loadConnectedDevices() {
     fetch('/api/devices')
         .then(response => response.json())
@@ -842,19 +1161,10 @@ function syncDevice(deviceId) {
         threat_level: ['Green', 'Yellow', 'Red'][Math.floor(Math.random() * 3)]
     };
 
-    fetch(`/api/device/${deviceId}/sync`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(syncData)
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.success) {
-            showDeviceNotification(`Device ${deviceId.substr(0, 8)} synced successfully`, 'success');
-            updateDeviceInGrid(data.device);
-        }
+    outbox.enqueueTelemetry(Object.assign({ device_id: deviceId }, syncData))
+    .then(() => {
+        const state = navigator.onLine ? 'synced' : 'queued for sync';
+        showDeviceNotification(`Device ${deviceId.substr(0, 8)} ${state}`, 'success');
     })
     .catch(error => {
         console.error('Error syncing device:', error);
@@ -863,14 +1173,13 @@ function syncDevice(deviceId) {
 }
 
 function sendActionToDevice(deviceId, actionType) {
-    if (socket) {
-        socket.emit('device_action', {
-            device_id: deviceId,
-            action_type: actionType,
-            action_data: {}
-        });
-        showDeviceNotification(`Action "${actionType}" sent to device`, 'info');
-    }
+    outbox.enqueueAction({
+        device_id: deviceId,
+        action_type: actionType,
+        action_data: {}
+    });
+    const state = socket && socket.connected ? 'sent to device' : 'queued until reconnect';
+    showDeviceNotification(`Action "${actionType}" ${state}`, 'info');
 }
 
 function disconnectDevice(deviceId) {
@@ -949,7 +1258,7 @@ let aiAssistantActive = false;
 
 // Initialize when document is ready
 document.addEventListener('DOMContentLoaded', function() {
-    loadConnectedDevices();
+    reconcileDevices();
     initializeEventListeners();
     initializeSocket();
     updateConnectionUrl();
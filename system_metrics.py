@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from array import array
+
+class RingBuffer:
+    """Fixed-size buffer of floats; once full, each append overwrites the oldest value"""
+
+    def __init__(self, size):
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.position = 0
+
+    def append(self, value):
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def last(self):
+        return self.values[self.position - 1] if self.count else None
+
+    def snapshot(self):
+        return list(self.values[:self.count])
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        ordered = sorted(self.values[:self.count])
+        return ordered[min(self.count - 1, int(self.count * fraction))]
+
+def _read_proc(path):
+    with open(path, "rb") as proc_file:
+        return proc_file.read()
+
+def read_host_cpu():
+    """(busy, total) jiffies across all CPUs from /proc/stat"""
+    fields = [int(value) for value in _read_proc("/proc/stat").split(b"\n", 1)[0].split()[1:9]]
+    idle = fields[3] + fields[4]
+    total = sum(fields)
+    return total - idle, total
+
+def read_host_memory():
+    """Percent of host memory in use, from /proc/meminfo"""
+    info = {}
+    for line in _read_proc("/proc/meminfo").splitlines():
+        name, _, rest = line.partition(b":")
+        if name in (b"MemTotal", b"MemAvailable"):
+            info[name] = int(rest.split()[0])
+    return 100.0 * (1 - info[b"MemAvailable"] / info[b"MemTotal"])
+
+def read_process():
+    """(cpu seconds, resident bytes) of this process from /proc/self"""
+    # Fields after the parenthesised command name; utime and stime are fields 14 and 15
+    fields = _read_proc("/proc/self/stat").rsplit(b")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    resident = int(_read_proc("/proc/self/statm").split()[1]) * _PAGE_SIZE
+    return cpu_seconds, resident
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+class SystemMetrics:
+    """Samples host and process stats from /proc plus request latency and DB pool use
+
+    A background thread samples every `interval` seconds into ring buffers
+    of `history` samples and passes the latest readings to on_sample.
+    Request latencies are recorded as they finish into a ring buffer of the
+    last `latency_samples` requests. Cache hit rate is computed over the
+    sampling window from the registered cache sources, each a callable
+    returning cumulative (hits, misses). On systems without /proc the host
+    and process readings are skipped.
+    """
+
+    def __init__(self, interval=5.0, history=120, latency_samples=2048, storage_path="/"):
+        self.interval = interval
+        self.storage_path = storage_path
+        self.cpu = RingBuffer(history)
+        self.memory = RingBuffer(history)
+        self.process_cpu = RingBuffer(history)
+        self.process_memory = RingBuffer(history)
+        self.pool_in_use = RingBuffer(history)
+        self.cache_lookups = RingBuffer(history)
+        self.cache_hits = RingBuffer(history)
+        self.latencies = RingBuffer(latency_samples)
+        self.latency_lock = threading.Lock()
+        self.cache_sources = []
+        self.previous = None
+        self.thread = None
+
+    def add_cache_source(self, read):
+        self.cache_sources.append(read)
+
+    def observe_request(self, seconds):
+        with self.latency_lock:
+            self.latencies.append(seconds)
+
+    def _cache_totals(self):
+        hits = misses = 0
+        for read in self.cache_sources:
+            source_hits, source_misses = read()
+            hits += source_hits
+            misses += source_misses
+        return hits, misses
+
+    def sample(self, pool=None):
+        """Take one sample; returns the current readings for the admin dashboard fields"""
+        now = time.monotonic()
+        try:
+            host_busy, host_total = read_host_cpu()
+            memory_percent = read_host_memory()
+            process_seconds, resident = read_process()
+        except (OSError, ValueError, KeyError, IndexError):
+            host_busy = host_total = process_seconds = resident = memory_percent = None
+        hits, misses = self._cache_totals()
+
+        previous = self.previous
+        self.previous = (now, host_busy, host_total, process_seconds, hits, misses)
+        if previous is not None:
+            elapsed = now - previous[0]
+            if host_total is not None and previous[2] is not None and host_total > previous[2]:
+                self.cpu.append(100.0 * (host_busy - previous[1]) / (host_total - previous[2]))
+                self.process_cpu.append(100.0 * (process_seconds - previous[3]) / elapsed)
+            self.cache_hits.append(hits - previous[4])
+            self.cache_lookups.append(hits + misses - previous[4] - previous[5])
+        if memory_percent is not None:
+            self.memory.append(memory_percent)
+            self.process_memory.append(resident)
+        checked_out = getattr(pool, "checkedout", None)
+        if checked_out is not None:
+            self.pool_in_use.append(checked_out())
+        return self.readings()
+
+    def readings(self):
+        """Latest value of each dashboard field that has been measured"""
+        readings = {}
+        if len(self.cpu):
+            readings["cpu_usage"] = round(self.cpu.last(), 1)
+        if len(self.memory):
+            readings["memory_usage"] = round(self.memory.last(), 1)
+        try:
+            storage = os.statvfs(self.storage_path)
+            readings["storage_usage"] = round(100.0 * (1 - storage.f_bavail / storage.f_blocks), 1)
+        except (OSError, AttributeError, ZeroDivisionError):
+            pass
+        with self.latency_lock:
+            median = self.latencies.percentile(0.5)
+        if median is not None:
+            readings["response_time"] = round(median, 4)
+        if len(self.pool_in_use):
+            readings["database_connections"] = int(self.pool_in_use.last())
+        lookups = sum(self.cache_lookups.snapshot())
+        if lookups:
+            readings["cache_hit_rate"] = round(100.0 * sum(self.cache_hits.snapshot()) / lookups, 1)
+        return readings
+
+    def get_stats(self):
+        with self.latency_lock:
+            p95 = self.latencies.percentile(0.95)
+            requests = len(self.latencies)
+        resident = self.process_memory.last()
+        return {
+            "process_cpu": self.process_cpu.last(),
+            "process_resident_bytes": int(resident) if resident is not None else None,
+            "latency_p95": p95,
+            "latency_samples": requests,
+            "pool_in_use_peak": max(self.pool_in_use.snapshot(), default=None),
+        }
+
+    def start(self, app, on_sample, pool_source=None):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, args=(app, on_sample, pool_source), daemon=True)
+            self.thread.start()
+
+    def run(self, app, on_sample, pool_source):
+        while True:
+            try:
+                with app.app_context():
+                    on_sample(self.sample(pool_source() if pool_source else None))
+            except Exception as e:
+                print(f"System metrics error: {e}")
+            time.sleep(self.interval)
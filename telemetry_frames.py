@@ -0,0 +1,98 @@
+import struct
+from functools import lru_cache
+
+# Value a client sends as auth.telemetry_encoding to receive binary frames
+ENCODING_STRUCT = "struct-v1"
+FRAME_VERSION = 1
+
+# Frame layout: version, field bitmask, device id length, device id, then the
+# present fields in field-ID order, all big-endian
+_HEADER = struct.Struct(">BHB")
+
+# Field IDs are bit positions in the frame mask; never renumber or reuse one
+TELEMETRY_FIELDS = (
+    (0, "battery_level", "h"),
+    (1, "cpu_usage", "f"),
+    (2, "memory_usage", "f"),
+    (3, "storage_usage", "f"),
+    (4, "quantum_energy", "i"),
+    (5, "neural_sync", "i"),
+    (6, "matrix_stability", "i"),
+    (7, "network_status", "B"),
+    (8, "threat_level", "B"),
+)
+ENUM_VALUES = {
+    "network_status": ("Online", "Offline", "Limited"),
+    "threat_level": ("Green", "Yellow", "Red"),
+}
+_ENUM_CODES = {name: {value: code for code, value in enumerate(values)} for name, values in ENUM_VALUES.items()}
+_FLOAT_FIELDS = frozenset(name for _, name, fmt in TELEMETRY_FIELDS if fmt == "f")
+
+@lru_cache(maxsize=512)
+def _body_struct(mask):
+    return struct.Struct(">" + "".join(fmt for field_id, _, fmt in TELEMETRY_FIELDS if mask & (1 << field_id)))
+
+@lru_cache(maxsize=512)
+def _body_layout(mask):
+    """Struct, field names, enum names and float names for the fields present in mask"""
+    names = tuple(name for field_id, name, _ in TELEMETRY_FIELDS if mask & (1 << field_id))
+    return (
+        _body_struct(mask),
+        names,
+        tuple(name for name in names if name in ENUM_VALUES),
+        tuple(name for name in names if name in _FLOAT_FIELDS),
+    )
+
+def encode_frame(values, device_id=""):
+    """Pack the telemetry fields present in values into a binary frame
+
+    Raises ValueError for values the schema cannot carry (unknown enum
+    strings, out-of-range integers); callers fall back to JSON for that frame.
+    """
+    mask = 0
+    packed = []
+    for field_id, name, _ in TELEMETRY_FIELDS:
+        value = values.get(name)
+        if value is None:
+            continue
+        if name in _ENUM_CODES:
+            code = _ENUM_CODES[name].get(value)
+            if code is None:
+                raise ValueError(f"{name} value {value!r} has no telemetry code")
+            value = code
+        mask |= 1 << field_id
+        packed.append(value)
+
+    device_id_bytes = device_id.encode()
+    if len(device_id_bytes) > 255:
+        raise ValueError("device_id too long for a telemetry frame")
+    try:
+        body = _body_struct(mask).pack(*packed)
+    except struct.error as e:
+        raise ValueError(f"Telemetry value out of range: {e}") from e
+    return _HEADER.pack(FRAME_VERSION, mask, len(device_id_bytes)) + device_id_bytes + body
+
+def decode_frame(frame):
+    """Unpack a binary frame into (device_id, values); raises ValueError if malformed"""
+    frame = bytes(frame)
+    if len(frame) < _HEADER.size:
+        raise ValueError("Telemetry frame too short")
+    version, mask, id_length = _HEADER.unpack_from(frame)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported telemetry frame version {version}")
+
+    offset = _HEADER.size + id_length
+    body, names, enum_names, float_names = _body_layout(mask)
+    if len(frame) != offset + body.size:
+        raise ValueError("Telemetry frame length does not match its field mask")
+    device_id = frame[_HEADER.size:offset].decode()
+
+    values = dict(zip(names, body.unpack_from(frame, offset)))
+    for name in enum_names:
+        codes = ENUM_VALUES[name]
+        if values[name] >= len(codes):
+            raise ValueError(f"Unknown {name} code {values[name]}")
+        values[name] = codes[values[name]]
+    for name in float_names:
+        values[name] = round(values[name], 2)
+    return device_id, values
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+from flask import Flask
+
+from models import db
+
+@pytest.fixture
+def app(tmp_path):
+    """A bare app on a scratch SQLite database, with an app context pushed"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """The application module, configured to keep all of its state in a scratch directory"""
+    directory = tmp_path_factory.mktemp("main")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{directory / 'quantum.db'}",
+        "WATCH_JOURNAL_DIR": str(directory / "watch_events"),
+        "REQUEST_COUNTERS_PATH": str(directory / "counters.bin"),
+        "SYSTEM_METRICS_INTERVAL": "3600",
+        "ALERT_MAINTENANCE_INTERVAL": "3600",
+    })
+    import main
+    patch = pytest.MonkeyPatch()
+    patch.setattr(main.PUBLIC_AUDIT_LOG, "path", str(directory / "public_audit_log.jsonl"))
+    # The AI monitor scans the network and prints every notification it sends
+    patch.setattr(main.QuantumAIAssistant, "start_monitoring", lambda self, host=None: None)
+    yield main
+    patch.undo()
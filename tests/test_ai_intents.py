@@ -0,0 +1,20 @@
+import pytest
+
+from ai_intents import classify_intent
+
+# Routing of the original if/elif chain, which matched substrings in this order
+@pytest.mark.parametrize("message, intent", [
+    ("How many devices are online?", "device_status"),
+    ("Which ones disconnected?", "device_status"),
+    ("Are my devices secure from threats?", "device_status"),
+    ("Any threats today?", "security"),
+    ("Security report please", "security"),
+    ("Should I install the app?", "install"),
+    ("I'm happy with it", "install"),
+    ("Is the database sharing enabled?", "data_sharing"),
+    ("Tell me about my device", "help"),
+    ("Is my connection secure?", "help"),
+    ("hello", "help"),
+])
+def test_routing_matches_the_original_chain(message, intent):
+    assert classify_intent(message) == intent
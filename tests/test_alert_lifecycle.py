@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from alert_lifecycle import AlertLifecycle
+from models import db, SystemAlert
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+def add_alert(severity, age):
+    alert = SystemAlert(device_id="device-1", alert_type="notice", message="check",
+                        severity=severity, timestamp=NOW - timedelta(seconds=age))
+    db.session.add(alert)
+    db.session.commit()
+    return alert.id
+
+def severity_of(alert_id):
+    return db.session.get(SystemAlert, alert_id).severity
+
+def test_alert_committed_after_a_pass_still_escalates(app):
+    lifecycle = AlertLifecycle(escalate_after=900)
+    add_alert("WARNING", 1000)
+    assert lifecycle.escalate(now=NOW) == 1
+
+    late = add_alert("WARNING", 1200)
+    assert lifecycle.escalate(now=NOW + timedelta(seconds=30)) == 1
+    assert severity_of(late) == "ERROR"
+
+def test_a_fresh_lifecycle_escalates_by_current_severity(app):
+    warning = add_alert("WARNING", 1000)
+    error = add_alert("ERROR", 1000)
+    AlertLifecycle(escalate_after=900).escalate(now=NOW)
+    assert severity_of(warning) == "ERROR"
+    assert severity_of(error) == "ERROR"
+
+    AlertLifecycle(escalate_after=900).escalate(now=NOW + timedelta(seconds=800))
+    db.session.expire_all()
+    assert severity_of(error) == "CRITICAL"
+    assert severity_of(warning) == "CRITICAL"
+
+def test_acknowledged_alerts_are_not_escalated(app):
+    alert_id = add_alert("WARNING", 5000)
+    db.session.get(SystemAlert, alert_id).is_acknowledged = True
+    db.session.commit()
+    assert AlertLifecycle(escalate_after=900).escalate(now=NOW) == 0
+
+def test_archive_reports_moved_ids(app):
+    alert_id = add_alert("INFO", 40 * 86400)
+    lifecycle = AlertLifecycle()
+    archived = []
+    lifecycle.on_archive.append(archived.extend)
+    assert lifecycle.archive(now=NOW) == 1
+    assert archived == [alert_id]
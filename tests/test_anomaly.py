@@ -0,0 +1,33 @@
+from anomaly import AnomalyDetector
+
+def steady(detector, device_id, windows, per_window=5, window=60):
+    """Feed `windows` windows of per_window evenly spaced actions; returns the time after the last"""
+    now = 0.0
+    for _ in range(windows):
+        for _ in range(per_window):
+            detector.record_action(device_id, now)
+            now += window / per_window
+    return now
+
+def test_idle_window_is_scored_as_a_low_rate():
+    detector = AnomalyDetector(warmup=5, threshold=4)
+    now = steady(detector, "device", 30)
+    index = detector.slots["device"] * 4 + 3
+    assert round(detector.means[index]) == 5
+    # Three hours of silence: the open window held its actions over ~3 hours, not 60 seconds
+    assert detector.record_action("device", now + 3 * 3600) == []
+    assert detector.means[index] < 4.8
+
+def test_burst_alerts_before_the_window_closes():
+    detector = AnomalyDetector(warmup=5, threshold=4)
+    now = steady(detector, "device", 30)
+    found = []
+    for offset in range(40):
+        found += detector.record_action("device", now + offset * 0.1)
+    assert [anomaly.metric for anomaly in found] == ["action_rate"]
+    assert found[0].value < 40
+
+def test_steady_rate_does_not_alert():
+    detector = AnomalyDetector(warmup=5, threshold=4)
+    steady(detector, "device", 50)
+    assert detector.get_stats()["anomalies"] == 0
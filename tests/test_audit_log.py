@@ -0,0 +1,37 @@
+import hashlib
+import json
+
+from Final_Satellite_Payment_System_Protected import PublicAuditLog
+
+def chain_is_intact(entries):
+    previous = "0" * 64
+    for entry in entries:
+        body = {name: value for name, value in entry.items() if name != "entry_hash"}
+        line = json.dumps(body, sort_keys=True, separators=(",", ":"))
+        if entry["previous_hash"] != previous or hashlib.sha256(line.encode()).hexdigest() != entry["entry_hash"]:
+            return False
+        previous = entry["entry_hash"]
+    return True
+
+def test_processes_sharing_the_file_extend_one_chain(tmp_path):
+    path = str(tmp_path / "audit.jsonl")
+    first, second = PublicAuditLog(path), PublicAuditLog(path)
+    first.append("TAMPER_MONITOR", "HIGH: anomaly")
+    second.append("REGISTRY_PUBLISHED", "etag")
+    first.append("CERTIFICATE_REGISTERED", "title")
+    entries = second.entries()
+    assert [entry["event"] for entry in entries] == ["TAMPER_MONITOR", "REGISTRY_PUBLISHED", "CERTIFICATE_REGISTERED"]
+    assert chain_is_intact(entries)
+
+def test_torn_tail_is_skipped_then_truncated(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    log = PublicAuditLog(str(path))
+    log.append("TAMPER_MONITOR", "first")
+    with open(path, "a") as log_file:
+        log_file.write('{"event": "TAMPER_MON')
+
+    reader = PublicAuditLog(str(path))
+    assert [entry["details"] for entry in reader.entries()] == ["first"]
+    reader.append("TAMPER_MONITOR", "second")
+    assert chain_is_intact(PublicAuditLog(str(path)).entries())
+    assert len(path.read_text().splitlines()) == 2
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from change_feed import ChangeFeed
+from models import db, ConnectedDevice
+from presence import PresenceTracker, persist_presence
+
+@pytest.fixture(scope="module")
+def feed():
+    # Listeners are registered on the Session class for the life of the process, so share one feed
+    feed = ChangeFeed(capacity=100)
+    feed.watch_devices()
+    return feed
+
+def add_device(device_id):
+    device = ConnectedDevice(device_id=device_id, device_name=device_id, device_type="phone", ip_address="10.0.0.1")
+    db.session.add(device)
+    return device
+
+def test_changes_are_published_at_commit(app, feed):
+    start = feed.version
+    device = add_device("dev-a")
+    db.session.flush()
+    assert feed.version == start
+
+    db.session.commit()
+    version, changed = feed.changed_since(feed.epoch, start)
+    assert changed == {"dev-a"}
+
+    device.battery_level = 50
+    db.session.flush()
+    assert feed.changed_since(feed.epoch, version) == (version, set())
+    db.session.commit()
+    assert feed.changed_since(feed.epoch, version)[1] == {"dev-a"}
+
+def test_unflushed_rollback_records_nothing(app, feed):
+    start = feed.version
+    add_device("dev-b")
+    db.session.rollback()
+    assert feed.version == start
+
+def test_old_or_foreign_versions_need_a_full_reload(feed):
+    feed.record(*(f"dev-{index}" for index in range(150)))
+    assert feed.changed_since(feed.epoch, 0)[1] is None
+    assert feed.changed_since("another-epoch", feed.version)[1] is None
+
+def test_presence_reports_only_is_active_changes():
+    tracker = PresenceTracker(heartbeat_timeout=1, tick=0.1)
+    tracker.connect("steady", "Steady")
+    tracker.connect("lost", "Lost")
+    tracker.heartbeat("steady")
+    updates, changed = tracker.drain()
+    assert {update["b_device_id"] for update in updates} == {"steady"}
+    assert changed == set()
+
+    tracker.advance(time.monotonic() + 5)
+    tracker.heartbeat("lost")  # a throttled client whose entry already expired
+    updates, changed = tracker.drain()
+    assert {update["b_device_id"]: update["b_is_active"] for update in updates} == {"steady": False, "lost": True}
+    assert changed == {"steady", "lost"}
+
+def test_device_registered_again_before_the_flush_stays_active(app):
+    device = add_device("dev-returning")
+    db.session.commit()
+    tracker = PresenceTracker(heartbeat_timeout=1, tick=0.1)
+    tracker.connect("dev-returning", "Returning")
+    tracker.drain()
+
+    tracker.advance(time.monotonic() + 5)
+    tracker.connect("dev-returning", "Returning")  # its row was registered active again
+    updates, changed = tracker.drain()
+    persist_presence(updates)
+    assert db.session.get(ConnectedDevice, device.id).is_active is True
+    assert changed == {"dev-returning"}
@@ -0,0 +1,33 @@
+import pytest
+
+from conversation_log import ConversationLog
+from models import AIAssistant
+
+def test_failed_flush_keeps_rows_for_the_next_one(app, monkeypatch):
+    log = ConversationLog(retention=2)
+    for index in range(3):
+        log.record("session", f"message {index}", "response", 1)
+
+    def fail(session_id):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(log, "_trim", fail)
+    with pytest.raises(RuntimeError):
+        log.flush()
+    assert log.get_stats()["pending"] == 3
+    assert AIAssistant.query.count() == 0
+
+    monkeypatch.undo()
+    log.flush()
+    assert [row.message for row in AIAssistant.query.order_by(AIAssistant.id)] == ["message 1", "message 2"]
+
+def test_requeue_drops_the_newest_past_capacity():
+    log = ConversationLog(max_pending=3)
+    log.record("session", "newer", "response", 1)
+    log.requeue([{"message": "older 1"}, {"message": "older 2"}, {"message": "older 3"}])
+    assert [row["message"] for row in log.pending] == ["older 1", "older 2", "older 3"]
+    assert log.get_stats()["dropped"] == 1
+
+def test_retention_must_keep_a_message():
+    with pytest.raises(ValueError):
+        ConversationLog(retention=0)
@@ -0,0 +1,44 @@
+import pytest
+
+@pytest.fixture
+def client(main_module):
+    client = main_module.socketio.test_client(main_module.app)
+    yield client
+    client.disconnect()
+
+def send_batch(client, actions):
+    return client.emit("device_actions_batch", {"actions": actions}, callback=True)
+
+def test_retried_action_is_answered_from_the_cache(client):
+    action = {"action_type": "neural_scan", "idempotency_key": "retry-once"}
+    first = client.emit("device_action", action, callback=True)
+    second = client.emit("device_action", action, callback=True)
+    assert second["duplicate"] is True
+    assert second["result"] == first["result"]
+
+def test_batch_repeats_and_retries_run_once(client):
+    actions = [
+        {"action_type": "quantum_boost", "idempotency_key": "batch-a"},
+        {"action_type": "quantum_boost", "idempotency_key": "batch-a"},
+        {"action_type": "warp_drive"},
+    ]
+    ack = send_batch(client, actions)
+    assert [result["success"] for result in ack["results"]] == [True, True, False]
+    assert ack["results"][1]["duplicate"] is True
+
+    retry = send_batch(client, actions[:1])
+    assert retry["results"][0]["duplicate"] is True
+    assert retry["results"][0]["result"] == ack["results"][0]["result"]
+
+def test_failed_batch_releases_its_keys(client, main_module, monkeypatch):
+    def fail(action_type, action_data):
+        raise RuntimeError("watch unavailable")
+
+    monkeypatch.setattr(main_module, "execute_device_action", fail)
+    with pytest.raises(RuntimeError):
+        send_batch(client, [{"action_type": "security_scan", "idempotency_key": "batch-fails"}])
+    monkeypatch.undo()
+
+    retry = send_batch(client, [{"action_type": "security_scan", "idempotency_key": "batch-fails"}])
+    assert retry["results"][0]["success"] is True
+    assert "duplicate" not in retry["results"][0]
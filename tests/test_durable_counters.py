@@ -0,0 +1,87 @@
+import threading
+
+from durable_counters import CounterFile
+
+NAMES = ("total_requests", "error_count")
+
+def test_checkpoint_survives_reopen(tmp_path):
+    path = str(tmp_path / "counters.bin")
+    counters = CounterFile(path, NAMES)
+    counters.open()
+    counters.add("total_requests", 5)
+    counters.add("error_count")
+    counters.checkpoint()
+    counters.add("total_requests")  # not checkpointed, lost on "crash"
+
+    reopened = CounterFile(path, NAMES)
+    reopened.open()
+    assert reopened.totals() == {"total_requests": 5, "error_count": 1}
+
+def test_workers_share_the_file(tmp_path):
+    path = str(tmp_path / "counters.bin")
+    workers = [CounterFile(path, NAMES) for _ in range(3)]
+    for worker in workers:
+        worker.open()
+    for _ in range(10):
+        for worker in workers:
+            worker.add("total_requests")
+            worker.checkpoint()
+    assert workers[0].totals()["total_requests"] == 30
+
+def test_added_counters_keep_existing_values(tmp_path):
+    path = str(tmp_path / "counters.bin")
+    counters = CounterFile(path, NAMES[:1])
+    counters.open()
+    counters.add("total_requests", 7)
+    counters.checkpoint()
+
+    widened = CounterFile(path, NAMES)
+    widened.open()
+    assert widened.totals() == {"total_requests": 7, "error_count": 0}
+
+def test_unreadable_copies_reset_to_zero(tmp_path):
+    path = str(tmp_path / "counters.bin")
+    counters = CounterFile(path, NAMES)
+    counters.open()
+    counters.add("total_requests", 3)
+    counters.checkpoint()
+    counters.map.close()
+    with open(path, "r+b") as counter_file:
+        data = bytearray(counter_file.read())
+        for index in range(16, len(data)):
+            data[index] ^= 0xFF
+        counter_file.seek(0)
+        counter_file.write(data)
+
+    reopened = CounterFile(path, NAMES)
+    reopened.open()
+    assert reopened.totals() == {"total_requests": 0, "error_count": 0}
+    reopened.add("error_count")
+    reopened.checkpoint()
+    assert reopened.totals()["error_count"] == 1
+
+def test_reader_sees_checkpointed_totals(tmp_path):
+    path = str(tmp_path / "counters.bin")
+    reader = CounterFile(path, NAMES)
+    reader.open_reader()
+    assert reader.totals() == {"total_requests": 0, "error_count": 0}
+
+    writer = CounterFile(path, NAMES)
+    writer.open()
+    writer.add("total_requests", 4)
+    writer.checkpoint()
+    reader = CounterFile(path, NAMES)
+    reader.open_reader()
+    assert reader.totals()["total_requests"] == 4
+
+def test_concurrent_start_opens_once(tmp_path, monkeypatch):
+    counters = CounterFile(str(tmp_path / "counters.bin"), NAMES, checkpoint_interval=60)
+    opened = []
+    open_file = counters.open
+    monkeypatch.setattr(counters, "open", lambda: opened.append(1) or open_file())
+    threads = [threading.Thread(target=counters.start) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
@@ -0,0 +1,64 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from history_export import ExportError, export_watermark, iter_export, parse_since
+from models import db, DeviceAction
+
+def add_actions(count, stamped):
+    for index in range(count):
+        db.session.add(DeviceAction(device_id=f"device-{index % 3}", action_type="scan",
+                                    timestamp=stamped + timedelta(seconds=index)))
+    db.session.commit()
+
+def export_csv(**kwargs):
+    data = b"".join(iter_export("actions", "csv", **kwargs)).decode()
+    return list(csv.DictReader(io.StringIO(data)))
+
+def test_chunked_export_has_every_row_once(app):
+    add_actions(25, datetime.utcnow() - timedelta(hours=1))
+    rows = export_csv(chunk_size=4)
+    assert [int(row["id"]) for row in rows] == list(range(1, 26))
+    assert rows[0]["timestamp"] == db.session.get(DeviceAction, 1).timestamp.isoformat()
+
+def test_incremental_exports_pick_up_rows_that_commit_late(app):
+    now = datetime.utcnow()
+    add_actions(5, now - timedelta(hours=1))
+    first_until = export_watermark(settle=60, now=now)
+    first = export_csv(until=first_until)
+    assert len(first) == 5
+
+    # Stamped before the first export's moment but committed after it
+    add_actions(2, now - timedelta(seconds=10))
+    second_until = export_watermark(first_until, settle=60, now=now + timedelta(minutes=5))
+    second = export_csv(since=first_until, until=second_until)
+    assert len(second) == 2
+    assert {row["id"] for row in first}.isdisjoint(row["id"] for row in second)
+
+def test_watermark_never_moves_back():
+    since = datetime.utcnow() + timedelta(hours=1)
+    assert export_watermark(since) == since
+
+def test_bad_arguments_raise_before_streaming(app):
+    with pytest.raises(ExportError):
+        iter_export("passwords")
+    with pytest.raises(ExportError):
+        iter_export("actions", "xml")
+    with pytest.raises(ExportError):
+        parse_since("yesterday")
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_exports_round_trip(app, fmt):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+    add_actions(30, datetime.utcnow() - timedelta(hours=1))
+    data = b"".join(iter_export("actions", fmt, chunk_size=7))
+    if fmt == "parquet":
+        table = pyarrow.parquet.read_table(io.BytesIO(data))
+    else:
+        table = pyarrow.ipc.open_stream(data).read_all()
+    assert table.num_rows == 30
+    assert table.column("id").to_pylist() == list(range(1, 31))
@@ -0,0 +1,20 @@
+from idempotency import IdempotencyCache
+
+def test_size_bound_never_drops_a_running_claim():
+    cache = IdempotencyCache(max_entries=2, wait_timeout=0)
+    assert cache.claim("running") == (True, None)
+    for index in range(5):
+        key = f"done-{index}"
+        assert cache.claim(key) == (True, None)
+        cache.complete(key, {"index": index})
+
+    assert cache.claim("running") == (False, None)
+    assert cache.get_stats()["entries"] == 2
+    assert cache.claim("done-0") == (True, None)
+    assert cache.claim("done-4") == (False, {"index": 4})
+
+def test_released_claim_can_be_claimed_again():
+    cache = IdempotencyCache(wait_timeout=0)
+    cache.claim("key")
+    cache.release("key")
+    assert cache.claim("key") == (True, None)
@@ -0,0 +1,35 @@
+import os
+
+from flask import Flask
+
+from page_cache import AssetManifest, PageCache
+
+def make_app(tmp_path):
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "static").mkdir()
+    (tmp_path / "templates" / "page.html").write_text("{{ asset('app.js') }} {{ value }}")
+    (tmp_path / "static" / "app.js").write_text("console.log(1)")
+    os.utime(tmp_path / "templates" / "page.html", (1000, 1000))
+    os.utime(tmp_path / "static" / "app.js", (2000, 2000))
+    app = Flask(__name__, root_path=str(tmp_path))
+    assets = AssetManifest(app.static_folder)
+    app.jinja_env.globals["asset"] = assets.url_name
+    return app, PageCache(app, assets)
+
+def test_context_is_built_only_when_rendering(tmp_path):
+    app, cache = make_app(tmp_path)
+    calls = []
+
+    def context():
+        calls.append(1)
+        return {"value": "rendered"}
+
+    first = cache.get("page.html", context)
+    assert cache.get("page.html", context) is first
+    assert b"rendered" in first.body
+    assert len(calls) == 1
+
+def test_last_modified_follows_the_newest_asset(tmp_path):
+    app, cache = make_app(tmp_path)
+    page = cache.get("page.html")
+    assert page.last_modified.timestamp() == 2000
@@ -0,0 +1,88 @@
+from conversation_log import ConversationLog
+from models import db, SystemAlert
+from search_index import KIND_ALERT, HistorySearch, InvertedIndex
+
+def add_alert(row_id, message):
+    db.session.add(SystemAlert(id=row_id, device_id="device-1", alert_type="notice", message=message))
+    db.session.commit()
+
+def found(search, query):
+    return [result["id"] for result in search.search(query)[2]]
+
+def test_search_reads_only_what_catch_up_indexed(app):
+    search = HistorySearch()
+    add_alert(1, "reactor overheating")
+    assert found(search, "reactor") == []
+    assert search.catch_up() == 1
+    assert found(search, "reactor") == [1]
+
+def test_row_committed_below_the_newest_id_is_indexed_later(app):
+    search = HistorySearch()
+    add_alert(1, "first alert")
+    add_alert(3, "third alert")
+    search.catch_up(now=0)
+    assert search.get_stats()["gaps"] == 1
+
+    add_alert(2, "late alert")
+    assert search.catch_up(now=1) == 1
+    assert found(search, "late") == [2]
+    assert search.get_stats()["gaps"] == 0
+
+def test_gaps_are_given_up_after_the_timeout(app):
+    search = HistorySearch(gap_timeout=10)
+    add_alert(5, "alert")
+    search.catch_up(now=0)
+    assert search.get_stats()["gaps"] == 4
+    search.catch_up(now=10)
+    assert search.get_stats()["gaps"] == 0
+    assert search.get_stats()["gaps_expired"] == 4
+
+def test_gap_tracking_is_bounded_to_the_newest_ids(app):
+    search = HistorySearch(max_gaps=3)
+    add_alert(100, "alert")
+    search.catch_up(now=0)
+    assert sorted(search.gaps[KIND_ALERT]) == [97, 98, 99]
+
+def test_removed_rows_stop_counting_toward_results(app):
+    search = HistorySearch()
+    for row_id in range(1, 6):
+        add_alert(row_id, "coolant leak")
+    search.catch_up()
+    search.remove(KIND_ALERT, [1, 2])
+    total, _, results = search.search("coolant", per_page=2)
+    assert total == 3
+    assert [result["id"] for result in results] == [5, 4]
+    assert search.get_stats()["documents"] == 3
+
+def test_rows_deleted_elsewhere_are_removed_when_found(app):
+    search = HistorySearch()
+    add_alert(1, "coolant leak")
+    add_alert(2, "coolant leak")
+    search.catch_up()
+    db.session.delete(db.session.get(SystemAlert, 2))
+    db.session.commit()
+    assert search.search("coolant")[0] == 1
+    assert search.search("coolant")[0] == 1
+    assert search.get_stats()["documents"] == 1
+
+def test_compaction_frees_postings_of_removed_documents():
+    index = InvertedIndex(compact_after=2)
+    index.add(KIND_ALERT, 1, "coolant leak")
+    index.add(KIND_ALERT, 2, "coolant pressure")
+    index.add(KIND_ALERT, 3, "pressure drop")
+    index.remove(KIND_ALERT, 1)
+    index.remove(KIND_ALERT, 2)
+    assert index.compactions == 1
+    assert "leak" not in index.postings
+    assert index.total_length == 2
+    assert index.search("pressure")[2][0][2] == 3
+
+def test_retention_reports_deleted_conversations(app):
+    log = ConversationLog(retention=1)
+    deleted = []
+    log.on_delete.append(deleted.extend)
+    log.record("session", "first", "response", 1)
+    log.flush()
+    log.record("session", "second", "response", 1)
+    log.flush()
+    assert deleted == [1]
@@ -0,0 +1,82 @@
+import threading
+from types import SimpleNamespace
+
+from watch_events import WATCH_FIELDS, WatchJournal, capture
+
+def make_watch():
+    watch = SimpleNamespace(**{name: 0 for name in WATCH_FIELDS})
+    for name in ("actions_log", "system_alerts", "active_protocols", "data_streams"):
+        setattr(watch, name, [])
+    return watch
+
+def open_journal(directory, watch, snapshot_every=1000):
+    journal = WatchJournal(str(directory), snapshot_every=snapshot_every, fsync_interval=0)
+    journal.restore(watch)
+    return journal
+
+def recovered(directory):
+    watch = make_watch()
+    open_journal(directory, watch).close()
+    return capture(watch)
+
+def test_replay_restores_commands(tmp_path):
+    watch = make_watch()
+    journal = open_journal(tmp_path, watch)
+    for index in range(5):
+        with journal.command(watch, "boost"):
+            watch.quantum_energy += 10
+            watch.actions_log.append(f"boost {index}")
+    with journal.command(watch, "trim"):
+        watch.actions_log = watch.actions_log[2:] + ["trimmed"]
+    journal.close()
+    assert recovered(tmp_path) == capture(watch)
+
+def test_replay_after_snapshot(tmp_path):
+    watch = make_watch()
+    journal = open_journal(tmp_path, watch, snapshot_every=3)
+    for index in range(10):
+        with journal.command(watch, "log"):
+            watch.actions_log.append(index)
+    journal.close()
+    assert recovered(tmp_path) == capture(watch)
+
+def test_concurrent_commands_do_not_overlap(tmp_path):
+    watch = make_watch()
+    journal = open_journal(tmp_path, watch)
+    first_started = threading.Event()
+    second_done = threading.Event()
+
+    def first():
+        with journal.command(watch, "first"):
+            watch.actions_log.append("x")
+            first_started.set()
+            # Without the journal lock the second command would run (and finish) here
+            second_done.wait(0.2)
+            watch.actions_log.append("z")
+
+    def second():
+        first_started.wait()
+        with journal.command(watch, "second"):
+            watch.actions_log.append("y")
+        second_done.set()
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+    assert watch.actions_log == ["x", "z", "y"]
+    assert recovered(tmp_path) == capture(watch)
+
+def test_torn_tail_is_truncated(tmp_path):
+    watch = make_watch()
+    journal = open_journal(tmp_path, watch)
+    for index in range(3):
+        with journal.command(watch, "log"):
+            watch.actions_log.append(index)
+    path = journal._segment_path(journal.segment)
+    journal.close()
+    with open(path, "ab") as segment_file:
+        segment_file.write(b"\x00\x00\x01\x00partial")
+    assert recovered(tmp_path)["actions_log"] == [0, 1, 2]
@@ -0,0 +1,88 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+UserAgentInfo = namedtuple("UserAgentInfo", ["form_factor", "os", "browser"])
+
+# Keyword table: one regex pass splits the lowercased user agent into words,
+# and each word is looked up here to find the token it signals.
+_KEYWORD_TOKENS = {
+    "phone": "windows_phone",
+    "watch": "watch",
+    "wearable": "watch",
+    "wear": "watch",
+    "ipad": "ipad",
+    "iphone": "iphone",
+    "ipod": "iphone",
+    "tablet": "tablet",
+    "kindle": "tablet",
+    "silk": "tablet",
+    "playbook": "tablet",
+    "android": "android",
+    "mobile": "mobile",
+    "cros": "cros",
+    "macintosh": "mac",
+    "windows": "windows",
+    "linux": "linux",
+    "edg": "edge",
+    "edge": "edge",
+    "edga": "edge",
+    "edgios": "edge",
+    "opr": "opera",
+    "opera": "opera",
+    "samsungbrowser": "samsung",
+    "chrome": "chrome",
+    "crios": "chrome",
+    "firefox": "firefox",
+    "fxios": "firefox",
+    "safari": "safari",
+}
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Resolution order: the first rule whose token was seen wins
+_OS_RULES = (
+    ("Windows Phone", "windows_phone"),
+    ("Android", "android"),
+    ("iOS", "iphone"),
+    ("iOS", "ipad"),
+    ("Chrome OS", "cros"),
+    ("macOS", "mac"),
+    ("Windows", "windows"),
+    ("Linux", "linux"),
+)
+_BROWSER_RULES = (
+    ("Edge", "edge"),
+    ("Opera", "opera"),
+    ("Samsung Internet", "samsung"),
+    ("Chrome", "chrome"),
+    ("Firefox", "firefox"),
+    ("Safari", "safari"),
+)
+
+CACHE_SIZE = 2048
+
+def _resolve(rules, seen, default):
+    for label, token in rules:
+        if token in seen:
+            return label
+    return default
+
+def _form_factor(seen):
+    if "watch" in seen:
+        return "watch"
+    if "ipad" in seen or "tablet" in seen or ("android" in seen and "mobile" not in seen):
+        return "tablet"
+    if "iphone" in seen or "mobile" in seen or "windows_phone" in seen:
+        return "phone"
+    return "computer"
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_user_agent(user_agent):
+    """Classify a raw user agent string into form factor, OS and browser"""
+    lookup = _KEYWORD_TOKENS.get
+    seen = {lookup(word) for word in _WORD_PATTERN.findall((user_agent or "").lower())}
+    return UserAgentInfo(
+        form_factor=_form_factor(seen),
+        os=_resolve(_OS_RULES, seen, "Unknown"),
+        browser=_resolve(_BROWSER_RULES, seen, "Unknown")
+    )
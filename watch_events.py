@@ -0,0 +1,283 @@
+import fcntl
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+SEGMENT_MAGIC = b"QWEL\x01"
+# Record header: payload length, CRC32 of sequence+timestamp+payload, sequence, timestamp
+_RECORD = struct.Struct(">IIQd")
+_CRC_PREFIX = struct.Struct(">Qd")
+
+# Persisted QuantumWatch fields. Field ids are positions in this tuple and are
+# written to the log, so new fields may only be appended.
+WATCH_FIELDS = (
+    "status", "activation_count", "build_count", "signature_count",
+    "quantum_energy", "neural_sync", "matrix_stability", "security_level", "threat_level",
+    "admin_mode", "system_performance", "cpu_usage", "memory_usage", "cache_hit_rate",
+    "device_sync_enabled", "actions_log", "system_alerts", "active_protocols", "data_streams",
+)
+_FIELD_IDS = {name: field_id for field_id, name in enumerate(WATCH_FIELDS)}
+
+# Change operations stored per field: replace the value, append items to a
+# list, or drop items from the front of a list and append new ones
+OP_SET = 0
+OP_EXTEND = 1
+OP_SLIDE = 2
+
+def capture(watch):
+    """Copy the persisted fields of a watch; lists are copied so later in-place appends show up in a diff"""
+    state = {}
+    for name in WATCH_FIELDS:
+        value = getattr(watch, name)
+        state[name] = list(value) if isinstance(value, list) else value
+    return state
+
+def _list_op(old, new):
+    if new[:len(old)] == old:
+        return [OP_EXTEND, new[len(old):]]
+    if new:
+        for drop in range(1, len(old)):
+            if old[drop] == new[0] and new[:len(old) - drop] == old[drop:]:
+                return [OP_SLIDE, drop, new[len(old) - drop:]]
+    return None
+
+def diff_states(before, after):
+    ops = []
+    for name, new in after.items():
+        old = before[name]
+        if new == old:
+            continue
+        op = _list_op(old, new) if isinstance(old, list) and isinstance(new, list) else None
+        ops.append([_FIELD_IDS[name]] + (op or [OP_SET, new]))
+    return ops
+
+def apply_ops(state, ops):
+    """Apply one event's ops to state in place; list values are mutated, so state must own them"""
+    for op in ops:
+        name = WATCH_FIELDS[op[0]]
+        if op[1] == OP_SET:
+            state[name] = op[2]
+        elif op[1] == OP_EXTEND:
+            state[name].extend(op[2])
+        else:
+            del state[name][:op[2]]
+            state[name].extend(op[3])
+
+class WatchJournal:
+    """Append-only event log of QuantumWatch changes with periodic snapshots
+
+    Each command (activate, boost, reboot, device sync, ...) is journaled as
+    the field changes it produced rather than the call itself, so replay is
+    deterministic even for commands that use randomness or the clock.
+    Records carry a CRC, and a torn record at the end of the log (crash
+    mid-write) is truncated on startup.
+
+    Every snapshot_every events the full state is written to snapshot.json
+    (atomically, via rename) and a new log segment is started. Older segments
+    are then deleted, so startup loads the snapshot and replays only the tail.
+    Records are flushed to the OS on every append. fsync runs at most every
+    fsync_interval seconds on a background thread, or on every append when
+    fsync_interval is 0. Only the process holding the directory lock
+    journals; any others run in memory.
+    """
+
+    def __init__(self, directory, snapshot_every=1000, fsync_interval=1.0):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync_interval = fsync_interval
+        self.enabled = False
+        self.sequence = 0
+        self.segment = 0
+        self.events_since_snapshot = 0
+        self.file = None
+        self.lock_file = None
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.depth = threading.local()
+        self.thread = None
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"events-{segment:08d}.log")
+
+    def _segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith("events-") and name.endswith(".log"):
+                segments.append(int(name[7:-4]))
+        return sorted(segments)
+
+    def open(self, initial_state):
+        """Lock the journal directory and return the recovered state, or None if there is none
+
+        Events in the log before the first snapshot are replayed on top of
+        initial_state, the state of a freshly constructed watch.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock_file = open(os.path.join(self.directory, "journal.lock"), "w")
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Watch journal {self.directory} is held by another process; running without persistence")
+            self.lock_file.close()
+            self.lock_file = None
+            return None
+
+        state = None
+        base = dict(initial_state)
+        snapshot_path = os.path.join(self.directory, "snapshot.json")
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            # Fields added since the snapshot was written keep their initial values
+            base.update((name, value) for name, value in snapshot["state"].items() if name in _FIELD_IDS)
+            state = base
+            self.sequence = snapshot["sequence"]
+            self.segment = snapshot["segment"]
+
+        for segment in self._segments():
+            if segment < self.segment:
+                continue
+            if self._replay_segment(segment, base):
+                state = base
+            self.segment = segment
+
+        self.file = open(self._segment_path(self.segment), "ab")
+        if self.file.tell() == 0:
+            self.file.write(SEGMENT_MAGIC)
+            self.file.flush()
+        self.enabled = True
+        return state
+
+    def _replay_segment(self, segment, state):
+        path = self._segment_path(segment)
+        with open(path, "rb") as segment_file:
+            data = segment_file.read()
+        if data[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise RuntimeError(f"{path} is not a watch event log")
+
+        offset = len(SEGMENT_MAGIC)
+        replayed = False
+        while offset + _RECORD.size <= len(data):
+            length, crc, sequence, timestamp = _RECORD.unpack_from(data, offset)
+            payload = data[offset + _RECORD.size:offset + _RECORD.size + length]
+            if len(payload) < length or zlib.crc32(payload, zlib.crc32(_CRC_PREFIX.pack(sequence, timestamp))) != crc:
+                break
+            if sequence > self.sequence:
+                _, ops = json.loads(payload)
+                apply_ops(state, ops)
+                replayed = True
+                self.sequence = sequence
+                self.events_since_snapshot += 1
+            offset += _RECORD.size + length
+
+        if offset < len(data):
+            print(f"Truncating torn record at byte {offset} of {path}")
+            with open(path, "r+b") as segment_file:
+                segment_file.truncate(offset)
+        return replayed
+
+    def restore(self, watch):
+        """Open the journal and load any recovered state into watch"""
+        state = self.open(capture(watch))
+        if state:
+            for name, value in state.items():
+                setattr(watch, name, value)
+        return state is not None
+
+    @contextmanager
+    def command(self, watch, name):
+        """Journal the field changes made to watch inside the block as one event
+
+        The lock is held from the first capture until the event is written,
+        so commands on other threads can't interleave and show up in each
+        other's diffs.
+        """
+        depth = getattr(self.depth, "value", 0)
+        if not self.enabled or depth:
+            yield
+            return
+        with self.lock:
+            before = capture(watch)
+            self.depth.value = 1
+            try:
+                yield
+            finally:
+                self.depth.value = 0
+                ops = diff_states(before, capture(watch))
+                if ops and self.enabled:
+                    self.append(name, ops, watch)
+
+    def append(self, name, ops, watch=None):
+        payload = json.dumps([name, ops], separators=(",", ":")).encode()
+        with self.lock:
+            self.sequence += 1
+            timestamp = time.time()
+            crc = zlib.crc32(payload, zlib.crc32(_CRC_PREFIX.pack(self.sequence, timestamp)))
+            self.file.write(_RECORD.pack(len(payload), crc, self.sequence, timestamp) + payload)
+            self.file.flush()
+            if self.fsync_interval <= 0:
+                os.fsync(self.file.fileno())
+            else:
+                self.dirty = True
+            self.events_since_snapshot += 1
+            if watch is not None and self.events_since_snapshot >= self.snapshot_every:
+                self.snapshot(capture(watch))
+
+    def snapshot(self, state):
+        """Write state as of the current sequence and start a new segment"""
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.segment += 1
+            self.file = open(self._segment_path(self.segment), "ab")
+            self.file.write(SEGMENT_MAGIC)
+            self.file.flush()
+
+            snapshot_path = os.path.join(self.directory, "snapshot.json")
+            temporary_path = snapshot_path + ".tmp"
+            with open(temporary_path, "w") as snapshot_file:
+                json.dump({"sequence": self.sequence, "segment": self.segment, "state": state}, snapshot_file)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temporary_path, snapshot_path)
+            self.events_since_snapshot = 0
+
+            for segment in self._segments():
+                if segment < self.segment:
+                    os.remove(self._segment_path(segment))
+
+    def sync(self):
+        with self.lock:
+            if self.dirty and self.file is not None:
+                os.fsync(self.file.fileno())
+                self.dirty = False
+
+    def start(self):
+        if self.enabled and self.fsync_interval > 0 and self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Watch journal error: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+            self.enabled = False
+            if self.lock_file is not None:
+                self.lock_file.close()
+                self.lock_file = None